@@ -1,23 +1,86 @@
 from django.contrib import admin
+from django.contrib.admin.utils import get_fields_from_path
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth import get_user_model
+from django.db import models
+
+from .models import Business, Review, Task
 
 User = get_user_model()
 
-class CustomUserAdmin(BaseUserAdmin):
-    def get_queryset(self, request):
-        queryset = super().get_queryset(request)
-        # Check if the is_staff filter is applied in the URL
-        if 'is_staff__exact' in request.GET:
-            is_staff_value = request.GET['is_staff__exact']
-            # Djongo has issues with boolean filtering in admin, filter in Python
-            if is_staff_value == '1':
-                return [user for user in queryset.all() if user.is_staff]
-            elif is_staff_value == '0':
-                 return [user for user in queryset.all() if not user.is_staff]
+class DjongoBooleanFieldListFilter(admin.BooleanFieldListFilter):
+    """
+    Boolean list filter that always runs in the database.
+
+    Djongo does not translate the ``<field>__exact=1`` lookups the stock
+    filter builds from the query string, and documents written before a
+    field existed have no value at all. Filter on real booleans instead and
+    count a missing value as False.
+    """
 
+    def queryset(self, request, queryset):
+        # __in instead of a plain True/False match, see BusinessQuerySet
+        if self.lookup_val in ('1', 'True', 'true'):
+            return queryset.filter(**{f'{self.field_path}__in': [True]})
+        if self.lookup_val in ('0', 'False', 'false'):
+            return queryset.filter(
+                models.Q(**{f'{self.field_path}__in': [False]}) | models.Q(**{f'{self.field_path}__isnull': True})
+            )
+        if self.lookup_val2 in ('True', 'False'):
+            return queryset.filter(**{f'{self.field_path}__isnull': self.lookup_val2 == 'True'})
         return queryset
 
+class DjongoBooleanFilterMixin:
+    """
+    ModelAdmin mixin that swaps plain boolean entries of ``list_filter``
+    (including related paths such as ``business__is_approved``) for
+    DjongoBooleanFieldListFilter, so changelists stay paginated querysets.
+    """
+
+    def get_list_filter(self, request):
+        list_filter = []
+        for item in super().get_list_filter(request):
+            if isinstance(item, str) and self._is_boolean_path(item):
+                item = (item, DjongoBooleanFieldListFilter)
+            list_filter.append(item)
+        return list_filter
+
+    def _is_boolean_path(self, path):
+        try:
+            field = get_fields_from_path(self.model, path)[-1]
+        except Exception:
+            return False
+        return isinstance(field, models.BooleanField)
+
+class CustomUserAdmin(DjongoBooleanFilterMixin, BaseUserAdmin):
+    pass
+
+@admin.register(Business)
+class BusinessAdmin(DjongoBooleanFilterMixin, admin.ModelAdmin):
+    list_display = ('name', 'category', 'owner', 'is_approved', 'avg_rating', 'review_count', 'created_at')
+    list_filter = ('is_approved', 'category')
+    list_select_related = ('owner',)
+    search_fields = ('name',)
+    raw_id_fields = ('owner',)
+    readonly_fields = (
+        'review_count', 'rating_sum', 'avg_rating',
+        'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count',
+    )
+
+@admin.register(Review)
+class ReviewAdmin(DjongoBooleanFilterMixin, admin.ModelAdmin):
+    list_display = ('business', 'user', 'rating', 'created_at')
+    list_filter = ('rating', 'business__is_approved')
+    list_select_related = ('business', 'user')
+    raw_id_fields = ('business', 'user')
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'max_attempts', 'run_at', 'updated_at')
+    list_filter = ('status', 'name')
+    search_fields = ('key',)
+    readonly_fields = ('created_at', 'updated_at')
+
 # Unregister the default UserAdmin if it was registered implicitly
 try:
     admin.site.unregister(User)
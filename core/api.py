@@ -0,0 +1,214 @@
+"""
+Read-only JSON API (v1) over businesses and reviews.
+
+Responses are built from ``.values()`` rows, so serialization never touches
+related objects one row at a time. Lists use opaque keyset cursors, and
+``fields`` selects a sparse set of attributes. Every response carries an
+ETag derived from the catalog version, so a poll with a matching
+If-None-Match is answered with 304 before any query runs.
+"""
+import hashlib
+from functools import wraps
+
+from django.http import HttpResponseNotAllowed, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from . import cache as listing_cache
+from . import geo
+from . import search as search_index
+from .models import Business, Review
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_RADIUS_KM = 200
+
+BUSINESS_FIELDS = (
+    'id', 'name', 'category', 'address', 'phone', 'website', 'description', 'services',
+    'avg_rating', 'review_count', 'latitude', 'longitude', 'created_at', 'updated_at',
+)
+BUSINESS_LIST_FIELDS = ('id', 'name', 'category', 'address', 'avg_rating', 'review_count')
+RATING_FIELDS = tuple(f'rating_{i}_count' for i in range(1, 6))
+
+# Review attribute -> lookup, the author's name comes from the same query
+REVIEW_FIELDS = {
+    'id': 'id',
+    'rating': 'rating',
+    'comment': 'comment',
+    'reply': 'reply',
+    'user': 'user__username',
+    'created_at': 'created_at',
+}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def api_view(func):
+    """GET-only JSON endpoint with ETag revalidation and ApiError handling."""
+    @wraps(func)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        digest = hashlib.md5(
+            f'{listing_cache.catalog_version()}:{request.get_full_path()}'.encode()
+        ).hexdigest()
+        etag = f'"{digest}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            try:
+                response = func(request, *args, **kwargs)
+            except ApiError as exc:
+                return JsonResponse({'error': str(exc)}, status=exc.status)
+        response['ETag'] = etag
+        # Clients may keep responses but must revalidate them
+        patch_cache_control(response, no_cache=True)
+        return response
+    return wrapper
+
+
+def _fields(request, allowed, default):
+    requested = request.GET.get('fields')
+    if not requested:
+        return list(default)
+    fields = [field.strip() for field in requested.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError('limit must be an integer')
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def _keyset(queryset, field, request):
+    try:
+        return keyset_page(queryset, field, request.GET.get('cursor'), _limit(request))
+    except InvalidCursor:
+        raise ApiError('Invalid cursor')
+
+
+def _page(results, next_cursor):
+    return JsonResponse({'results': results, 'next_cursor': next_cursor})
+
+
+def _approved(request):
+    return (
+        Business.objects.approved()
+        .in_category(request.GET.get('category', ''))
+        .min_rating(request.GET.get('min_rating', ''))
+    )
+
+
+@api_view
+def business_list(request):
+    """Approved businesses ordered by rating, optionally by category and minimum rating."""
+    fields = _fields(request, BUSINESS_FIELDS, BUSINESS_LIST_FIELDS)
+    rows, next_cursor = _keyset(
+        _approved(request).values(*set(fields) | {'id', 'avg_rating'}), 'avg_rating', request
+    )
+    return _page([{field: row[field] for field in fields} for row in rows], next_cursor)
+
+
+@api_view
+def business_search(request):
+    """Ranked full-text search; the cursor is a position in the ranked results."""
+    query = request.GET.get('q', '').strip()
+    if not query:
+        raise ApiError('q is required')
+    fields = _fields(request, BUSINESS_FIELDS, BUSINESS_LIST_FIELDS)
+    limit = _limit(request)
+    offset = 0
+    if request.GET.get('cursor'):
+        try:
+            offset = int(decode_cursor(request.GET['cursor'])[0])
+        except (InvalidCursor, IndexError, TypeError, ValueError):
+            raise ApiError('Invalid cursor')
+
+    # One more than the page, to know whether another one follows
+    ranked = search_index.search(
+        query, request.GET.get('category', ''), request.GET.get('min_rating', ''), limit=offset + limit + 1,
+    )
+    page_ids = ranked[offset:offset + limit]
+    rows = {
+        row['id']: row
+        for row in Business.objects.filter(pk__in=page_ids).values(*set(fields) | {'id'})
+    }
+    results = [{field: rows[pk][field] for field in fields} for pk in page_ids if pk in rows]
+    next_cursor = encode_cursor([offset + limit]) if offset + limit < len(ranked) else None
+    return _page(results, next_cursor)
+
+
+def _coordinate(request, name, bound):
+    try:
+        value = float(request.GET[name])
+    except KeyError:
+        raise ApiError(f'{name} is required')
+    except ValueError:
+        raise ApiError(f'{name} must be a number')
+    if not -bound <= value <= bound:
+        raise ApiError(f'{name} must be between -{bound} and {bound}')
+    return value
+
+
+@api_view
+def business_nearby(request):
+    """
+    Approved businesses nearest to ``lat``/``lng``, each with its
+    ``distance_km``: the ``limit`` nearest, or all within ``radius`` km
+    (up to ``limit``). Filters as for the list.
+    """
+    latitude, longitude = _coordinate(request, 'lat', 90), _coordinate(request, 'lng', 180)
+    fields = _fields(request, BUSINESS_FIELDS, BUSINESS_LIST_FIELDS)
+    limit = _limit(request)
+    if request.GET.get('radius'):
+        try:
+            radius = float(request.GET['radius'])
+        except ValueError:
+            raise ApiError('radius must be a number')
+        if not 0 < radius <= MAX_RADIUS_KM:
+            raise ApiError(f'radius must be between 0 and {MAX_RADIUS_KM}')
+        places = geo.within(_approved(request), latitude, longitude, radius)[:limit]
+    else:
+        places = geo.nearest(_approved(request), latitude, longitude, limit)
+    rows = {
+        row['id']: row
+        for row in Business.objects.filter(pk__in=[place.pk for place in places]).values(*set(fields) | {'id'})
+    }
+    results = [
+        dict({field: rows[place.pk][field] for field in fields}, distance_km=round(place.distance, 3))
+        for place in places if place.pk in rows
+    ]
+    return _page(results, None)
+
+
+@api_view
+def business_detail(request, pk):
+    fields = _fields(request, BUSINESS_FIELDS + ('rating_counts',), BUSINESS_FIELDS + ('rating_counts',))
+    lookups = (set(fields) - {'rating_counts'}) | set(RATING_FIELDS)
+    row = Business.objects.approved().filter(pk=pk).values(*lookups).first()
+    if row is None:
+        raise ApiError('Not found', status=404)
+    result = {field: row[field] for field in fields if field != 'rating_counts'}
+    if 'rating_counts' in fields:
+        result['rating_counts'] = {str(i): row[f'rating_{i}_count'] or 0 for i in range(1, 6)}
+    return JsonResponse(result)
+
+
+@api_view
+def business_reviews(request, pk):
+    """Reviews of an approved business, newest first."""
+    if not Business.objects.approved().filter(pk=pk).exists():
+        raise ApiError('Not found', status=404)
+    fields = _fields(request, REVIEW_FIELDS, REVIEW_FIELDS)
+    lookups = {REVIEW_FIELDS[field] for field in fields} | {'id', 'created_at'}
+    rows, next_cursor = _keyset(Review.objects.filter(business_id=pk).values(*lookups), 'created_at', request)
+    return _page([{field: row[REVIEW_FIELDS[field]] for field in fields} for row in rows], next_cursor)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import db_pool, signals  # noqa: F401
+
+        # Must happen before djongo creates its MongoClient
+        db_pool.install()
@@ -0,0 +1,141 @@
+"""
+Async versions of the read-heavy views, routed instead of the sync ones
+when settings.ASYNC_VIEWS is on and the site is served over ASGI.
+
+The independent queries of a page are started together and awaited with
+asyncio.gather. Each runs in a thread of the core.concurrency pool, so the
+database round trips overlap instead of queueing behind the single thread
+Django's async ORM methods share.
+Templates are rendered the same way, so one slow page doesn't hold up
+the others, and POSTs are handed to the sync views.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage, Paginator
+from django.shortcuts import get_object_or_404, render
+
+from . import cache as listing_cache
+from . import fragments
+from . import views
+from .concurrency import run_in_thread
+from .http_cache import business_validator, cached_page, catalog_validator
+from .models import Business
+
+
+# Every blocking call goes through the shared pool of core.concurrency
+query = run_in_thread
+
+
+def render_async(request, template_name, context):
+    # The user was already loaded by the conditional GET check or the
+    # middleware, so templates need no thread-bound state either
+    return query(render, request, template_name, context)
+
+
+def _page_number(value):
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _slice(queryset, per_page, number):
+    return queryset[(number - 1) * per_page:number * per_page]
+
+
+async def _page(paginator, number, rows):
+    """
+    Build the page from rows fetched on the assumption that ``number`` is
+    valid; only an out-of-range number costs a round trip for the last page.
+    """
+    try:
+        page = paginator.page(number)
+    except InvalidPage:
+        page = paginator.get_page(number)
+        rows = await query(list, page.object_list)
+    page.object_list = rows
+    return page
+
+
+async def _paginate(queryset, per_page, page):
+    """Fetch the requested page concurrently with the COUNT query."""
+    number = _page_number(page)
+    paginator = Paginator(queryset, per_page)
+    paginator.count, rows = await asyncio.gather(
+        query(queryset.count),
+        query(list, _slice(queryset, per_page, number)),
+    )
+    return await _page(paginator, number, rows)
+
+
+@cached_page(catalog_validator)
+async def home(request):
+    # The featured list and categories are cached separately, fetch both at once
+    featured_businesses, categories = await asyncio.gather(
+        query(listing_cache.featured_businesses),
+        query(listing_cache.categories),
+    )
+    await query(fragments.render_fragments, 'includes/featured_card.html', featured_businesses, 'business')
+    return await render_async(request, 'home.html', {
+        'featured_businesses': featured_businesses,
+        'categories': categories,
+    })
+
+
+async def search(request):
+    query_text = request.GET.get('q', '')
+    category = request.GET.get('category', '')
+    rating_filter = request.GET.get('rating', '')
+
+    # The gazetteer is read from disk the first time a place is looked up
+    location = await query(views.search_location, request.GET)
+    # The facets come from the same queries as the results
+    businesses_page, facets = await query(
+        views.search_page, query_text, category, rating_filter, request.GET.get('page'), location,
+    )
+    await query(
+        fragments.render_fragments, 'includes/business_card.html', businesses_page.object_list, 'business',
+        {'show_category': True}, variant='search',
+    )
+    return await render_async(request, 'search_results.html', {
+        'businesses': businesses_page,
+        'query': query_text,
+        'facets': facets,
+        'selected_category': category,
+        'selected_rating': rating_filter,
+        **views.search_location_context(request.GET, location),
+    })
+
+
+@cached_page(catalog_validator)
+async def category(request, category):
+    businesses = Business.objects.approved().in_category(category).by_rating()
+    businesses_page = await _paginate(businesses, views.LISTING_PAGE_SIZE, request.GET.get('page'))
+    await query(fragments.render_fragments, 'includes/business_card.html', businesses_page, 'business',
+                variant='category')
+    return await render_async(request, 'category.html', {
+        'businesses': businesses_page,
+        'category': category,
+    })
+
+
+@cached_page(business_validator)
+async def business_detail(request, pk):
+    if request.method == 'POST':
+        return await sync_to_async(views.business_detail)(request, pk)
+
+    # The business and its page of reviews only share the primary key
+    reviews = views.business_reviews(pk)
+    number = _page_number(request.GET.get('reviews_page'))
+    business, rows = await asyncio.gather(
+        query(get_object_or_404, Business, pk=pk),
+        query(list, _slice(reviews, views.REVIEWS_PER_PAGE, number)),
+    )
+    paginator = Paginator(reviews, views.REVIEWS_PER_PAGE)
+    # The stored counter replaces the COUNT query
+    paginator.count = business.review_count or 0
+    reviews_page = await _page(paginator, number, rows)
+
+    context = await query(views.business_detail_context, business, reviews_page)
+    return await render_async(request, 'business_detail.html', context)
@@ -0,0 +1,55 @@
+"""
+Authentication without database round trips on every request.
+
+Sessions use the cached_db engine: reads come from the cache and every
+write goes through to the database, so a cache flush only costs a reload.
+CachedModelBackend keeps the signed-in User in the cache as well; within a
+request AuthenticationMiddleware already loads it only once.
+
+It is the only backend listed, so a failed login checks the password once.
+Sessions signed in before it name the plain ModelBackend; get_user() moves
+them over instead of signing those users out.
+
+Cached users are dropped whenever the user or their profile is saved or
+deleted (see core.signals), which covers staff toggles, password changes
+and profile edits. With a per-process cache the other workers see such a
+change once USER_CACHE_TIMEOUT expires, so keep it short unless
+CACHE_BACKEND is shared.
+"""
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+CACHED_BACKEND = 'core.auth.CachedModelBackend'
+# Backends that sessions from before CachedModelBackend may name
+REPLACED_BACKENDS = ('django.contrib.auth.backends.ModelBackend',)
+
+
+def _key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def invalidate_user(user_id):
+    cache.delete(_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = _key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user
+
+
+def get_user(request):
+    """django.contrib.auth.get_user(), for sessions of replaced backends too."""
+    if not hasattr(request, '_cached_user'):
+        if request.session.get(BACKEND_SESSION_KEY) in REPLACED_BACKENDS:
+            request.session[BACKEND_SESSION_KEY] = CACHED_BACKEND
+        request._cached_user = auth.get_user(request)
+    return request._cached_user
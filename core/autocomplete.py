@@ -0,0 +1,125 @@
+"""
+In-process prefix index for search-box suggestions.
+
+Every word position of an approved business name, and every category, is
+stored as a lowercase key in one sorted list; a lookup is a bisect to the
+first key with the prefix followed by a bounded scan. The index is rebuilt
+lazily after a business is saved or deleted (signalled through a version
+number in the cache so all processes sharing it notice) or when it is older
+than MAX_AGE seconds.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left
+
+from django.core.cache import cache
+from django.urls import reverse
+
+from .models import Business
+
+VERSION_CACHE_KEY = 'autocomplete:version'
+MAX_AGE = 300
+MAX_SCAN = 5000
+MEMO_SIZE = 2048
+CATEGORY_WEIGHT = 1e9
+
+
+class PrefixIndex:
+    def __init__(self, entries):
+        """``entries`` is an iterable of (key, weight, (type, label, url name, url arg))."""
+        entries = sorted(entries, key=lambda entry: entry[0])
+        self.keys = [key for key, _, _ in entries]
+        self.weights = [weight for _, weight, _ in entries]
+        self.suggestions = [suggestion for _, _, suggestion in entries]
+        self._memo = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, prefix, limit=8):
+        prefix = ' '.join(prefix.lower().split())
+        if not prefix:
+            return []
+        memo_key = (prefix, limit)
+        if memo_key in self._memo:
+            return self._memo[memo_key]
+
+        start = bisect_left(self.keys, prefix)
+        end = start
+        stop = min(len(self.keys), start + MAX_SCAN)
+        while end < stop and self.keys[end].startswith(prefix):
+            end += 1
+        best = heapq.nlargest(limit * 2, range(start, end), key=self.weights.__getitem__)
+
+        results, seen = [], set()
+        for position in best:
+            kind, label, url_name, url_arg = self.suggestions[position]
+            if (kind, label) in seen:
+                continue
+            seen.add((kind, label))
+            # URLs are only reversed for the handful of returned suggestions
+            results.append({'type': kind, 'label': label, 'url': reverse(url_name, args=[url_arg])})
+            if len(results) == limit:
+                break
+
+        if len(self._memo) >= MEMO_SIZE:
+            self._memo.clear()
+        self._memo[memo_key] = results
+        return results
+
+
+def _entries():
+    category_sizes = {}
+    for pk, name, category, review_count, avg_rating in (
+        Business.objects.approved()
+        .values_list('pk', 'name', 'category', 'review_count', 'avg_rating')
+        .iterator(chunk_size=2000)
+    ):
+        suggestion = ('business', name, 'business_detail', pk)
+        weight = (review_count or 0) * (avg_rating or 0) + 1
+        words = name.lower().split()
+        # Index every word position so "pizza" also suggests "Golden Pizzeria"
+        for i in range(len(words)):
+            yield ' '.join(words[i:]), weight, suggestion
+        if category:
+            category_sizes[category] = category_sizes.get(category, 0) + 1
+
+    for category, size in category_sizes.items():
+        suggestion = ('category', category, 'category', category)
+        # Categories rank above individual businesses sharing the prefix
+        yield category.lower(), CATEGORY_WEIGHT + size, suggestion
+
+
+_lock = threading.Lock()
+_index = None
+_built_version = None
+_built_at = 0.0
+
+
+def invalidate():
+    """Mark the index stale in every process sharing the cache."""
+    global _index
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
+    _index = None
+
+
+def get_index():
+    global _index, _built_version, _built_at
+    version = cache.get(VERSION_CACHE_KEY, 0)
+    index = _index
+    if index is not None and version == _built_version and time.monotonic() - _built_at < MAX_AGE:
+        return index
+    with _lock:
+        if _index is None or version != _built_version or time.monotonic() - _built_at >= MAX_AGE:
+            _index = PrefixIndex(_entries())
+            _built_version = version
+            _built_at = time.monotonic()
+        return _index
+
+
+def suggest(prefix, limit=8):
+    return get_index().lookup(prefix, limit)
@@ -0,0 +1,202 @@
+"""
+Helpers shared by the benchmark management commands.
+
+Benchmarks run against a throwaway test database created the same way the
+test runner does it, so they never touch the configured data.
+"""
+import random
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+
+from . import geo
+from .models import Business, Review
+from .profiling import percentile
+
+CATEGORIES = ['Restaurants', 'Retail', 'Services', 'Health', 'Automotive', 'Beauty', 'Education', 'Fitness']
+
+NAME_WORDS = [
+    'Golden', 'Corner', 'Urban', 'Village', 'Sunrise', 'Blue', 'Maple', 'Harbor', 'Family', 'City',
+    'Green', 'Royal', 'Happy', 'Silver', 'Main Street', 'Oak', 'River', 'Northside', 'Classic', 'Bright',
+]
+
+CATEGORY_WORDS = {
+    'Restaurants': ['Bistro', 'Pizzeria', 'Cafe', 'Diner', 'Grill', 'Bakery', 'Noodle House', 'Taqueria'],
+    'Retail': ['Books', 'Boutique', 'Hardware', 'Florist', 'Market', 'Toys', 'Outfitters', 'Gifts'],
+    'Services': ['Plumbing', 'Cleaning', 'Movers', 'Locksmith', 'Electric', 'Tailor', 'Printing', 'Laundry'],
+    'Health': ['Dental', 'Clinic', 'Pharmacy', 'Chiropractic', 'Optometry', 'Physio', 'Pediatrics', 'Wellness'],
+    'Automotive': ['Auto Repair', 'Tires', 'Car Wash', 'Body Shop', 'Detailing', 'Oil Change', 'Towing', 'Garage'],
+    'Beauty': ['Salon', 'Barber', 'Spa', 'Nails', 'Lashes', 'Skincare', 'Makeup', 'Massage'],
+    'Education': ['Tutoring', 'Music School', 'Language Center', 'Driving School', 'Academy', 'Art Studio', 'Coding Club', 'Preschool'],
+    'Fitness': ['Gym', 'Yoga', 'Pilates', 'Boxing', 'CrossFit', 'Dance Studio', 'Climbing', 'Swim Club'],
+}
+
+DESCRIPTION_WORDS = (
+    'friendly local family owned service quality affordable fast professional experienced trusted '
+    'organic fresh handmade modern cozy open late weekend delivery appointment walk-in certified '
+    'award winning community neighborhood downtown parking wifi catering custom repair'
+).split()
+
+STREETS = ['Main St', 'Oak Ave', 'Elm St', 'Park Rd', 'Market St', 'River Rd', 'Hill St', 'Lake Ave']
+CITIES = ['Springfield', 'Riverside', 'Fairview', 'Madison', 'Georgetown', 'Franklin', 'Clinton', 'Salem']
+
+
+def summarize(samples):
+    """Return latency statistics (in milliseconds) for timings in seconds."""
+    ms = [s * 1000 for s in samples]
+    return {
+        'count': len(ms),
+        'mean_ms': round(sum(ms) / len(ms), 3) if ms else 0.0,
+        'p50_ms': round(percentile(ms, 50), 3),
+        'p95_ms': round(percentile(ms, 95), 3),
+        'p99_ms': round(percentile(ms, 99), 3),
+    }
+
+
+def time_calls(func, args_list):
+    """Call ``func(*args)`` for every entry of ``args_list`` and return the timings in seconds."""
+    timings = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+@contextmanager
+def temporary_database(verbosity=0):
+    """Create a fresh test database for the duration of the block."""
+    setup_test_environment()
+    old_config = setup_databases(verbosity, interactive=False, aliases={DEFAULT_DB_ALIAS})
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity)
+        teardown_test_environment()
+
+
+def fake_business(rng, owner, index, approved_ratio=0.9):
+    category = rng.choice(CATEGORIES)
+    kind = rng.choice(CATEGORY_WORDS[category])
+    city = rng.choice(CITIES)
+    business = Business(
+        name=f'{rng.choice(NAME_WORDS)} {kind} {index}',
+        category=category,
+        address=f'{rng.randint(1, 9999)} {rng.choice(STREETS)}, {city}',
+        phone=f'555-{rng.randint(1000, 9999)}',
+        description=' '.join(rng.choices(DESCRIPTION_WORDS, k=rng.randint(8, 25))),
+        services=', '.join(rng.sample(CATEGORY_WORDS[category], 3)),
+        owner=owner,
+        is_approved=rng.random() < approved_ratio,
+    )
+    # Spread over the town (roughly 10 km) rather than all on its centre
+    latitude, longitude = geo.geocode(city)
+    business.latitude = latitude + rng.gauss(0, 0.05)
+    business.longitude = longitude + rng.gauss(0, 0.05)
+    business.locate()
+    return business
+
+
+SEED_USER_PREFIX = 'seed_user'
+
+REVIEW_COMMENTS = [
+    'Great service, will come back.', 'Friendly staff and fair prices.', 'Not bad, a bit slow.',
+    'Excellent quality, highly recommended!', 'Could be better.', 'Exactly what I needed.',
+    'Disappointing experience this time.', 'Best in the neighborhood.',
+]
+
+
+def create_users(count, prefix=SEED_USER_PREFIX, start=0, batch_size=1000):
+    """
+    Bulk insert ``count`` users sharing one precomputed password hash and
+    return every user with the seed prefix.
+    """
+    password = make_password('benchmark') if count else None
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        User.objects.bulk_create([
+            User(username=f'{prefix}{start + created + i}', email=f'{prefix}{start + created + i}@example.com',
+                 password=password)
+            for i in range(size)
+        ])
+        created += size
+    return list(User.objects.filter(username__startswith=prefix).order_by('pk'))
+
+
+def review_counts(count, mean, skew=1.2, seed=0):
+    """
+    Number of reviews for each of ``count`` businesses.
+
+    Drawn from a Pareto distribution so a few businesses get most of the
+    reviews, scaled to roughly ``mean`` per business.
+    """
+    rng = random.Random(seed)
+    draws = [rng.paretovariate(skew) for _ in range(count)]
+    scale = mean / (sum(draws) / len(draws)) if draws else 0
+    return [int(draw * scale) for draw in draws]
+
+
+def create_reviews(businesses, reviewers, mean_per_business, skew=1.2, seed=0, batch_size=2000):
+    """Bulk insert skewed reviews, at most one per reviewer and business."""
+    rng = random.Random(seed)
+    counts = review_counts(len(businesses), mean_per_business, skew, seed)
+    batch = []
+    created = 0
+    for business, count in zip(businesses, counts):
+        for reviewer in rng.sample(reviewers, min(count, len(reviewers))):
+            batch.append(Review(
+                business=business, user=reviewer, rating=min(5, max(1, round(rng.gauss(3.8, 1.1)))),
+                comment=rng.choice(REVIEW_COMMENTS),
+            ))
+            if len(batch) >= batch_size:
+                Review.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+    Review.objects.bulk_create(batch)
+    return created + len(batch)
+
+
+def create_businesses(count, owners, seed=0, start=0, batch_size=1000):
+    """Bulk insert ``count`` synthetic businesses owned by ``owners``."""
+    rng = random.Random(seed + start)
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        Business.objects.bulk_create([
+            fake_business(rng, rng.choice(owners), start + created + i) for i in range(size)
+        ])
+        created += size
+    return created
+
+
+def seed(users, businesses, reviews_per_business, skew=1.2, random_seed=0):
+    """
+    Add synthetic users, businesses and reviews, then bring the rating
+    aggregates, profile counters and search index up to date (bulk inserts
+    send no signals).
+
+    Repeated calls keep growing the same dataset. Returns the number of
+    reviewers and the created business and review counts.
+    """
+    from . import search
+    from .profiles import rebuild_profile_counters
+    from .ratings import rebuild_rating_aggregates
+
+    if users:
+        create_users(users, start=User.objects.filter(username__startswith=SEED_USER_PREFIX).count())
+    reviewers = create_users(0) or list(User.objects.all())
+    last_pk = Business.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    create_businesses(businesses, reviewers, seed=random_seed, start=Business.objects.count())
+    new_businesses = list(Business.objects.filter(pk__gt=last_pk).only('pk'))
+    reviews = create_reviews(new_businesses, reviewers, reviews_per_business, skew, seed=random_seed + last_pk)
+    rebuild_rating_aggregates([business.pk for business in new_businesses])
+    rebuild_profile_counters()
+    search.rebuild_index()
+    return len(reviewers), len(new_businesses), reviews
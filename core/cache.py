@@ -0,0 +1,119 @@
+"""
+Cached listing data for the homepage and search filters.
+
+Values live in Django's cache framework (local memory by default, any
+backend via settings.CACHES) and are invalidated from the Business and
+Review signals in core.signals. A cold key is recomputed by a single
+caller: others wait briefly for it instead of all hitting the database.
+
+With a per-process cache (the local memory default) a signal only clears
+the keys of the process that handled the write; the others serve their
+copies until they expire, which is why every key here has a timeout.
+"""
+import time
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Business
+
+FEATURED_KEY = 'listings:featured'
+CATEGORIES_KEY = 'listings:categories'
+FACETS_KEY = 'listings:facets'
+CATALOG_VERSION_KEY = 'listings:version'
+
+LISTING_TIMEOUT = 600
+# No longer than the listings it stands for, so another process's stale
+# version (and the ETags built from it) expires along with its stale data
+CATALOG_VERSION_TIMEOUT = LISTING_TIMEOUT
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.05
+
+FEATURED_COUNT = 4
+
+_MISSING = object()
+
+
+def get_or_compute(key, compute, timeout=LISTING_TIMEOUT, lock_timeout=LOCK_TIMEOUT):
+    """
+    Return the cached value for ``key``, computing it with ``compute()`` on a miss.
+
+    Only the caller that wins ``cache.add`` on the lock key recomputes; the
+    others poll the cache until the value appears, and compute it themselves
+    only if the lock holder takes longer than ``lock_timeout``.
+    """
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, True, lock_timeout):
+        try:
+            value = compute()
+            cache.set(key, value, timeout)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+    return compute()
+
+
+def featured_businesses():
+    return get_or_compute(
+        FEATURED_KEY, lambda: list(Business.objects.approved().by_rating()[:FEATURED_COUNT])
+    )
+
+
+def categories():
+    return get_or_compute(CATEGORIES_KEY, lambda: list(Business.objects.categories()))
+
+
+def facet_rows():
+    """
+    (category, avg_rating, count) of approved businesses, grouped in the
+    database, from which search.count_facets() builds the filter counts of
+    the unfiltered catalog.
+    """
+    return get_or_compute(FACETS_KEY, lambda: list(
+        Business.objects.approved().values_list('category', 'avg_rating').annotate(n=Count('id')).order_by()
+    ))
+
+
+def catalog_version():
+    """
+    A number that changes whenever business or review data changes.
+
+    It starts from the current time so a restarted process, a cleared cache
+    or an expired key never hands out a version number that was already
+    used. Bumps keep the key's expiry, so it is renewed at least every
+    CATALOG_VERSION_TIMEOUT seconds.
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), CATALOG_VERSION_TIMEOUT)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, time.time_ns(), CATALOG_VERSION_TIMEOUT)
+
+
+def invalidate_featured():
+    # Ratings moved, which also changes the rating facets
+    cache.delete_many([FEATURED_KEY, FACETS_KEY])
+    bump_catalog_version()
+
+
+def invalidate_listings():
+    cache.delete_many([FEATURED_KEY, CATEGORIES_KEY, FACETS_KEY])
+    bump_catalog_version()
@@ -0,0 +1,135 @@
+"""
+Response size: HTML whitespace collapsing and gzip compression.
+
+The templates are indented for reading, so rendered pages carry a lot of
+whitespace. minify_html() collapses every whitespace run that contains a
+line break in text between tags to a single line break, which the browser
+renders exactly the same. Tags (and so attribute values) and the content
+of <pre>, <textarea>, <script> and <style> are left untouched.
+
+Compression uses Django's gzip helpers, which pad each response with a
+random number of bytes so its length doesn't reveal secrets it contains
+(BREACH). CSRF tokens are already masked with a fresh random value on every
+render, so pages with forms are compressed as well.
+"""
+import re
+import threading
+from collections import defaultdict
+
+from django.utils.text import compress_sequence, compress_string
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript', 'application/x-ndjson',
+    'application/xml', 'image/svg+xml',
+)
+
+_RAW_ELEMENT = re.compile(r'<(pre|textarea|script|style)\b.*?</\1\s*>', re.S | re.I)
+_TAG = re.compile(r'''<(?:[^>"']|"[^"]*"|'[^']*')*>''')
+_LINE_BREAK_RUN = re.compile(r'[ \t\r\f\v]*\n\s*')
+
+
+def compressible(content_type):
+    return content_type.split(';')[0].strip().lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def _collapse_text(html):
+    parts, position = [], 0
+    for tag in _TAG.finditer(html):
+        parts.append(_LINE_BREAK_RUN.sub('\n', html[position:tag.start()]))
+        parts.append(tag.group(0))
+        position = tag.end()
+    parts.append(_LINE_BREAK_RUN.sub('\n', html[position:]))
+    return ''.join(parts)
+
+
+def minify_html(html):
+    parts, position = [], 0
+    for element in _RAW_ELEMENT.finditer(html):
+        parts.append(_collapse_text(html[position:element.start()]))
+        parts.append(element.group(0))
+        position = element.end()
+    parts.append(_collapse_text(html[position:]))
+    return ''.join(parts)
+
+
+class CompressionStats:
+    """Responses and bytes before and after minifying and compressing, per content type."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(lambda: {
+            'responses': 0, 'compressed': 0, 'original_bytes': 0, 'sent_bytes': 0, 'minified_bytes': 0,
+        })
+
+    def record(self, content_type, original, sent, minified=0, compressed=False):
+        with self._lock:
+            counters = self._counters[content_type.split(';')[0].strip().lower()]
+            counters['responses'] += 1
+            counters['compressed'] += compressed
+            counters['original_bytes'] += original
+            counters['sent_bytes'] += sent
+            counters['minified_bytes'] += minified
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                content_type: dict(
+                    counters,
+                    saved_bytes=counters['original_bytes'] - counters['sent_bytes'],
+                    ratio=round(counters['sent_bytes'] / counters['original_bytes'], 3)
+                    if counters['original_bytes'] else None,
+                )
+                for content_type, counters in sorted(self._counters.items())
+            }
+
+
+stats = CompressionStats()
+
+
+def accepted_encodings(header):
+    """Encodings named in an Accept-Encoding header, minus those refused with q=0."""
+    accepted = set()
+    for item in header.lower().split(','):
+        name, _, params = item.partition(';')
+        quality = re.search(r'q=(\d+(?:\.\d*)?|\.\d+)', params)
+        if name.strip() and not (quality and float(quality.group(1)) == 0):
+            accepted.add(name.strip())
+    return accepted
+
+
+def gzip_stream(chunks, content_type, max_random_bytes):
+    """
+    Compress a streamed body as one gzip stream, flushed after every chunk
+    so each reaches the client as soon as it is produced. The byte counts
+    are recorded once the stream ends or the client goes away.
+    """
+    totals = {'original': 0, 'sent': 0}
+
+    def originals():
+        for chunk in chunks:
+            totals['original'] += len(chunk)
+            yield chunk
+
+    try:
+        for chunk in compress_sequence(originals(), max_random_bytes=max_random_bytes):
+            totals['sent'] += len(chunk)
+            yield chunk
+    finally:
+        stats.record(content_type, totals['original'], totals['sent'], compressed=True)
+
+
+async def agzip_stream(chunks, content_type, max_random_bytes):
+    """gzip_stream() for async iterators, every chunk being its own gzip member."""
+    totals = {'original': 0, 'sent': 0}
+    try:
+        async for chunk in chunks:
+            compressed = compress_string(chunk, max_random_bytes=max_random_bytes)
+            totals['original'] += len(chunk)
+            totals['sent'] += len(compressed)
+            yield compressed
+    finally:
+        stats.record(content_type, totals['original'], totals['sent'], compressed=True)
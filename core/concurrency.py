@@ -0,0 +1,41 @@
+"""
+Thread pool for the blocking ORM, cache and template calls of async views.
+
+asgiref's default pool is sized from the CPU count (five threads on a
+single core), which caps how many database round trips can be in flight at
+once. This pool has settings.ASYNC_QUERY_THREADS threads instead; keep the
+database connection pool at least that large.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_QUERY_THREADS, thread_name_prefix='async-query',
+                )
+    return _executor
+
+
+def _run(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        # Pool threads see no request signals, honour CONN_MAX_AGE here
+        close_old_connections()
+
+
+def run_in_thread(func, *args, **kwargs):
+    """Run ``func`` in the pool and return an awaitable of its result."""
+    return sync_to_async(_run, thread_sensitive=False, executor=get_executor())(func, *args, **kwargs)
@@ -0,0 +1,161 @@
+"""
+Connection pool statistics for the MongoDB client used by djongo.
+
+djongo keeps one MongoClient per database name and process, so its pool is
+shared by every thread of a worker. A pymongo ConnectionPoolListener,
+registered from CoreConfig.ready() before the client is created, counts
+connections opened and closed, checkouts, checkouts that had to wait for a
+free connection and how long they waited. The numbers are per process and
+reported by the staff stats endpoint next to the view timings.
+"""
+import threading
+import time
+from collections import deque
+
+from .profiling import percentile
+
+try:
+    from pymongo import monitoring
+except ImportError:  # e.g. running against SQLite for local checks
+    monitoring = None
+
+WAIT_WINDOW = 1000
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.max_pool_size = None
+            self.pools = 0
+            self.connections_open = 0
+            self.connections_created = 0
+            self.connections_closed = 0
+            # Connections currently checked out
+            self.in_use = 0
+            self.max_checked_out = 0
+            self.checkouts = 0
+            self.waits = 0
+            self.wait_time = 0.0
+            self.checkout_failures = 0
+            self.pool_clears = 0
+            self._wait_samples = deque(maxlen=WAIT_WINDOW)
+
+    def pool_created(self, options):
+        with self._lock:
+            self.pools += 1
+            self.max_pool_size = options.get('maxPoolSize', self.max_pool_size)
+
+    def pool_cleared(self):
+        with self._lock:
+            self.pool_clears += 1
+
+    def connection_created(self):
+        with self._lock:
+            self.connections_created += 1
+            self.connections_open += 1
+
+    def connection_closed(self):
+        with self._lock:
+            self.connections_closed += 1
+            self.connections_open -= 1
+
+    def checkout_started(self):
+        with self._lock:
+            # Every connection is in use, this checkout has to queue
+            waiting = self.max_pool_size is not None and self.in_use >= self.max_pool_size
+        self._started.value = (time.perf_counter(), waiting)
+
+    def checked_out(self):
+        started, waiting = getattr(self._started, 'value', (None, False))
+        elapsed = time.perf_counter() - started if started is not None else 0.0
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_checked_out = max(self.max_checked_out, self.in_use)
+            self.wait_time += elapsed
+            self._wait_samples.append(elapsed)
+            if waiting:
+                self.waits += 1
+
+    def checkout_failed(self):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def checked_in(self):
+        with self._lock:
+            self.in_use -= 1
+
+    def snapshot(self):
+        with self._lock:
+            samples = [sample * 1000 for sample in self._wait_samples]
+            return {
+                'enabled': listener is not None,
+                'max_pool_size': self.max_pool_size,
+                'pools': self.pools,
+                'connections_open': self.connections_open,
+                'connections_created': self.connections_created,
+                'connections_closed': self.connections_closed,
+                'checked_out': self.in_use,
+                'max_checked_out': self.max_checked_out,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'checkout_failures': self.checkout_failures,
+                'pool_clears': self.pool_clears,
+                'checkout_ms': {
+                    'total': round(self.wait_time * 1000, 2),
+                    'p50': round(percentile(samples, 50), 3),
+                    'p99': round(percentile(samples, 99), 3),
+                    'max': round(max(samples), 3) if samples else 0.0,
+                },
+            }
+
+
+stats = PoolStats()
+listener = None
+
+
+if monitoring is not None:
+    class PoolListener(monitoring.ConnectionPoolListener):
+        def pool_created(self, event):
+            stats.pool_created(event.options)
+
+        def pool_cleared(self, event):
+            stats.pool_cleared()
+
+        def pool_closed(self, event):
+            pass
+
+        def connection_created(self, event):
+            stats.connection_created()
+
+        def connection_ready(self, event):
+            pass
+
+        def connection_closed(self, event):
+            stats.connection_closed()
+
+        def connection_check_out_started(self, event):
+            stats.checkout_started()
+
+        def connection_check_out_failed(self, event):
+            stats.checkout_failed()
+
+        def connection_checked_out(self, event):
+            stats.checked_out()
+
+        def connection_checked_in(self, event):
+            stats.checked_in()
+
+
+def install():
+    """Register the pool listener for MongoClients created from now on."""
+    global listener
+    if monitoring is None or listener is not None:
+        return
+    listener = PoolListener()
+    monitoring.register(listener)
@@ -0,0 +1,205 @@
+"""
+Staff exports of businesses, reviews and users as CSV or JSON Lines.
+
+Rows are read with ``.values_list().iterator(chunk_size=...)`` and written to a
+StreamingHttpResponse one chunk at a time, so memory use does not grow
+with the size of the export. Related names (owner, author, business) come
+from the same query. Exports are ordered by primary key, which every
+collection has an index on. CSV cells that a spreadsheet would run as a
+formula are prefixed with a quote.
+"""
+import csv
+import io
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.decorators import login_required
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Business, Review, User
+
+CHUNK_SIZE = 2000
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class Dataset:
+    """
+    What one export contains: ``fields`` maps column names to lookups,
+    ``date_field`` is used by the since/until filters and ``status`` and
+    ``category`` (lookups, or None when the filter does not apply) by the
+    approval status and category filters.
+    """
+
+    def __init__(self, queryset, fields, date_field, status=None, category=None):
+        self.queryset = queryset
+        self.fields = fields
+        self.date_field = date_field
+        self.status = status
+        self.category = category
+
+
+DATASETS = {
+    'businesses': Dataset(
+        Business.objects.all(),
+        {
+            'id': 'id',
+            'name': 'name',
+            'category': 'category',
+            'address': 'address',
+            'phone': 'phone',
+            'website': 'website',
+            'description': 'description',
+            'services': 'services',
+            'owner': 'owner__username',
+            'is_approved': 'is_approved',
+            'avg_rating': 'avg_rating',
+            'review_count': 'review_count',
+            'latitude': 'latitude',
+            'longitude': 'longitude',
+            'created_at': 'created_at',
+            'updated_at': 'updated_at',
+        },
+        date_field='created_at', status='is_approved', category='category',
+    ),
+    'reviews': Dataset(
+        Review.objects.all(),
+        {
+            'id': 'id',
+            'business_id': 'business_id',
+            'business': 'business__name',
+            'user': 'user__username',
+            'rating': 'rating',
+            'comment': 'comment',
+            'reply': 'reply',
+            'created_at': 'created_at',
+            'updated_at': 'updated_at',
+        },
+        date_field='created_at', status='business__is_approved', category='business__category',
+    ),
+    'users': Dataset(
+        User.objects.all(),
+        {
+            'id': 'id',
+            'username': 'username',
+            'email': 'email',
+            'first_name': 'first_name',
+            'last_name': 'last_name',
+            'is_staff': 'is_staff',
+            'is_active': 'is_active',
+            'date_joined': 'date_joined',
+            'last_login': 'last_login',
+        },
+        date_field='date_joined',
+    ),
+}
+
+
+class ExportError(Exception):
+    pass
+
+
+def _day_start(value, name):
+    day = parse_date(value)
+    if day is None:
+        raise ExportError(f'{name} must be a date in YYYY-MM-DD format.')
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filtered_rows(dataset, params):
+    """Column names and the ``values_list()`` rows filtered by the request parameters."""
+    queryset = dataset.queryset
+    status = params.get('status', 'all') or 'all'
+    if status != 'all':
+        if status not in ('approved', 'pending'):
+            raise ExportError('status must be one of all, approved or pending.')
+        if dataset.status is None:
+            raise ExportError('This export has no approval status.')
+        # See BusinessQuerySet for why booleans are matched with __in
+        queryset = queryset.filter(**{f'{dataset.status}__in': [status == 'approved']})
+    category = params.get('category')
+    if category:
+        if dataset.category is None:
+            raise ExportError('This export has no category.')
+        queryset = queryset.filter(**{dataset.category: category})
+    if params.get('since'):
+        queryset = queryset.filter(**{f'{dataset.date_field}__gte': _day_start(params['since'], 'since')})
+    if params.get('until'):
+        # The end date is inclusive
+        until = _day_start(params['until'], 'until') + timedelta(days=1)
+        queryset = queryset.filter(**{f'{dataset.date_field}__lt': until})
+    columns = list(dataset.fields)
+    lookups = [dataset.fields[column] for column in columns]
+    return columns, queryset.order_by('pk').values_list(*lookups)
+
+
+def _chunks(rows):
+    chunk = []
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Spreadsheets read a cell starting with one of these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    # Text from users (names, reviews...) is quoted so it stays text; numbers,
+    # negative coordinates included, are left as they are
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in _chunks(rows):
+        writer.writerows([_csv_value(value) for value in row] for row in chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Only the header when nothing matched
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_jsonl(columns, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for chunk in _chunks(rows):
+        yield ''.join(encoder.encode(dict(zip(columns, row))) + '\n' for row in chunk)
+
+
+@login_required
+def export(request, dataset):
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+    if dataset not in DATASETS:
+        raise Http404('Unknown export.')
+    output = request.GET.get('format', 'csv')
+    if output not in FORMATS:
+        return HttpResponseBadRequest('format must be csv or jsonl.')
+    try:
+        columns, rows = filtered_rows(DATASETS[dataset], request.GET)
+    except ExportError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    stream = stream_csv if output == 'csv' else stream_jsonl
+    response = StreamingHttpResponse(stream(columns, rows), content_type=FORMATS[output])
+    filename = f'{dataset}-{timezone.localdate():%Y%m%d}.{output}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'private, no-store'
+    return response
@@ -13,7 +13,7 @@ class UserRegistrationForm(UserCreationForm):
 class BusinessForm(forms.ModelForm):
     class Meta:
         model = Business
-        fields = ('name', 'category', 'address', 'phone', 'website', 'description', 'services')
+        fields = ('name', 'category', 'address', 'phone', 'website', 'description', 'services', 'latitude', 'longitude')
         widgets = {
             'description': forms.Textarea(attrs={'rows': 4}),
             'services': forms.Textarea(attrs={'rows': 4}),
@@ -21,6 +21,21 @@ class BusinessForm(forms.ModelForm):
         labels = {
             'name': 'Business Name',
         }
+        help_texts = {
+            'latitude': 'Leave both coordinates empty to locate the business from its address. '
+                        'A new address is located again unless you also change the coordinates.',
+        }
+
+    def clean(self):
+        cleaned_data = super().clean()
+        latitude, longitude = cleaned_data.get('latitude'), cleaned_data.get('longitude')
+        if (latitude is None) != (longitude is None):
+            missing = 'latitude' if latitude is None else 'longitude'
+            # On the empty field, the templates only show field errors; an
+            # invalid value already has its own
+            if missing not in self.errors:
+                self.add_error(missing, 'Enter both latitude and longitude, or neither.')
+        return cleaned_data
 
 class ReviewForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,92 @@
+"""
+Cached HTML fragments for repeated blocks such as business cards and reviews.
+
+Each object's fragment is keyed by the template (and its file's mtime, so
+an edited template is never served stale), the object's primary key and
+its ``updated_at``. All fragments of a page are fetched with a single
+``cache.get_many``; only the misses are rendered and written back with one
+``set_many``. Fragments must not contain anything user-specific, such as
+forms with a CSRF token, which stay in the page template.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+FRAGMENT_TIMEOUT = 3600
+
+
+def template_mtime(template_name):
+    return os.stat(get_template(template_name).origin.name).st_mtime_ns
+
+
+class FragmentStats:
+    """Cache hits, misses and render time per fragment template."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(lambda: {'hits': 0, 'misses': 0, 'render_ms': 0.0})
+
+    def record(self, template_name, hits, misses, render_time):
+        with self._lock:
+            counters = self._counters[template_name]
+            counters['hits'] += hits
+            counters['misses'] += misses
+            counters['render_ms'] += render_time * 1000
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: dict(counters, render_ms=round(counters['render_ms'], 2))
+                for name, counters in sorted(self._counters.items())
+            }
+
+
+stats = FragmentStats()
+
+
+def _key(template_name, template_version, obj, variant):
+    updated_at = obj.updated_at.timestamp() if obj.updated_at else 0
+    return f'fragment:{template_name}:{template_version}:{variant}:{obj.pk}:{updated_at}'
+
+
+def render_fragments(template_name, objects, name, context=None, variant=''):
+    """
+    Set ``obj.fragment`` to the rendered ``template_name`` for every object.
+
+    The template sees the object as ``name`` plus ``context``, which must be
+    the same for every call sharing a ``variant``; anything it depends on
+    besides the object itself belongs in ``variant`` (e.g. the parent
+    business's name for reviews). Returns ``objects``.
+    """
+    objects = list(objects)
+    if not objects:
+        return objects
+    template_version = template_mtime(template_name)
+    # Variants can be arbitrary text (e.g. a business name), keep keys short
+    variant = hashlib.md5(variant.encode()).hexdigest()[:12] if variant else ''
+    keys = [_key(template_name, template_version, obj, variant) for obj in objects]
+    cached = cache.get_many(keys)
+
+    template = get_template(template_name)
+    rendered = {}
+    start = time.perf_counter()
+    for obj, key in zip(objects, keys):
+        html = cached.get(key)
+        if html is None:
+            html = rendered[key] = template.render({name: obj, **(context or {})})
+        obj.fragment = mark_safe(html)
+    render_time = time.perf_counter() - start
+    if rendered:
+        cache.set_many({key: str(html) for key, html in rendered.items()}, FRAGMENT_TIMEOUT)
+    stats.record(template_name, len(objects) - len(rendered), len(rendered), render_time)
+    return objects
@@ -0,0 +1,182 @@
+"""
+Locations of businesses and "near me" queries.
+
+Every located business stores a geohash of its coordinates: a base-32
+string whose prefixes are nested grid cells, so all businesses in a cell
+are one indexed range query on the geohash column (the same prefix-range
+trick the search index uses for terms). A radius query reads the few
+cells covering the circle's bounding box, as small as MAX_CELLS allows,
+and computes exact distances for those rows only. A k-nearest query runs
+radius queries on a growing circle until it holds k results.
+
+Addresses are geocoded offline against the gazetteer file
+(settings.GAZETTEER_PATH, CSV with name, region, latitude, longitude).
+"""
+import csv
+import math
+import re
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import Q
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+# Most geohash ranges one query reads; fewer means larger cells and more rows
+MAX_CELLS = 16
+# First radius a k-nearest search tries, then it widens
+KNN_START_RADIUS_KM = 1.0
+# Beyond this a k-nearest search reads every located business
+MAX_RADIUS_KM = 2500.0
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+Place = namedtuple('Place', 'pk distance category avg_rating')
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(height, width) in degrees of the cells of a geohash precision."""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def cover(latitude, longitude, radius_km):
+    """
+    Geohashes of the cells that together contain the circle around the
+    point: the finest cells of which at most MAX_CELLS span its bounding
+    box, or None when even the largest ones don't (read everything then).
+    """
+    lat_span = radius_km / KM_PER_DEGREE
+    lat_min, lat_max = max(latitude - lat_span, -90.0), min(latitude + lat_span, 90.0 - 1e-9)
+    widest = max(abs(lat_min), abs(lat_max))
+    if widest >= 89.0:
+        return None
+    lng_span = lat_span / math.cos(math.radians(widest))
+    if lng_span >= 180.0:
+        return None
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = math.ceil((lat_max - lat_min) / height) + 1
+        columns = math.ceil(2 * lng_span / width) + 1
+        if rows * columns <= MAX_CELLS:
+            break
+    else:
+        return None
+    # Samples one cell apart hit every cell of the box, the last one its far edge
+    lats = [min(lat_min + i * height, lat_max) for i in range(rows)]
+    lngs = [min(longitude - lng_span + i * width, longitude + lng_span) for i in range(columns)]
+    cells = []
+    for lat in lats:
+        for lng in lngs:
+            cell = encode(lat, (lng + 180.0) % 360.0 - 180.0, precision)
+            if cell not in cells:
+                cells.append(cell)
+    return cells
+
+
+def _in_cells(cells):
+    query = Q()
+    for cell in cells:
+        # A range on the indexed geohash column, like the search term prefixes
+        query |= Q(geohash__gte=cell, geohash__lt=cell + '\uffff')
+    return query
+
+
+def _places(queryset, latitude, longitude, cells):
+    rows = queryset.exclude(geohash='')
+    if cells is not None:
+        rows = rows.filter(_in_cells(cells))
+    places = [
+        Place(pk, haversine_km(latitude, longitude, lat, lng), category, avg_rating or 0)
+        for pk, lat, lng, category, avg_rating
+        in rows.values_list('pk', 'latitude', 'longitude', 'category', 'avg_rating')
+    ]
+    places.sort(key=lambda place: (place.distance, place.pk))
+    return places
+
+
+def within(queryset, latitude, longitude, radius_km):
+    """Places of ``queryset`` within ``radius_km`` of the point, nearest first."""
+    places = _places(queryset, latitude, longitude, cover(latitude, longitude, radius_km))
+    return [place for place in places if place.distance <= radius_km]
+
+
+def nearest(queryset, latitude, longitude, k):
+    """The ``k`` places of ``queryset`` nearest to the point, nearest first."""
+    radius = KNN_START_RADIUS_KM
+    while radius < MAX_RADIUS_KM:
+        # Everything within the radius is found, so k of them are the k nearest
+        places = within(queryset, latitude, longitude, radius)
+        if len(places) >= k:
+            return places[:k]
+        # Grow the circle to where k places should be at the density seen so far
+        radius *= min(max(math.sqrt(k / len(places)) * 1.5, 2), 8) if places else 4
+    return _places(queryset, latitude, longitude, None)[:k]
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def _normalize(name):
+    return ' '.join(re.findall(r'[a-z]+', name.lower()))
+
+
+def gazetteer():
+    """{normalized place name: (latitude, longitude)}, read once per process."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                places = {}
+                with open(settings.GAZETTEER_PATH, newline='', encoding='utf-8') as fh:
+                    for row in csv.DictReader(fh):
+                        point = (float(row['latitude']), float(row['longitude']))
+                        places[_normalize(f"{row['name']} {row['region']}")] = point
+                        # The bare name points to the first entry listed
+                        places.setdefault(_normalize(row['name']), point)
+                _gazetteer = places
+    return _gazetteer
+
+
+def geocode(text):
+    """
+    (latitude, longitude) of the place named in an address or search box,
+    e.g. "12 Oak Ave, Salem" or "Salem, OR", or None when it isn't known.
+    The longest run of trailing comma-separated parts naming a known place
+    wins, then any single part.
+    """
+    places = gazetteer()
+    parts = [_normalize(part) for part in text.split(',')]
+    candidates = [' '.join(parts[i:]) for i in range(len(parts))] + parts[::-1]
+    for candidate in candidates:
+        if candidate in places:
+            return places[candidate]
+    return None
@@ -0,0 +1,145 @@
+"""
+Conditional GET and Cache-Control for public pages.
+
+A page decorated with ``cached_page`` computes a cheap validator first (a
+cache read or a single indexed lookup) and answers a matching
+If-None-Match / If-Modified-Since with 304 before the view runs.
+
+Anonymous responses are public, so a reverse proxy can serve them for
+``s_maxage`` seconds. Pages for signed-in users show their name and forms,
+so they are private and the validator includes who the user is, and their
+CSRF secret so that signing in again never revalidates a page whose forms
+carry the old token. Every response varies on Cookie. Pages with flash
+messages waiting are never revalidated, because the messages only show
+once.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.contrib.messages import get_messages
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from . import cache as listing_cache
+from .concurrency import run_in_thread
+from .fragments import template_mtime
+from .models import Business
+
+
+def _viewer(request):
+    user = request.user
+    if not user.is_authenticated:
+        return 'anon'
+    # The navigation differs for staff, and the forms carry a CSRF token
+    # derived from the secret that rotates on every login
+    return f"{user.pk}:{int(user.is_staff)}:{request.META.get('CSRF_COOKIE', '')}"
+
+
+def _has_pending_messages(request):
+    return len(get_messages(request)) > 0
+
+
+def _uncached(request, response):
+    # Pending flash messages are shown once, never store the page
+    if response.status_code == 200 and len(get_messages(request)):
+        patch_cache_control(response, private=True, no_store=True)
+    return response
+
+
+def _patch_headers(request, response, max_age, s_maxage):
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=max_age, s_maxage=s_maxage)
+    patch_vary_headers(response, ('Cookie',))
+
+
+def _prepare(request, validator, view_name, args, kwargs):
+    """Return (etag, last-modified timestamp), or None when the page can't be validated."""
+    if _has_pending_messages(request):
+        return None
+    validated = validator(request, *args, **kwargs)
+    if validated is None:
+        return None
+    version, last_modified = validated
+    digest = hashlib.md5(f'{view_name}:{version}:{_viewer(request)}'.encode()).hexdigest()
+    # Last-Modified is only sent to anonymous users; a signed-in page
+    # also changes when the viewer does
+    if request.user.is_authenticated or not last_modified:
+        return f'"{digest}"', None
+    return f'"{digest}"', int(last_modified.timestamp())
+
+
+def _finish(request, response, etag, timestamp, max_age, s_maxage):
+    response['ETag'] = etag
+    if timestamp and not response.has_header('Last-Modified'):
+        response['Last-Modified'] = http_date(timestamp)
+    _patch_headers(request, response, max_age, s_maxage)
+    return response
+
+
+def cached_page(validator, max_age=0, s_maxage=60):
+    """
+    Decorate a view, sync or async, with conditional GET handling.
+
+    ``validator(request, *args, **kwargs)`` returns ``(version, last_modified)``
+    where ``last_modified`` may be None, or None as a whole when there is
+    nothing to validate (e.g. the object does not exist), in which case the
+    view answers as usual.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+                prepared = await run_in_thread(_prepare, request, validator, view.__name__, args, kwargs)
+                if prepared is None:
+                    return _uncached(request, await view(request, *args, **kwargs))
+                etag, timestamp = prepared
+                response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                    if response.status_code != 200:
+                        return response
+                return _finish(request, response, etag, timestamp, max_age, s_maxage)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            prepared = _prepare(request, validator, view.__name__, args, kwargs)
+            if prepared is None:
+                return _uncached(request, view(request, *args, **kwargs))
+            etag, timestamp = prepared
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            return _finish(request, response, etag, timestamp, max_age, s_maxage)
+        return wrapper
+    return decorator
+
+
+def catalog_validator(request, *args, **kwargs):
+    """Pages built from listings change whenever any business or review does."""
+    return listing_cache.catalog_version(), None
+
+
+def business_validator(request, pk):
+    """A business page changes with the business; review writes touch updated_at."""
+    updated_at = Business.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    return updated_at.isoformat(), updated_at
+
+
+def template_validator(*template_names):
+    """Static pages change when one of their template files is edited."""
+    def validator(request, *args, **kwargs):
+        return max(template_mtime(name) for name in template_names), None
+    return validator
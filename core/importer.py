@@ -0,0 +1,199 @@
+"""
+Bulk import of businesses and reviews from CSV or JSON Lines files.
+
+Rows are read as a stream and validated with the same forms the site uses
+(BusinessForm, ReviewForm). Valid rows are inserted with ``bulk_create`` in
+batches; owners, reviewers and reviewed businesses are resolved with one
+query per batch. Rejected rows are written to a side file together with
+their errors.
+
+``bulk_create`` sends no signals, so once everything is inserted the
+rating aggregates of the reviewed businesses and the profile counters of
+the owners and reviewers are recounted, the new businesses are indexed for
+search and the listing caches are dropped, the same way seed_data brings
+its bulk inserts up to date.
+"""
+import csv
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from . import autocomplete
+from . import cache as listing_cache
+from . import search
+from .forms import BusinessForm, ReviewForm
+from .models import Business, Review
+from .profiles import rebuild_profile_counters
+from .ratings import rebuild_rating_aggregates
+
+FORMATS = ('csv', 'jsonl')
+
+
+class ImportResult:
+    def __init__(self):
+        self.read = 0
+        self.created = 0
+        self.rejected = 0
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+
+def read_rows(file, format):
+    """Yield (line number, row dict or None, error) for every record of ``file``."""
+    if format == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+    for line, text in enumerate(file, 1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as exc:
+            yield line, None, f'Invalid JSON: {exc}'
+            continue
+        if not isinstance(row, dict):
+            yield line, None, 'Expected a JSON object.'
+            continue
+        yield line, row, None
+
+
+def _errors(form):
+    return {field: [str(error) for error in errors] for field, errors in form.errors.items()}
+
+
+def _value(row, key):
+    value = row.get(key)
+    return str(value).strip() if value is not None else ''
+
+
+def _business_batch(batch, default_owner, approve):
+    """Return (businesses, rejected rows) for one batch of rows."""
+    usernames = {_value(row, 'owner') or default_owner for _, row in batch}
+    owners = dict(User.objects.filter(username__in=usernames).values_list('username', 'pk'))
+
+    businesses, rejected = [], []
+    for line, row in batch:
+        form = BusinessForm(data=row)
+        username = _value(row, 'owner') or default_owner
+        if not form.is_valid():
+            rejected.append((line, row, _errors(form)))
+        elif username not in owners:
+            rejected.append((line, row, {'owner': [f'Unknown user "{username}".' if username else 'Required.']}))
+        else:
+            business = form.save(commit=False)
+            business.owner_id = owners[username]
+            business.is_approved = approve
+            # bulk_create skips the pre_save signal that does this
+            business.locate()
+            businesses.append(business)
+    return businesses, rejected
+
+
+def _review_batch(batch):
+    """Return (reviews, rejected rows) for one batch of rows."""
+    business_ids = {int(_value(row, 'business')) for _, row in batch if _value(row, 'business').isdigit()}
+    usernames = {_value(row, 'user') for _, row in batch}
+    businesses = set(Business.objects.filter(pk__in=business_ids).values_list('pk', flat=True))
+    users = dict(User.objects.filter(username__in=usernames).values_list('username', 'pk'))
+    # One review per user and business, as on the business page
+    reviewed = set(
+        Review.objects.filter(business_id__in=businesses, user_id__in=users.values())
+        .values_list('business_id', 'user_id')
+    )
+
+    reviews, rejected = [], []
+    for line, row in batch:
+        form = ReviewForm(data=row)
+        business_id = int(_value(row, 'business')) if _value(row, 'business').isdigit() else None
+        user_id = users.get(_value(row, 'user'))
+        errors = {} if form.is_valid() else _errors(form)
+        if business_id not in businesses:
+            errors['business'] = [f'Unknown business "{_value(row, "business")}".']
+        if user_id is None:
+            errors['user'] = [f'Unknown user "{_value(row, "user")}".']
+        elif (business_id, user_id) in reviewed:
+            errors['__all__'] = ['This user has already reviewed this business.']
+        if errors:
+            rejected.append((line, row, errors))
+            continue
+        reviewed.add((business_id, user_id))
+        review = form.save(commit=False)
+        review.business_id = business_id
+        review.user_id = user_id
+        reviews.append(review)
+    return reviews, rejected
+
+
+def _index_new_businesses(last_pk, batch_size):
+    new_businesses = Business.objects.filter(pk__gt=last_pk).approved().order_by('pk')
+    chunk = []
+    for business in new_businesses.iterator(chunk_size=batch_size):
+        chunk.append(business)
+        if len(chunk) >= batch_size:
+            search.index_businesses(chunk)
+            chunk = []
+    search.index_businesses(chunk)
+
+
+def import_rows(kind, rows, rejects, batch_size=500, owner='', approve=False, dry_run=False):
+    """
+    Import ``rows`` from read_rows() as ``kind`` ('businesses' or 'reviews').
+
+    Rejected rows are written to the ``rejects`` text file as JSON lines
+    with their line number and errors. Businesses without an ``owner``
+    column belong to the ``owner`` username; ``approve`` publishes them
+    right away. With ``dry_run`` rows are only validated.
+    """
+    result = ImportResult()
+    start = time.perf_counter()
+    last_pk = Business.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    reviewed_businesses = set()
+    users = set()
+
+    def flush(batch):
+        if kind == 'businesses':
+            objects, rejected = _business_batch(batch, owner, approve)
+        else:
+            objects, rejected = _review_batch(batch)
+        for line, row, errors in rejected:
+            rejects.write(json.dumps({'line': line, 'errors': errors, 'row': row}, default=str) + '\n')
+        result.rejected += len(rejected)
+        if objects and not dry_run:
+            with transaction.atomic():
+                type(objects[0]).objects.bulk_create(objects, batch_size=batch_size)
+            reviewed_businesses.update(getattr(obj, 'business_id', None) for obj in objects)
+            users.update(obj.owner_id if kind == 'businesses' else obj.user_id for obj in objects)
+            result.created += len(objects)
+
+    batch = []
+    for line, row, error in rows:
+        result.read += 1
+        if error:
+            rejects.write(json.dumps({'line': line, 'errors': {'__all__': [error]}}) + '\n')
+            result.rejected += 1
+            continue
+        batch.append((line, row))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    # Bulk inserts sent no signals, bring the derived data up to date
+    if result.created and kind == 'businesses':
+        _index_new_businesses(last_pk, batch_size)
+        autocomplete.invalidate()
+        listing_cache.invalidate_listings()
+    elif result.created:
+        rebuild_rating_aggregates(reviewed_businesses, batch_size=batch_size)
+    if result.created:
+        rebuild_profile_counters(users, batch_size=batch_size)
+    result.elapsed = time.perf_counter() - start
+    return result
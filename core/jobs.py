@@ -0,0 +1,64 @@
+"""
+Background tasks queued by the write paths (see core.tasks).
+
+Cache invalidation itself stays inline, it is a couple of cache writes and
+the worker may not share the web processes' cache; what moves here is the
+work behind it: reindexing, warming the listing caches and sending mail.
+"""
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+
+from . import cache as listing_cache
+from . import search
+from .models import Business
+from .tasks import enqueue, task
+
+
+@task
+def index_business(business_id):
+    business = Business.objects.filter(pk=business_id).first()
+    if business is None:
+        # Deleted since, its postings went with it
+        search.unindex_business(business_id)
+    else:
+        search.index_business(business)
+
+
+@task
+def index_businesses(business_ids):
+    search.index_businesses(Business.objects.filter(pk__in=business_ids))
+
+
+@task
+def warm_listings():
+    """Recompute the featured list, categories and search facets so no visitor waits for them."""
+    listing_cache.featured_businesses()
+    listing_cache.categories()
+    listing_cache.facet_rows()
+
+
+@task(max_attempts=5)
+def send_contact_message(name, email, message):
+    EmailMessage(
+        f'Contact form: {name}', message, settings.DEFAULT_FROM_EMAIL, [settings.CONTACT_EMAIL],
+        reply_to=[f'{name} <{email}>'],
+    ).send()
+
+
+def queue_reindex(business_id):
+    # Edits made before the worker runs are covered by the one queued task
+    enqueue('index_business', business_id, key=f'index_business:{business_id}')
+
+
+def _queue_warm_listings():
+    enqueue('warm_listings', key='warm_listings')
+
+
+def queue_listing_refresh():
+    listing_cache.invalidate_listings()
+    # Warmed once the transaction commits, and once per transaction: a bulk
+    # delete signals every business, but the caches only need one refill
+    pending = transaction.get_connection().run_on_commit
+    if not any(entry[1] is _queue_warm_listings for entry in pending):
+        transaction.on_commit(_queue_warm_listings)
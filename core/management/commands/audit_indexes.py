@@ -0,0 +1,129 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.models import Business, Review, Task
+
+# Substrings of SQL EXPLAIN output that mean a full table scan or a sort
+# that no index provides, per database vendor
+SQL_SCANS = {
+    'sqlite': ('SCAN {table}\n', 'USE TEMP B-TREE'),
+    'postgresql': ('Seq Scan', 'Sort Key'),
+    'mysql': ("'type': 'ALL'", 'Using filesort'),
+}
+
+
+def access_patterns():
+    """
+    (name, queryset, MongoDB equivalent) for the main queries of the views.
+
+    The MongoDB form is (collection, filter, sort) of the find() djongo
+    issues for the queryset, used to explain it with the native planner.
+    """
+    category = Business.objects.values_list('category', flat=True).first() or ''
+    business_id = Business.objects.values_list('pk', flat=True).first() or 0
+    user_id = User.objects.values_list('pk', flat=True).first() or 0
+    by_rating = [('avg_rating', -1), ('review_count', -1), ('id', -1)]
+    newest = [('created_at', -1), ('id', -1)]
+    now = timezone.now()
+    return [
+        ('featured / rating filter', Business.objects.approved().min_rating(3).by_rating()[:25],
+         ('core_business', {'is_approved': {'$in': [True]}, 'avg_rating': {'$gte': 3.0}}, by_rating)),
+        ('category page', Business.objects.approved().in_category(category).by_rating()[:9],
+         ('core_business', {'is_approved': {'$in': [True]}, 'category': category}, by_rating)),
+        ('dashboard pending', Business.objects.pending().newest_first()[:25],
+         ('core_business', {'is_approved': {'$in': [False]}}, newest)),
+        ('dashboard approved', Business.objects.approved().newest_first()[:25],
+         ('core_business', {'is_approved': {'$in': [True]}}, newest)),
+        ('dashboard all', Business.objects.with_status('all').newest_first()[:25],
+         ('core_business', {}, newest)),
+        ('dashboard users', User.objects.order_by('-date_joined', '-pk')[:25],
+         ('auth_user', {}, [('date_joined', -1), ('id', -1)])),
+        ('owner businesses', Business.objects.filter(owner_id=user_id).order_by('-created_at', '-pk')[:10],
+         ('core_business', {'owner_id': user_id}, newest)),
+        ('business reviews', Review.objects.filter(business_id=business_id).order_by('-created_at', '-pk')[:10],
+         ('core_review', {'business_id': business_id}, newest)),
+        ('user reviews', Review.objects.filter(user_id=user_id).order_by('-created_at', '-pk')[:10],
+         ('core_review', {'user_id': user_id}, newest)),
+        ('dashboard reviews', Review.objects.order_by('-created_at', '-pk')[:25],
+         ('core_review', {}, newest)),
+        ('task queue poll', Task.objects.filter(status=Task.PENDING, run_at__lte=now).order_by('run_at', 'pk')[:20],
+         ('core_task', {'status': Task.PENDING, 'run_at': {'$lte': now}}, [('run_at', 1), ('id', 1)])),
+    ]
+
+
+def _stages(plan):
+    """Yield every stage name of a MongoDB query plan."""
+    yield plan.get('stage')
+    for key in ('inputStage', 'queryPlan'):
+        if key in plan:
+            yield from _stages(plan[key])
+    for child in plan.get('inputStages', []):
+        yield from _stages(child)
+
+
+def explain_mongo(database, collection, filter, sort):
+    cursor = database[collection].find(filter)
+    if sort:
+        cursor = cursor.sort(sort)
+    plan = cursor.explain()['queryPlanner']['winningPlan']
+    stages = [stage for stage in _stages(plan) if stage]
+    problems = []
+    if 'COLLSCAN' in stages:
+        problems.append('collection scan')
+    if 'SORT' in stages:
+        problems.append('in-memory sort')
+    return ' > '.join(stages), problems
+
+
+def explain_sql(queryset):
+    plan = queryset.explain()
+    scan, sort = SQL_SCANS.get(connection.vendor, ('', ''))
+    table = queryset.model._meta.db_table
+    problems = []
+    if scan and scan.format(table=table) in plan + '\n':
+        problems.append('table scan')
+    if sort and sort in plan:
+        problems.append('unindexed sort')
+    return ' | '.join(line.strip() for line in plan.splitlines()), problems
+
+
+class Command(BaseCommand):
+    help = (
+        'Explain the main listing, review and dashboard queries against the configured database '
+        'and report the ones that scan a whole collection/table or sort without an index.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+        parser.add_argument('--fail-on-scan', action='store_true',
+                            help='Exit with an error when any query is not served by an index.')
+
+    def handle(self, *args, **options):
+        mongo = connection.vendor == 'djongo'
+        if mongo:
+            connection.ensure_connection()
+            database = connection.connection
+
+        report = []
+        for name, queryset, (collection, filter, sort) in access_patterns():
+            if mongo:
+                plan, problems = explain_mongo(database, collection, filter, sort)
+            else:
+                plan, problems = explain_sql(queryset)
+            report.append({'query': name, 'plan': plan, 'problems': problems})
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            for row in report:
+                status = self.style.ERROR(', '.join(row['problems'])) if row['problems'] else self.style.SUCCESS('ok')
+                self.stdout.write(f"{row['query']:<26} {status}")
+                self.stdout.write(f"    {row['plan']}")
+
+        failing = [row['query'] for row in report if row['problems']]
+        if failing and options['fail_on_scan']:
+            raise CommandError(f"Not served by an index: {', '.join(failing)}")
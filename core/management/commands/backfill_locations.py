@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Business
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill in the coordinates of businesses from their address using the gazetteer file, '
+        'and the geohash used by "near me" searches.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Geocode every business again, not only the ones without a location.')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        businesses = Business.objects.order_by('pk').only('pk', 'address', 'latitude', 'longitude', 'geohash')
+        if not options['all']:
+            businesses = businesses.filter(geohash='')
+
+        located = missing = 0
+        batch = []
+        for business in businesses.iterator(chunk_size=batch_size):
+            if options['all']:
+                # Coordinates entered by owners are replaced as well
+                business.latitude = business.longitude = None
+            business.locate()
+            if business.geohash:
+                located += 1
+            else:
+                missing += 1
+            batch.append(business)
+            if len(batch) >= batch_size:
+                Business.objects.bulk_update(batch, ['latitude', 'longitude', 'geohash'])
+                batch = []
+        Business.objects.bulk_update(batch, ['latitude', 'longitude', 'geohash'])
+
+        self.stdout.write(self.style.SUCCESS(f'Located {located} businesses.'))
+        if missing:
+            self.stdout.write(self.style.WARNING(
+                f'{missing} addresses did not match any place in the gazetteer.'
+            ))
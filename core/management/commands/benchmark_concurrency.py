@@ -0,0 +1,181 @@
+import asyncio
+import json
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client, override_settings
+from django.urls import include, path, reverse
+
+from core import async_views, views
+from core.benchmarking import CATEGORIES, seed, summarize, temporary_database
+from core.models import Business
+from core.urls import page_patterns
+from localbiz import urls as project_urls
+
+
+def scenarios():
+    business = Business.objects.approved().order_by('-review_count').first()
+    return [
+        ('home', reverse('home')),
+        ('search', reverse('search') + '?q=family+owned'),
+        ('category', reverse('category', args=[CATEGORIES[0]])),
+        ('business_detail', reverse('business_detail', args=[business.pk])),
+    ]
+
+
+def urlconf(pages):
+    """The project's URLs with the read-heavy pages served by ``pages``."""
+    module = types.ModuleType(f'benchmark_urls_{pages.__name__.rsplit(".", 1)[-1]}')
+    module.urlpatterns = [path('', include(page_patterns(pages)))] + project_urls.urlpatterns
+    return module
+
+
+class SimulatedLatency:
+    """Sleep before every query, standing in for a MongoDB round trip over the network."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.seconds)
+        return execute(sql, params, many, context)
+
+    def add(self, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def __enter__(self):
+        connection_created.connect(self.add)
+        for connection in connections.all():
+            self.add(connection)
+        return self
+
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self.add)
+        for connection in connections.all():
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+
+
+def run_wsgi(url, concurrency, requests, workers):
+    """
+    ``concurrency`` clients send requests back to back to a WSGI server with
+    ``workers`` request threads; latency includes the wait for a free thread.
+    """
+    local = threading.local()
+    pool = ThreadPoolExecutor(max_workers=workers)
+    remaining = iter(range(requests))
+    lock = threading.Lock()
+    timings = []
+
+    def handle():
+        if not hasattr(local, 'client'):
+            local.client = Client()
+        response = local.client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'{url} returned {response.status_code}')
+
+    def client_loop():
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            start = time.perf_counter()
+            pool.submit(handle).result()
+            timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        for future in [clients.submit(client_loop) for _ in range(concurrency)]:
+            future.result()
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+    return timings, elapsed
+
+
+async def _run_asgi(url, concurrency, requests):
+    client = AsyncClient()
+    remaining = iter(range(requests))
+    timings = []
+
+    async def client_loop():
+        while next(remaining, None) is not None:
+            start = time.perf_counter()
+            response = await client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{url} returned {response.status_code}')
+            timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return timings, time.perf_counter() - start
+
+
+def run_asgi(url, concurrency, requests):
+    """``concurrency`` clients against one ASGI event loop running the async views."""
+    return asyncio.run(_run_asgi(url, concurrency, requests))
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare throughput and latency of the sync views behind a threaded WSGI server '
+        'with the async views on one ASGI event loop, at several concurrency levels, on a '
+        'temporary database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--businesses', type=int, default=2000)
+        parser.add_argument('--users', type=int, default=300)
+        parser.add_argument('--reviews-per-business', type=float, default=8)
+        parser.add_argument('--concurrency', default='10,50,100,200',
+                            help='Comma separated numbers of concurrent clients.')
+        parser.add_argument('--requests', type=int, default=400, help='Requests per page, mode and concurrency.')
+        parser.add_argument('--wsgi-threads', type=int, default=8,
+                            help='Request threads of the simulated WSGI server (workers x threads).')
+        parser.add_argument('--db-latency', type=float, default=2.0,
+                            help='Milliseconds added to every query to simulate a remote database.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', dest='json_path', help='Write the results to this file.')
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        results = []
+
+        with temporary_database():
+            seed(options['users'], options['businesses'], options['reviews_per_business'],
+                 random_seed=options['seed'])
+            modes = [
+                ('wsgi', urlconf(views), lambda url, n: run_wsgi(url, n, options['requests'], options['wsgi_threads'])),
+                ('asgi', urlconf(async_views), lambda url, n: run_asgi(url, n, options['requests'])),
+            ]
+            with SimulatedLatency(options['db_latency'] / 1000):
+                for name, url in scenarios():
+                    for mode, patterns, run in modes:
+                        with override_settings(ROOT_URLCONF=patterns):
+                            run(url, 1)  # warm up caches
+                            for level in levels:
+                                timings, elapsed = run(url, level)
+                                row = {
+                                    'scenario': name,
+                                    'mode': mode,
+                                    'concurrency': level,
+                                    'throughput_rps': round(len(timings) / elapsed, 1),
+                                    'latency': summarize(timings),
+                                }
+                                results.append(row)
+                                self.stdout.write(
+                                    f"{name:<16} {mode} c={level:<4} {row['throughput_rps']:8.1f} req/s  "
+                                    f"p50 {row['latency']['p50_ms']:8.2f} ms  p95 {row['latency']['p95_ms']:8.2f} ms"
+                                )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump({'options': {k: options[k] for k in (
+                    'businesses', 'users', 'reviews_per_business', 'concurrency', 'requests',
+                    'wsgi_threads', 'db_latency', 'seed')}, 'results': results}, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
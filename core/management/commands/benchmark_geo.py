@@ -0,0 +1,95 @@
+import json
+import random
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from core import geo
+from core.benchmarking import CATEGORIES, CITIES, create_businesses, summarize, temporary_database, time_calls
+from core.models import Business
+
+
+def scan(queryset, latitude, longitude):
+    """Distances to every located business, the way a search without the geohash index works."""
+    places = [
+        (geo.haversine_km(latitude, longitude, lat, lng), pk)
+        for pk, lat, lng in queryset.exclude(latitude=None).values_list('pk', 'latitude', 'longitude')
+    ]
+    places.sort()
+    return places
+
+
+def scan_within(queryset, latitude, longitude, radius):
+    return [place for place in scan(queryset, latitude, longitude) if place[0] <= radius]
+
+
+def scan_nearest(queryset, latitude, longitude, k):
+    return scan(queryset, latitude, longitude)[:k]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure radius and k-nearest business queries with the geohash index against a linear scan '
+        'of all coordinates. Runs against a temporary database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=100000, help='Number of businesses.')
+        parser.add_argument('--queries', type=int, default=30, help='Query points per measurement.')
+        parser.add_argument('--radius', type=float, default=5.0, help='Radius of the radius queries, in km.')
+        parser.add_argument('-k', type=int, default=10, help='Results of the k-nearest queries.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', dest='json_path', help='Write the results to this file.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        radius, k = options['radius'], options['k']
+        points = []
+        for _ in range(options['queries']):
+            latitude, longitude = geo.geocode(rng.choice(CITIES))
+            points.append((latitude + rng.gauss(0, 0.05), longitude + rng.gauss(0, 0.05), rng.choice(CATEGORIES)))
+
+        def approved(category):
+            return Business.objects.approved().in_category(category)
+
+        measurements = {
+            'radius': (
+                lambda lat, lng, category: geo.within(approved(''), lat, lng, radius),
+                lambda lat, lng, category: scan_within(approved(''), lat, lng, radius),
+            ),
+            'radius + category': (
+                lambda lat, lng, category: geo.within(approved(category), lat, lng, radius),
+                lambda lat, lng, category: scan_within(approved(category), lat, lng, radius),
+            ),
+            'k-nearest': (
+                lambda lat, lng, category: geo.nearest(approved(''), lat, lng, k),
+                lambda lat, lng, category: scan_nearest(approved(''), lat, lng, k),
+            ),
+            'k-nearest + category': (
+                lambda lat, lng, category: geo.nearest(approved(category), lat, lng, k),
+                lambda lat, lng, category: scan_nearest(approved(category), lat, lng, k),
+            ),
+        }
+
+        results = {'businesses': options['size']}
+        with temporary_database():
+            owners = [User.objects.create_user(f'owner{i}') for i in range(20)]
+            create_businesses(options['size'], owners, seed=options['seed'])
+            for name, (indexed, linear) in measurements.items():
+                # Same answers, and a warm-up before timing
+                for lat, lng, category in points[:3]:
+                    assert [p.pk for p in indexed(lat, lng, category)] == \
+                        [pk for _, pk in linear(lat, lng, category)], name
+                row = results[name] = {
+                    'index': summarize(time_calls(indexed, points)),
+                    'scan': summarize(time_calls(linear, points)),
+                }
+                self.stdout.write(
+                    f"{name:<22} | index p50 {row['index']['p50_ms']:8.2f} ms p95 {row['index']['p95_ms']:8.2f} ms "
+                    f"| scan p50 {row['scan']['p50_ms']:8.2f} ms p95 {row['scan']['p95_ms']:8.2f} ms"
+                )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
@@ -0,0 +1,90 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core import cache as listing_cache
+from core import search
+from core.benchmarking import create_businesses, summarize, temporary_database, time_calls
+from core.models import Business
+
+QUERIES = [
+    'pizza', 'dental clinic', 'yoga', 'auto repair', 'family owned bakery', 'organic',
+    'hardware', 'barber', 'spring', 'delivery', 'climb', 'swim club',
+]
+
+
+def scan_search(query):
+    """The substring scan that search() used before the index existed."""
+    return list(
+        Business.objects.approved().filter(
+            Q(name__icontains=query) | Q(category__icontains=query) |
+            Q(description__icontains=query) | Q(address__icontains=query)
+        ).by_rating().values_list('pk', flat=True)[:9]
+    )
+
+
+def index_search(query):
+    ids = search.search(query, limit=9)
+    return Business.objects.in_bulk(ids)
+
+
+def faceted_index_search(query):
+    ids, facets = search.faceted_search(query, limit=9)
+    return Business.objects.in_bulk(ids), facets
+
+
+def browse_facets():
+    """Facets of the unfiltered catalog with a cold cache, the grouped query included."""
+    listing_cache.invalidate_listings()
+    return search.count_facets(listing_cache.facet_rows())
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure search latency at growing catalog sizes, comparing the inverted index '
+        'with a substring scan, and the cost of the facet counts. Runs against a temporary database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,5000,20000',
+                            help='Comma separated business counts to measure at.')
+        parser.add_argument('--repeat', type=int, default=5, help='Times each query is run per size.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', dest='json_path', help='Write the results to this file.')
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        queries = [(query,) for query in QUERIES] * options['repeat']
+        results = []
+
+        with temporary_database():
+            owners = [User.objects.create_user(f'owner{i}') for i in range(20)]
+            current = 0
+            for size in sizes:
+                current += create_businesses(size - current, owners, seed=options['seed'], start=current)
+                search.rebuild_index()
+                # Warm up connections and caches before timing
+                time_calls(index_search, queries[:len(QUERIES)])
+
+                row = {
+                    'businesses': size,
+                    'index': summarize(time_calls(index_search, queries)),
+                    'faceted': summarize(time_calls(faceted_index_search, queries)),
+                    'scan': summarize(time_calls(scan_search, queries)),
+                    'browse_facets': summarize(time_calls(browse_facets, [()] * options['repeat'])),
+                }
+                results.append(row)
+                self.stdout.write(
+                    f"{size:>8} businesses | index p50 {row['index']['p50_ms']:8.2f} ms "
+                    f"p95 {row['index']['p95_ms']:8.2f} ms | with facets p50 {row['faceted']['p50_ms']:8.2f} ms "
+                    f"p95 {row['faceted']['p95_ms']:8.2f} ms | scan p50 {row['scan']['p50_ms']:8.2f} ms "
+                    f"p95 {row['scan']['p95_ms']:8.2f} ms | uncached catalog facets p50 "
+                    f"{row['browse_facets']['p50_ms']:8.2f} ms"
+                )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
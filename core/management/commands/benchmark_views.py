@@ -0,0 +1,156 @@
+import json
+import platform
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from core.benchmarking import CATEGORIES, seed, summarize, temporary_database, time_calls
+from core.models import Business, Review
+
+
+def scenarios():
+    """(name, login as staff?, url) for every benchmarked page, resolved against the current data."""
+    popular = Business.objects.approved().order_by('-review_count').first()
+    typical = Business.objects.approved().order_by('pk').first()
+    category = CATEGORIES[0]
+    return [
+        ('home', False, reverse('home')),
+        ('search_query', False, reverse('search') + '?q=family+owned'),
+        ('search_query_category', False, reverse('search') + f'?q=repair&category={category}'),
+        ('search_query_rating', False, reverse('search') + '?q=organic&rating=4'),
+        ('search_filters_only', False, reverse('search') + f'?category={category}&rating=3'),
+        ('search_deep_page', False, reverse('search') + '?q=delivery&page=20'),
+        ('category', False, reverse('category', args=[category])),
+        ('business_detail_popular', False, reverse('business_detail', args=[popular.pk])),
+        ('business_detail_typical', False, reverse('business_detail', args=[typical.pk])),
+        ('profile', True, reverse('profile')),
+        ('admin_dashboard_businesses', True, reverse('admin_dashboard') + '?status=pending'),
+        ('admin_dashboard_users', True, reverse('admin_dashboard') + '?tab=users'),
+        ('admin_dashboard_reviews', True, reverse('admin_dashboard') + '?tab=reviews'),
+    ]
+
+
+def heaviest_user():
+    """The seeded user with the most reviews, used for profile and staff pages."""
+    row = Review.objects.values('user_id').annotate(n=Count('id')).order_by('-n').first()
+    user = User.objects.get(pk=row['user_id']) if row else User.objects.first()
+    if not user.is_staff:
+        user.is_staff = True
+        user.save(update_fields=['is_staff'])
+    return user
+
+
+def measure(client, url, requests):
+    cache.clear()
+    response = client.get(url)  # warm up caches and indexes
+    if response.status_code != 200:
+        raise CommandError(f'{url} returned {response.status_code}')
+
+    queries = []
+    with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+        client.get(url)
+    tracemalloc.start()
+    client.get(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = time_calls(client.get, [(url,)] * requests)
+    return {
+        'latency': summarize(timings),
+        'queries': len(queries),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline, max_regression):
+    """Return human readable regressions of ``results`` against a previous run."""
+    previous = {(row['businesses'], row['scenario']): row for row in baseline['results']}
+    regressions = []
+    for row in results:
+        before = previous.get((row['businesses'], row['scenario']))
+        if before is None:
+            continue
+        label = f"{row['scenario']} @ {row['businesses']}"
+        if row['latency']['p95_ms'] > before['latency']['p95_ms'] * max_regression:
+            regressions.append(
+                f"{label}: p95 {row['latency']['p95_ms']} ms vs {before['latency']['p95_ms']} ms"
+            )
+        if row['queries'] > before['queries']:
+            regressions.append(f"{label}: {row['queries']} queries vs {before['queries']}")
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the core views through the test client at several dataset sizes '
+        'on a temporary database, reporting latency percentiles, query counts and peak memory.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,5000',
+                            help='Comma separated business counts to measure at.')
+        parser.add_argument('--users', type=int, default=300, help='Users to create for reviews and ownership.')
+        parser.add_argument('--reviews-per-business', type=float, default=8)
+        parser.add_argument('--skew', type=float, default=1.2)
+        parser.add_argument('--requests', type=int, default=20, help='Timed requests per page and size.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', dest='json_path', help='Write the results to this file.')
+        parser.add_argument('--baseline', help='Previous --json output to compare against.')
+        parser.add_argument('--max-regression', type=float, default=1.25,
+                            help='Allowed p95 latency ratio against the baseline before failing.')
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        results = []
+
+        with temporary_database():
+            current = 0
+            for index, size in enumerate(sizes):
+                seed(options['users'] if index == 0 else 0, size - current,
+                     options['reviews_per_business'], skew=options['skew'], random_seed=options['seed'])
+                current = size
+
+                anonymous = Client()
+                staff = Client()
+                staff.force_login(heaviest_user())
+                for name, as_staff, url in scenarios():
+                    row = {
+                        'businesses': size,
+                        'scenario': name,
+                        'url': url,
+                        **measure(staff if as_staff else anonymous, url, options['requests']),
+                    }
+                    results.append(row)
+                    self.stdout.write(
+                        f"{size:>7} {name:<28} p50 {row['latency']['p50_ms']:8.2f} ms  "
+                        f"p95 {row['latency']['p95_ms']:8.2f} ms  {row['queries']:>3} queries  "
+                        f"{row['peak_memory_kb']:>9.1f} KiB peak"
+                    )
+
+        report = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'options': {key: options[key] for key in ('sizes', 'users', 'reviews_per_business', 'skew', 'requests', 'seed')},
+            },
+            'results': results,
+        }
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
+
+        if options['baseline']:
+            with open(options['baseline']) as fh:
+                regressions = compare(results, json.load(fh), options['max_regression'])
+            if regressions:
+                raise CommandError('Regressions against baseline:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against baseline.'))
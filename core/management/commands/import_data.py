@@ -0,0 +1,50 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importer import FORMATS, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk import businesses or reviews from a CSV or JSON Lines file. Rows are validated with the '
+        'site forms, inserted in batches and rejected rows are written to a side file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=['businesses', 'reviews'])
+        parser.add_argument('path', help='CSV or JSON Lines (.jsonl) file to import.')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Input format; guessed from the file extension by default.')
+        parser.add_argument('--rejects', help='Where to write rejected rows (default: <path>.rejects.jsonl).')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--owner', default='',
+                            help='Username owning businesses whose row has no owner column.')
+        parser.add_argument('--approve', action='store_true', help='Publish imported businesses right away.')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the rows without saving anything.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        rejects_path = options['rejects'] or f'{os.path.splitext(path)[0]}.rejects.jsonl'
+        if not os.path.exists(path):
+            raise CommandError(f'{path} does not exist.')
+
+        with open(path, newline='', encoding='utf-8-sig') as source, \
+                open(rejects_path, 'w', encoding='utf-8') as rejects:
+            result = import_rows(
+                options['kind'], read_rows(source, format), rejects,
+                batch_size=options['batch_size'], owner=options['owner'],
+                approve=options['approve'], dry_run=options['dry_run'],
+            )
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        count = result.read - result.rejected if options['dry_run'] else result.created
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {count} of {result.read} {options['kind']} in {result.elapsed:.2f}s "
+            f"({result.rows_per_second:.0f} rows/sec)."
+        ))
+        if result.rejected:
+            self.stdout.write(self.style.WARNING(f'{result.rejected} rows rejected, see {rejects_path}.'))
+        else:
+            os.remove(rejects_path)
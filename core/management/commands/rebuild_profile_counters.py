@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core.profiles import rebuild_profile_counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the business, review and pending approval counts stored on every user profile, '
+        'creating missing profiles.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='Only rebuild the given user id (can be repeated).',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        written = rebuild_profile_counters(options['user_ids'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt counters for {written} profiles.'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core.ratings import rebuild_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored rating aggregates of every business from its reviews.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--business', type=int, action='append', dest='business_ids',
+            help='Only rebuild the given business id (can be repeated).',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        written = rebuild_rating_aggregates(options['business_ids'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rating aggregates for {written} businesses.'))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import jobs  # noqa: F401  registers the tasks
+from core.tasks import PURGE_INTERVAL, purge_finished, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks, polling the queue until stopped.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the tasks that are due now, then exit.')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to wait between polls when the queue is empty.')
+        parser.add_argument('--limit', type=int, help='Tasks to run per poll (default: all due tasks).')
+
+    def handle(self, *args, **options):
+        next_purge = 0
+        while True:
+            if time.monotonic() >= next_purge:
+                purged = purge_finished()
+                if purged:
+                    self.stdout.write(f'Deleted {purged} finished tasks.')
+                next_purge = time.monotonic() + PURGE_INTERVAL
+            succeeded, failed = run_pending(options['limit'])
+            if succeeded or failed:
+                self.stdout.write(f'Ran {succeeded + failed} tasks, {failed} failed.')
+            if options['once']:
+                break
+            if not succeeded and not failed:
+                time.sleep(options['interval'])
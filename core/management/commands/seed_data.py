@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.benchmarking import seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with synthetic users, businesses and reviews. '
+        'Reviews per business follow a skewed (Pareto) distribution.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--businesses', type=int, default=1000)
+        parser.add_argument('--reviews-per-business', type=float, default=8,
+                            help='Mean number of reviews per business.')
+        parser.add_argument('--skew', type=float, default=1.2,
+                            help='Pareto shape; lower values concentrate reviews on fewer businesses.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        users, businesses, reviews = seed(
+            options['users'], options['businesses'], options['reviews_per_business'],
+            skew=options['skew'], random_seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {businesses} businesses and {reviews} reviews from {users} users.'
+        ))
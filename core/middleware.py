@@ -0,0 +1,260 @@
+import logging
+import mimetypes
+import os
+import time
+from urllib.parse import urlsplit
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware as BaseAuthenticationMiddleware
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date
+from django.utils.text import compress_string
+
+from . import compression, profiling
+from .auth import get_user
+
+logger = logging.getLogger(__name__)
+
+
+class QueryProfilingMiddleware:
+    """
+    Record query count, database time, template time and total latency of
+    every request, report them in a Server-Timing header and keep rolling
+    per-URL-name statistics (see core.profiling).
+
+    Views listed in settings.QUERY_BUDGETS are checked against their query
+    budget: overruns are logged, and raise QueryBudgetExceeded when
+    settings.QUERY_BUDGETS_STRICT is set (the default under manage.py test).
+
+    Works in both sync and async middleware chains, so it doesn't force
+    async views back onto a single thread under ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        profiling.install_query_recorder()
+        profiling.install_template_timer()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile, token = profiling.start_request()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiling.end_request(token)
+        return self.finish(request, response, profile, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        profile, token = profiling.start_request()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiling.end_request(token)
+        return self.finish(request, response, profile, time.perf_counter() - start)
+
+    def finish(self, request, response, profile, total):
+        match = request.resolver_match
+        view_name = match.view_name if match else '<unresolved>'
+        profiling.stats.record(view_name, profile, total)
+        response['Server-Timing'] = profile.server_timing(total)
+        self.check_budget(view_name, profile)
+        return response
+
+    def check_budget(self, view_name, profile):
+        budget = profiling.get_query_budget(view_name)
+        if budget is None or profile.queries <= budget:
+            return
+        message = f'{view_name} ran {profile.queries} queries, over its budget of {budget}'
+        if getattr(settings, 'QUERY_BUDGETS_STRICT', False):
+            raise profiling.QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class PrecompressedStaticMiddleware:
+    """
+    Serve the collected static files (STATIC_ROOT) in-process, without a
+    reverse proxy in front.
+
+    The ``.br``/``.gz`` copies written by collectstatic (see
+    core.staticfiles) are sent to clients that accept them. Hashed names
+    from the manifest never change content, so they are cached for a year
+    as immutable and repeat page loads don't request them at all; anything
+    else is revalidated with its ETag.
+
+    The file list is read once at startup, run collectstatic before
+    starting the server. Off when DEBUG is on or STATIC_ROOT is missing,
+    runserver serves the source files then.
+
+    Works in both sync and async middleware chains; under ASGI the files
+    are opened and read in worker threads, off the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+    IMMUTABLE = 'public, max-age=31536000, immutable'
+    REVALIDATE = 'public, max-age=0, must-revalidate'
+    # Preferred first
+    ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, get_response):
+        if settings.DEBUG or not settings.STATIC_ROOT or not os.path.isdir(settings.STATIC_ROOT):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.prefix = urlsplit(settings.STATIC_URL).path
+        self.files = self.scan(settings.STATIC_ROOT)
+
+    def scan(self, root):
+        hashed = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        files = {}
+        for directory, _, names in os.walk(root):
+            for name in names:
+                path = os.path.join(directory, name)
+                relative = os.path.relpath(path, root).replace(os.sep, '/')
+                if relative.endswith(('.br', '.gz')) and os.path.exists(path[:-3]):
+                    continue
+                variants = {None: self.stat(path)}
+                for encoding, suffix in self.ENCODINGS:
+                    if os.path.exists(path + suffix):
+                        variants[encoding] = self.stat(path + suffix)
+                content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                files[self.prefix + relative] = (variants, content_type, relative in hashed)
+        return files
+
+    @staticmethod
+    def stat(path):
+        info = os.stat(path)
+        return path, info.st_size, info.st_mtime, f'"{info.st_size:x}-{int(info.st_mtime):x}"'
+
+    def lookup(self, request):
+        return self.files.get(request.path_info) if request.method in ('GET', 'HEAD') else None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        entry = self.lookup(request)
+        if entry is None:
+            return self.get_response(request)
+        return self.serve(request, entry)
+
+    async def __acall__(self, request):
+        entry = self.lookup(request)
+        if entry is None:
+            return await self.get_response(request)
+        response = await sync_to_async(self.serve, thread_sensitive=False)(request, entry)
+        if isinstance(response, FileResponse):
+            # Otherwise the ASGI handler reads a sync file response whole
+            response.streaming_content = self.read_chunks(response.file_to_stream, response.block_size)
+        return response
+
+    @staticmethod
+    async def read_chunks(file, chunk_size):
+        read = sync_to_async(file.read, thread_sensitive=False)
+        while chunk := await read(chunk_size):
+            yield chunk
+
+    def serve(self, request, entry):
+        variants, content_type, immutable = entry
+        accepted = compression.accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        encoding = next((encoding for encoding, _ in self.ENCODINGS
+                         if encoding in variants and encoding in accepted), None)
+        path, size, mtime, etag = variants[encoding]
+        if encoding:
+            # Each encoding is a different representation with its own validator
+            etag = etag[:-1] + f'-{encoding}"'
+
+        response = get_conditional_response(request, etag=etag, last_modified=int(mtime))
+        if response is None:
+            response = HttpResponse(content_type=content_type) if request.method == 'HEAD' \
+                else FileResponse(open(path, 'rb'), content_type=content_type)
+            response['Content-Length'] = size
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(mtime)
+        response['Cache-Control'] = self.IMMUTABLE if immutable else self.REVALIDATE
+        if len(variants) > 1:
+            response['Vary'] = 'Accept-Encoding'
+        return response
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Collapse the whitespace of HTML pages and gzip text responses for
+    clients that accept it; streamed responses, such as exports, are
+    compressed chunk by chunk (see core.compression).
+
+    Bodies smaller than settings.COMPRESS_MIN_SIZE aren't worth compressing,
+    and responses that already have a Content-Encoding, like precompressed
+    static files, are passed through. Bytes saved are reported per content
+    type at /dashboard/stats/.
+    """
+    max_random_bytes = 100
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '')
+        if response.has_header('Content-Encoding') or not compression.compressible(content_type):
+            return response
+        if response.streaming:
+            return self.compress_stream(request, response, content_type)
+
+        original = len(response.content)
+        if content_type.startswith('text/html'):
+            response.content = compression.minify_html(response.content.decode(response.charset))
+        minified = original - len(response.content)
+        compressed = False
+        if len(response.content) >= settings.COMPRESS_MIN_SIZE:
+            patch_vary_headers(response, ('Accept-Encoding',))
+            if 'gzip' in compression.accepted_encodings(request.headers.get('Accept-Encoding', '')):
+                body = compress_string(response.content, max_random_bytes=self.max_random_bytes)
+                if len(body) < len(response.content):
+                    response.content = body
+                    compressed = True
+                    self.mark_encoded(response)
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = str(len(response.content))
+        compression.stats.record(content_type, original, len(response.content), minified, compressed)
+        return response
+
+    def compress_stream(self, request, response, content_type):
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if 'gzip' not in compression.accepted_encodings(request.headers.get('Accept-Encoding', '')):
+            return response
+        stream = compression.agzip_stream if response.is_async else compression.gzip_stream
+        response.streaming_content = stream(response.streaming_content, content_type, self.max_random_bytes)
+        # The compressed length isn't known until the stream ends
+        del response['Content-Length']
+        self.mark_encoded(response)
+        return response
+
+    @staticmethod
+    def mark_encoded(response):
+        # A strong ETag names exact bytes, the compressed body is only equivalent
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = 'gzip'
+
+
+class AuthenticationMiddleware(BaseAuthenticationMiddleware):
+    """
+    Django's AuthenticationMiddleware, except that sessions signed in with a
+    backend CachedModelBackend replaced stay signed in (see core.auth).
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
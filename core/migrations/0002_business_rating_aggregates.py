@@ -0,0 +1,71 @@
+# Generated by Django 4.2.10 on 2026-10-18 19:34
+
+from django.db import migrations, models
+
+
+def populate_rating_aggregates(apps, schema_editor):
+    Business = apps.get_model('core', 'Business')
+    Review = apps.get_model('core', 'Review')
+    counts = {}
+    for business_id, rating in Review.objects.values_list('business_id', 'rating'):
+        counts.setdefault(business_id, {}).setdefault(rating, 0)
+        counts[business_id][rating] += 1
+    for business in Business.objects.all():
+        stars = counts.get(business.pk, {})
+        business.review_count = sum(stars.values())
+        business.rating_sum = sum(rating * n for rating, n in stars.items())
+        business.avg_rating = business.rating_sum / business.review_count if business.review_count else 0
+        for i in range(1, 6):
+            setattr(business, f'rating_{i}_count', stars.get(i, 0))
+        business.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='business',
+            name='avg_rating',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.10 on 2026-10-18 19:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_business_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('length', models.FloatField(default=0)),
+                ('business', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='core.business')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.FloatField()),
+                ('doc_length', models.FloatField()),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_postings', to='core.business')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', '-weight'], name='core_posting_term_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.10 on 2026-10-18 20:09
+
+from django.db import migrations, models
+
+
+def mark_unset_as_pending(apps, schema_editor):
+    # Documents written before is_approved existed have no value at all
+    Business = apps.get_model('core', 'Business')
+    Business.objects.filter(is_approved__isnull=True).update(is_approved=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_unset_as_pending, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='business',
+            index=models.Index(fields=['is_approved', 'category', '-avg_rating', '-review_count', '-id'], name='core_biz_appr_cat_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='business',
+            index=models.Index(fields=['is_approved', '-avg_rating', '-review_count', '-id'], name='core_biz_appr_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='business',
+            index=models.Index(fields=['is_approved', '-created_at', '-id'], name='core_biz_appr_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['business', '-created_at', '-id'], name='core_review_biz_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='core_review_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['-created_at', '-id'], name='core_review_created_idx'),
+        ),
+    ]
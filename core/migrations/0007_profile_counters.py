@@ -0,0 +1,57 @@
+# Generated by Django 4.2.10 on 2026-10-18 20:29
+
+from django.db import migrations, models
+
+
+def populate_profile_counters(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    UserProfile = apps.get_model('core', 'UserProfile')
+    Business = apps.get_model('core', 'Business')
+    Review = apps.get_model('core', 'Review')
+    # The profile page no longer creates missing profiles
+    existing = set(UserProfile.objects.values_list('user_id', flat=True))
+    UserProfile.objects.bulk_create([
+        UserProfile(user_id=pk) for pk in User.objects.values_list('pk', flat=True) if pk not in existing
+    ])
+    businesses, pending, reviews = {}, {}, {}
+    for owner_id, is_approved in Business.objects.values_list('owner_id', 'is_approved'):
+        businesses[owner_id] = businesses.get(owner_id, 0) + 1
+        if not is_approved:
+            pending[owner_id] = pending.get(owner_id, 0) + 1
+    for user_id in Review.objects.values_list('user_id', flat=True):
+        reviews[user_id] = reviews.get(user_id, 0) + 1
+    for profile in UserProfile.objects.all():
+        profile.business_count = businesses.get(profile.user_id, 0)
+        profile.pending_count = pending.get(profile.user_id, 0)
+        profile.review_count = reviews.get(profile.user_id, 0)
+        profile.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_business_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='business_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='pending_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='business',
+            index=models.Index(fields=['owner', '-created_at', '-id'], name='core_biz_owner_created_idx'),
+        ),
+        migrations.RunPython(populate_profile_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.10 on 2026-10-18 22:05
+
+from django.db import migrations, models
+
+import core.models
+
+
+def fill_pending_keys(apps, schema_editor):
+    Task = apps.get_model('core', 'Task')
+    # The oldest pending task of each key keeps it, as enqueue() returned that one
+    seen = set()
+    for task in Task.objects.order_by('pk').only('pk', 'key', 'status'):
+        if task.status == 'pending' and task.key and task.key not in seen:
+            seen.add(task.key)
+            pending_key = task.key
+        else:
+            pending_key = f'#{task.pk}'
+        Task.objects.filter(pk=task.pk).update(pending_key=pending_key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_profile_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='pending_key',
+            field=models.CharField(default='', editable=False, max_length=200),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_pending_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='task',
+            name='pending_key',
+            field=models.CharField(default=core.models.free_pending_key, editable=False, max_length=200, unique=True),
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='core_task_key_idx',
+        ),
+    ]
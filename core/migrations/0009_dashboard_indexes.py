@@ -0,0 +1,32 @@
+# Generated by Django 4.2.10 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+# The users tab of the admin dashboard pages by join date, newest first.
+# auth.User is not ours to declare Meta indexes on, so this one is created
+# through the schema editor, which works the same on every backend.
+USER_JOINED_INDEX = models.Index(fields=['-date_joined', '-id'], name='core_user_joined_idx')
+
+
+def add_user_joined_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model('auth', 'User'), USER_JOINED_INDEX)
+
+
+def remove_user_joined_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('auth', 'User'), USER_JOINED_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0008_task_pending_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='business',
+            index=models.Index(fields=['-created_at', '-id'], name='core_biz_created_idx'),
+        ),
+        migrations.RunPython(add_user_joined_index, remove_user_joined_index),
+    ]
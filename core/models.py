@@ -1,6 +1,60 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
+
+from . import geo
+
+
+class BusinessQuerySet(models.QuerySet):
+    """
+    Listing filters that run in the database instead of in Python.
+
+    Documents created before ``is_approved`` existed had no such field in
+    MongoDB; migration 0004 stores False on them, matching the old
+    ``getattr(b, 'is_approved', False)`` checks in the views, so pending()
+    is a single indexed match.
+
+    Boolean filters are written as ``__in`` lookups: ``is_approved=True``
+    compiles to a bare ``WHERE is_approved``, which djongo cannot translate
+    and SQL databases cannot match against an index.
+    """
+
+    def approved(self):
+        return self.filter(is_approved__in=[True])
+
+    def pending(self):
+        return self.filter(is_approved__in=[False])
+
+    def with_status(self, status):
+        if status == 'approved':
+            return self.approved()
+        if status == 'pending':
+            return self.pending()
+        return self
+
+    def in_category(self, category):
+        return self.filter(category=category) if category else self
+
+    def min_rating(self, rating):
+        """Filter on the stored average rating; invalid values are ignored."""
+        try:
+            rating = float(rating)
+        except (TypeError, ValueError):
+            return self
+        return self.filter(avg_rating__gte=rating)
+
+    def by_rating(self):
+        return self.order_by('-avg_rating', '-review_count', '-pk')
+
+    def newest_first(self):
+        return self.order_by('-created_at', '-pk')
+
+    def categories(self):
+        return self.order_by().values_list('category', flat=True).distinct()
+
 
 class Business(models.Model):
     name = models.CharField(max_length=200)
@@ -15,14 +69,83 @@ class Business(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_approved = models.BooleanField(default=False)
 
+    # Rating aggregates, maintained by core.ratings whenever a review is
+    # written so listing pages never have to touch the reviews collection.
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    avg_rating = models.FloatField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+
+    # Location, from the owner or geocoded from the address (see locate());
+    # the geohash is what "near me" queries search on, see core.geo
+    latitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)])
+    geohash = models.CharField(max_length=12, blank=True, editable=False)
+
+    objects = BusinessQuerySet.as_manager()
+
+    class Meta:
+        # One index per listing access pattern, see the audit_indexes command
+        indexes = [
+            # Category pages and searches filtered by category, best rated first
+            models.Index(fields=['is_approved', 'category', '-avg_rating', '-review_count', '-id'],
+                         name='core_biz_appr_cat_rating_idx'),
+            # Featured list, rating filters and the API listing
+            models.Index(fields=['is_approved', '-avg_rating', '-review_count', '-id'],
+                         name='core_biz_appr_rating_idx'),
+            # Admin dashboard by status, newest first
+            models.Index(fields=['is_approved', '-created_at', '-id'], name='core_biz_appr_created_idx'),
+            # Admin dashboard, all statuses, newest first
+            models.Index(fields=['-created_at', '-id'], name='core_biz_created_idx'),
+            # Geohash cell ranges of "near me" searches
+            models.Index(fields=['is_approved', 'geohash'], name='core_biz_appr_geohash_idx'),
+            # An owner's businesses on the profile page
+            models.Index(fields=['owner', '-created_at', '-id'], name='core_biz_owner_created_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored owner and status so edits can adjust the profile counters
+        if 'owner_id' in instance.__dict__ and 'is_approved' in instance.__dict__:
+            instance._loaded_owner_state = (instance.owner_id, not instance.is_approved)
+        # And the stored location, so a new address is geocoded again (see locate())
+        if all(field in instance.__dict__ for field in ('address', 'latitude', 'longitude')):
+            instance._loaded_location = (instance.address, instance.latitude, instance.longitude)
+        return instance
+
     def __str__(self):
         return self.name
 
     def average_rating(self):
-        reviews = self.reviews.all()
-        if not reviews:
-            return 0
-        return sum(review.rating for review in reviews) / len(reviews)
+        return self.avg_rating or 0
+
+    def rating_counts(self):
+        """Return a {star: count} mapping built from the stored aggregates."""
+        return {i: getattr(self, f'rating_{i}_count') or 0 for i in range(1, 6)}
+
+    def star_range(self):
+        """One item per full star of the rounded average, for template loops."""
+        return range(int(round(self.avg_rating or 0)))
+
+    def locate(self, geocode_address=True):
+        """
+        Geocode the address when no coordinates were given, or when the
+        address changed but the coordinates are still the stored ones (an
+        edit form shows them pre-filled), and derive the geohash. Called
+        before every save; bulk inserts must call it themselves.
+        """
+        loaded = getattr(self, '_loaded_location', None)
+        moved = loaded is not None and self.address != loaded[0] and (self.latitude, self.longitude) == loaded[1:]
+        if geocode_address and (self.latitude is None or self.longitude is None or moved):
+            self.latitude, self.longitude = geo.geocode(self.address or '') or (None, None)
+        located = self.latitude is not None and self.longitude is not None
+        self.geohash = geo.encode(self.latitude, self.longitude) if located else ''
+        self._loaded_location = (self.address, self.latitude, self.longitude)
 
 class Review(models.Model):
     business = models.ForeignKey(Business, related_name='reviews', on_delete=models.CASCADE)
@@ -33,6 +156,25 @@ class Review(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Review pages of a business, newest first
+            models.Index(fields=['business', '-created_at', '-id'], name='core_review_biz_created_idx'),
+            # A user's reviews on the profile page
+            models.Index(fields=['user', '-created_at', '-id'], name='core_review_user_created_idx'),
+            # Admin dashboard reviews tab
+            models.Index(fields=['-created_at', '-id'], name='core_review_created_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored rating so edits can adjust the business aggregates;
+        # without it (a deferred rating) the signals recount the business instead
+        if 'rating' in instance.__dict__:
+            instance._loaded_rating = instance.rating
+        return instance
+
     def __str__(self):
         return f"Review by {self.user.username} for {self.business.name}"
 
@@ -44,5 +186,73 @@ class UserProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Counters for the profile page, maintained by core.profiles whenever
+    # the user's businesses or reviews are written.
+    business_count = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    # The user's businesses still waiting for approval
+    pending_count = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return self.user.username
+
+class SearchDocument(models.Model):
+    """Per-business entry of the search index, holding its weighted length."""
+    business = models.OneToOneField(Business, on_delete=models.CASCADE, related_name='search_document')
+    length = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"Search document for {self.business_id}"
+
+class SearchPosting(models.Model):
+    """One term of the inverted index: the field-weighted frequency of a term in a business."""
+    term = models.CharField(max_length=64)
+    business = models.ForeignKey(Business, related_name='search_postings', on_delete=models.CASCADE)
+    weight = models.FloatField()
+    doc_length = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', '-weight'], name='core_posting_term_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.business_id}"
+
+def free_pending_key():
+    """A Task.pending_key that no idempotency key takes (those never start with '#')."""
+    return f'#{uuid.uuid4().hex}'
+
+
+class Task(models.Model):
+    """A unit of background work, run by the run_tasks worker (see core.tasks)."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    name = models.CharField(max_length=100)
+    args = models.TextField(default='[]')
+    key = models.CharField(max_length=200, blank=True)
+    # The key while the task waits to run its first attempt, a placeholder
+    # otherwise; being unique, it lets enqueue() insert at most one pending
+    # task per key however many processes try at once
+    pending_key = models.CharField(max_length=200, unique=True, default=free_pending_key, editable=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # The worker's poll for due tasks
+            models.Index(fields=['status', 'run_at'], name='core_task_status_run_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
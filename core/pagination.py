@@ -0,0 +1,65 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are ordered by a field plus the primary key as a tie breaker, and the
+cursor carries the position of the last row of the previous page. Fetching
+page N costs the same as page 1, unlike LIMIT/OFFSET.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    payload = json.dumps(values, default=str, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor(cursor) from exc
+    if not isinstance(values, list):
+        raise InvalidCursor(cursor)
+    return values
+
+
+def keyset_page(queryset, field, cursor=None, per_page=25):
+    """
+    Return ``(items, next_cursor)`` for rows ordered by ``field`` descending.
+
+    Works with model instances and with ``.values()`` querysets.
+
+    ``next_cursor`` is None on the last page. Raises InvalidCursor for a
+    cursor that was not produced by this function for the same field.
+    """
+    model_field = queryset.model._meta.get_field(field)
+    queryset = queryset.order_by(f'-{field}', '-pk')
+    if cursor:
+        try:
+            value, pk = decode_cursor(cursor)
+            value = model_field.to_python(value)
+            pk = int(pk)
+        except (ValueError, TypeError, ValidationError) as exc:
+            raise InvalidCursor(cursor) from exc
+        queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk}))
+
+    items = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        last = items[-1]
+        if isinstance(last, dict):
+            # Rows from .values() must include the field and the primary key
+            next_cursor = encode_cursor([last[field], last.get('pk', last.get('id'))])
+        else:
+            next_cursor = encode_cursor([getattr(last, field), last.pk])
+    return items, next_cursor
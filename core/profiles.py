@@ -0,0 +1,180 @@
+"""
+Maintenance of the per-user counters stored on UserProfile.
+
+Businesses and reviews are the source of truth; UserProfile.business_count,
+review_count and pending_count are kept in step with them (see
+core.signals) so the profile page reads them from one row instead of
+counting. Bulk writes, which send no signals, call
+rebuild_profile_counters() for the users they touched.
+
+Deleting a business or a user deletes its reviews one signal at a time;
+those review counts are collected and applied with one UPDATE per
+distinct change once the parent row is gone, as are the deletes made
+inside deferred_counter_updates().
+"""
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db.models import Count, F
+
+from .models import Business, Review, UserProfile
+
+COUNTERS = ('business_count', 'review_count', 'pending_count')
+
+_deferred = threading.local()
+
+
+def adjust_counters(user_id, **deltas):
+    """
+    Add ``deltas`` to a user's counters with one UPDATE built from F()
+    expressions, so concurrent writes cannot lose increments.
+    """
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if updates:
+        UserProfile.objects.filter(user_id=user_id).update(**updates)
+
+
+def record_business_change(old_state=None, new_state=None):
+    """
+    Apply a single business write to its owner's counters.
+
+    The states are ``(owner_id, is_pending)`` before and after the write;
+    ``old_state`` is None for a new business and ``new_state`` None for a
+    deleted one. An approval is one UPDATE of the owner's pending_count.
+    """
+    deltas = defaultdict(Counter)
+    if old_state is not None:
+        owner_id, pending = old_state
+        deltas[owner_id]['business_count'] -= 1
+        deltas[owner_id]['pending_count'] -= int(pending)
+    if new_state is not None:
+        owner_id, pending = new_state
+        deltas[owner_id]['business_count'] += 1
+        deltas[owner_id]['pending_count'] += int(pending)
+    for owner_id, changes in deltas.items():
+        adjust_counters(owner_id, **changes)
+
+
+def _apply_review_deltas(deltas):
+    # Usually every reviewer loses one review, which is a single UPDATE
+    users_by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            users_by_delta[delta].append(user_id)
+    for delta, user_ids in users_by_delta.items():
+        UserProfile.objects.filter(user_id__in=user_ids).update(review_count=F('review_count') + delta)
+
+
+def record_review_removal(user_id, cascade=False):
+    """
+    Take a deleted review off its author's review_count. Collected instead
+    inside deferred_counter_updates() and when the review goes with its
+    business or user (``cascade``).
+    """
+    deltas = getattr(_deferred, 'review_deltas', None)
+    if deltas is None and cascade:
+        deltas = getattr(_deferred, 'cascade', None)
+    if deltas is None:
+        adjust_counters(user_id, review_count=-1)
+    else:
+        deltas[user_id] -= 1
+
+
+def begin_delete(owner_id=None):
+    """
+    Called before a business or user is deleted (pre_delete); ``owner_id``
+    is the owner of a deleted business, recounted by finish_delete().
+    """
+    if getattr(_deferred, 'cascade', None) is None:
+        _deferred.cascade = Counter()
+        _deferred.owner_ids = set()
+    else:
+        # Nothing is deleted before every pre_delete signal has been sent, so
+        # these are left over from a delete that failed
+        _deferred.cascade.clear()
+    if owner_id is not None:
+        _deferred.owner_ids.add(owner_id)
+
+
+def finish_delete():
+    """
+    Called after a business or user is deleted (post_delete): apply the
+    review counts of the cascade and recount the owners of the deleted
+    businesses. Later calls for the same delete find nothing left to do.
+    """
+    deltas = getattr(_deferred, 'cascade', None)
+    owner_ids = getattr(_deferred, 'owner_ids', None)
+    _deferred.cascade = _deferred.owner_ids = None
+    if deltas:
+        _apply_review_deltas(deltas)
+    if owner_ids:
+        rebuild_profile_counters(owner_ids)
+
+
+@contextmanager
+def deferred_counter_updates():
+    """
+    Collect the review deletes made inside the block and apply them on exit
+    with one UPDATE per distinct change, instead of one per review. Meant
+    for bulk operations such as deleting many reviews at once.
+    """
+    if getattr(_deferred, 'review_deltas', None) is not None:
+        # Already deferring, the outermost block applies them
+        yield
+        return
+    _deferred.review_deltas = Counter()
+    try:
+        yield
+    finally:
+        deltas = _deferred.review_deltas
+        _deferred.review_deltas = None
+    _apply_review_deltas(deltas)
+
+
+def rebuild_profile_counters(user_ids=None, batch_size=500):
+    """
+    Recompute the counters from the businesses and reviews collections,
+    creating the profiles of users that have none.
+
+    Rebuilds every user when ``user_ids`` is None. Counts come from one
+    grouped query per counter rather than queries per user. Returns the
+    number of profiles written.
+    """
+    users = User.objects.all()
+    profiles = UserProfile.objects.all()
+    businesses = Business.objects.all()
+    reviews = Review.objects.all()
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        users = users.filter(pk__in=user_ids)
+        profiles = profiles.filter(user_id__in=user_ids)
+        businesses = businesses.filter(owner_id__in=user_ids)
+        reviews = reviews.filter(user_id__in=user_ids)
+
+    existing = set(profiles.values_list('user_id', flat=True))
+    UserProfile.objects.bulk_create(
+        [UserProfile(user_id=pk) for pk in users.values_list('pk', flat=True) if pk not in existing],
+        batch_size=batch_size,
+    )
+
+    counts = {
+        'business_count': dict(businesses.values_list('owner_id').annotate(n=Count('id')).order_by()),
+        'pending_count': dict(businesses.pending().values_list('owner_id').annotate(n=Count('id')).order_by()),
+        'review_count': dict(reviews.values_list('user_id').annotate(n=Count('id')).order_by()),
+    }
+    batch = []
+    written = 0
+    for profile in profiles.only('pk', 'user_id').iterator(chunk_size=batch_size):
+        for field in COUNTERS:
+            setattr(profile, field, counts[field].get(profile.user_id, 0))
+        batch.append(profile)
+        if len(batch) >= batch_size:
+            UserProfile.objects.bulk_update(batch, COUNTERS)
+            written += len(batch)
+            batch = []
+    if batch:
+        UserProfile.objects.bulk_update(batch, COUNTERS)
+        written += len(batch)
+    return written
@@ -0,0 +1,183 @@
+"""
+Per-request profiling data collected by core.middleware.QueryProfilingMiddleware.
+
+Each request gets a RequestProfile holding its query count, database time
+and template render time. Finished requests are added to rolling
+per-URL-name windows so the stats endpoint can report percentiles.
+"""
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+
+ROLLING_WINDOW = 500
+
+_current = ContextVar('request_profile', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A view ran more queries than its entry in settings.QUERY_BUDGETS allows."""
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self._template_depth = 0
+        # Async views run queries of one request in several threads
+        self._lock = threading.Lock()
+
+    def record_query(self, execute, sql, params, many, context):
+        """Database execute wrapper, see connection.execute_wrapper()."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.queries += 1
+                self.db_time += elapsed
+
+    def server_timing(self, total):
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+def current_profile():
+    return _current.get()
+
+
+def start_request():
+    profile = RequestProfile()
+    return profile, _current.set(profile)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def _record_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile.record_query(execute, sql, params, many, context)
+
+
+def _add_query_recorder(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def install_query_recorder():
+    """
+    Count the queries of the current request on every database connection.
+
+    Connections are per thread, and async views query from worker threads,
+    so the recorder is added to each connection as it is created and finds
+    the request's profile through the context variable, which sync_to_async
+    carries into those threads.
+    """
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    connection_created.connect(_add_query_recorder, dispatch_uid='core.profiling.query_recorder')
+    for connection in connections.all():
+        _add_query_recorder(connection)
+
+
+_template_timer_installed = False
+
+
+def install_template_timer():
+    """Wrap the Django template backend's render() to time top-level renders."""
+    global _template_timer_installed
+    if _template_timer_installed:
+        return
+    from django.template.backends.django import Template
+
+    original_render = Template.render
+
+    def render(self, context=None, request=None):
+        profile = _current.get()
+        if profile is None:
+            return original_render(self, context, request)
+        # Nested renders (e.g. render_to_string inside a tag) are already
+        # counted by the outer one
+        profile._template_depth += 1
+        start = time.perf_counter()
+        try:
+            return original_render(self, context, request)
+        finally:
+            profile._template_depth -= 1
+            if profile._template_depth == 0:
+                profile.template_time += time.perf_counter() - start
+
+    Template.render = render
+    _template_timer_installed = True
+
+
+class ViewStats:
+    """Rolling latency/query samples per URL name."""
+
+    def __init__(self, window=ROLLING_WINDOW):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, view_name, profile, total):
+        with self._lock:
+            self._samples[view_name].append(
+                (total, profile.db_time, profile.template_time, profile.queries)
+            )
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+    def snapshot(self):
+        with self._lock:
+            samples = {name: list(rows) for name, rows in self._samples.items()}
+        report = {}
+        for name, rows in sorted(samples.items()):
+            total, db, template, queries = zip(*rows)
+            report[name] = {
+                'requests': len(rows),
+                'total_ms': _percentiles(total, scale=1000),
+                'db_ms': _percentiles(db, scale=1000),
+                'template_ms': _percentiles(template, scale=1000),
+                'queries': _percentiles(queries),
+                'query_budget': get_query_budget(name),
+            }
+        return report
+
+
+def _percentiles(values, scale=1):
+    values = [value * scale for value in values]
+    return {
+        'p50': round(percentile(values, 50), 2),
+        'p95': round(percentile(values, 95), 2),
+        'p99': round(percentile(values, 99), 2),
+        'max': round(max(values), 2),
+    }
+
+
+stats = ViewStats()
+
+
+def get_query_budget(view_name):
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
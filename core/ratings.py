@@ -0,0 +1,136 @@
+"""
+Maintenance of the denormalized rating aggregates stored on Business.
+
+Reviews are the source of truth; Business.review_count, rating_sum,
+avg_rating and rating_<n>_count are kept in step with them so that listing
+pages can sort and filter by rating with a single query against businesses.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db.models import Case, Count, F, FloatField, Value, When
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from . import cache as listing_cache
+from .models import Business, Review
+
+STARS = range(1, 6)
+
+_deferred = threading.local()
+
+
+def _star_field(rating):
+    return f'rating_{rating}_count'
+
+
+def record_review_change(business_id, old_rating=None, new_rating=None):
+    """
+    Apply a single review write to the stored aggregates of a business.
+
+    ``old_rating`` is None for a newly created review and ``new_rating`` is
+    None for a deleted one. The whole change is issued as one UPDATE built
+    from F() expressions, so concurrent review writes cannot lose increments.
+    A write that keeps the rating only bumps the business's updated_at.
+    """
+    old_rating = int(old_rating) if old_rating is not None else None
+    new_rating = int(new_rating) if new_rating is not None else None
+
+    pending = getattr(_deferred, 'business_ids', None)
+    if pending is not None:
+        pending.add(business_id)
+        return
+
+    if old_rating == new_rating:
+        # Only the text changed (e.g. an owner reply); the business page
+        # still has to look modified to conditional GETs
+        Business.objects.filter(pk=business_id).update(updated_at=timezone.now())
+        return
+
+    count_delta = (new_rating is not None) - (old_rating is not None)
+    sum_delta = (new_rating or 0) - (old_rating or 0)
+
+    updates = {
+        'review_count': F('review_count') + count_delta,
+        'rating_sum': F('rating_sum') + sum_delta,
+        # Every expression is evaluated against the pre-update row, so the
+        # average has to be derived from the same deltas.
+        'avg_rating': Case(
+            When(review_count__lte=-count_delta, then=Value(0.0)),
+            default=Cast(F('rating_sum') + sum_delta, FloatField()) / (F('review_count') + count_delta),
+            output_field=FloatField(),
+        ),
+        'updated_at': timezone.now(),
+    }
+    if old_rating is not None:
+        updates[_star_field(old_rating)] = F(_star_field(old_rating)) - 1
+    if new_rating is not None:
+        updates[_star_field(new_rating)] = F(_star_field(new_rating)) + 1
+
+    Business.objects.filter(pk=business_id).update(**updates)
+
+
+def rebuild_rating_aggregates(business_ids=None, batch_size=500):
+    """
+    Recompute the aggregates from the reviews collection.
+
+    Rebuilds every business when ``business_ids`` is None. Counts come from a
+    single grouped query over reviews rather than one query per business.
+    Returns the number of businesses written.
+    """
+    reviews = Review.objects.all()
+    businesses = Business.objects.all()
+    if business_ids is not None:
+        business_ids = list(business_ids)
+        reviews = reviews.filter(business_id__in=business_ids)
+        businesses = businesses.filter(pk__in=business_ids)
+
+    counts = {}
+    grouped = reviews.values('business_id', 'rating').annotate(n=Count('id')).order_by()
+    for row in grouped:
+        counts.setdefault(row['business_id'], {})[row['rating']] = row['n']
+
+    fields = ['review_count', 'rating_sum', 'avg_rating'] + [_star_field(i) for i in STARS]
+    now = timezone.now()
+    batch = []
+    written = 0
+    for business in businesses.only('pk').iterator(chunk_size=batch_size):
+        stars = counts.get(business.pk, {})
+        business.review_count = sum(stars.values())
+        business.rating_sum = sum(rating * n for rating, n in stars.items())
+        business.avg_rating = business.rating_sum / business.review_count if business.review_count else 0
+        for i in STARS:
+            setattr(business, _star_field(i), stars.get(i, 0))
+        business.updated_at = now
+        batch.append(business)
+        if len(batch) >= batch_size:
+            Business.objects.bulk_update(batch, fields + ['updated_at'])
+            written += len(batch)
+            batch = []
+    if batch:
+        Business.objects.bulk_update(batch, fields + ['updated_at'])
+        written += len(batch)
+    # bulk_update sends no signals, so drop the rating-ordered listings here
+    listing_cache.invalidate_featured()
+    return written
+
+
+@contextmanager
+def deferred_rating_updates():
+    """
+    Collect review writes made inside the block and recount the touched
+    businesses once on exit, instead of issuing one UPDATE per review.
+    Meant for bulk operations such as deleting many reviews at once.
+    """
+    if getattr(_deferred, 'business_ids', None) is not None:
+        # Already deferring, the outermost block does the rebuild
+        yield
+        return
+    _deferred.business_ids = set()
+    try:
+        yield
+    finally:
+        business_ids = _deferred.business_ids
+        _deferred.business_ids = None
+    if business_ids:
+        rebuild_rating_aggregates(business_ids)
@@ -0,0 +1,393 @@
+"""
+Full-text search over businesses.
+
+Approved businesses are tokenized into an inverted index (SearchPosting rows
+keyed by term) with per-field weights, and queries are ranked with BM25
+using the field-weighted term frequencies. Only the best weighted postings
+of each query term are read (CANDIDATES_PER_TERM, or more for later pages),
+with the category and rating filters applied in the same query, so a
+search costs the same however many businesses match. The facet counts
+cover every match and are grouped in the database.
+"""
+import hashlib
+import math
+import re
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, Q
+
+from . import cache as listing_cache
+from . import geo
+from .models import Business, SearchDocument, SearchPosting
+
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'category': 2.0,
+    'services': 1.5,
+    'description': 1.0,
+    'address': 1.0,
+}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Minimum average rating options of the search filters (4+, 3+, ...)
+RATING_BUCKETS = (4, 3, 2, 1)
+MIN_PREFIX_LENGTH = 3
+# Postings read per query term, best weights first, so a query costs the
+# same however many businesses match; deeper pages read more
+CANDIDATES_PER_TERM = 200
+RESULTS_LIMIT = 100
+MAX_TERM_LENGTH = 64
+STATS_CACHE_KEY = 'search:stats'
+STATS_CACHE_TIMEOUT = 300
+
+STOPWORDS = frozenset(
+    'a an and are as at be by for from in is it of on or the to with'.split()
+)
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def _normalize(token):
+    # Light plural folding so "bakeries"/"bakery" and "shops"/"shop" meet
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Split text into normalized index terms."""
+    return [
+        _normalize(token)[:MAX_TERM_LENGTH]
+        for token in _TOKEN_RE.findall((text or '').lower())
+        if token not in STOPWORDS
+    ]
+
+
+def document_terms(business):
+    """Return ({term: weighted frequency}, weighted document length) for a business."""
+    weights = defaultdict(float)
+    length = 0.0
+    for field, field_weight in FIELD_WEIGHTS.items():
+        tokens = tokenize(getattr(business, field, ''))
+        length += field_weight * len(tokens)
+        for token in tokens:
+            weights[token] += field_weight
+    return weights, length
+
+
+def _build_postings(business):
+    terms, length = document_terms(business)
+    postings = [
+        SearchPosting(term=term, business_id=business.pk, weight=weight, doc_length=length)
+        for term, weight in terms.items()
+    ]
+    return postings, length
+
+
+def index_business(business):
+    """(Re)index one business; unapproved businesses are removed from the index."""
+    with transaction.atomic():
+        SearchPosting.objects.filter(business_id=business.pk).delete()
+        if not getattr(business, 'is_approved', False):
+            SearchDocument.objects.filter(business_id=business.pk).delete()
+        else:
+            postings, length = _build_postings(business)
+            SearchPosting.objects.bulk_create(postings)
+            SearchDocument.objects.update_or_create(business_id=business.pk, defaults={'length': length})
+    # The cached term counts and facets are keyed by the catalog version
+    listing_cache.bump_catalog_version()
+
+
+def index_businesses(businesses):
+    """(Re)index many businesses with a handful of queries, e.g. after a bulk approval."""
+    businesses = list(businesses)
+    ids = [business.pk for business in businesses]
+    postings, documents = [], []
+    for business in businesses:
+        if getattr(business, 'is_approved', False):
+            business_postings, length = _build_postings(business)
+            postings.extend(business_postings)
+            documents.append(SearchDocument(business_id=business.pk, length=length))
+    with transaction.atomic():
+        SearchPosting.objects.filter(business_id__in=ids).delete()
+        SearchDocument.objects.filter(business_id__in=ids).delete()
+        SearchDocument.objects.bulk_create(documents)
+        SearchPosting.objects.bulk_create(postings, batch_size=5000)
+    listing_cache.bump_catalog_version()
+    return len(documents)
+
+
+def unindex_business(business_id):
+    with transaction.atomic():
+        SearchPosting.objects.filter(business_id=business_id).delete()
+        SearchDocument.objects.filter(business_id=business_id).delete()
+    listing_cache.bump_catalog_version()
+
+
+def rebuild_index(batch_size=500):
+    """Drop and rebuild the whole index from approved businesses. Returns the number indexed."""
+    SearchPosting.objects.all().delete()
+    SearchDocument.objects.all().delete()
+    indexed = 0
+    postings, documents = [], []
+    for business in Business.objects.approved().order_by('pk').iterator(chunk_size=batch_size):
+        business_postings, length = _build_postings(business)
+        postings.extend(business_postings)
+        documents.append(SearchDocument(business_id=business.pk, length=length))
+        indexed += 1
+        if len(documents) >= batch_size:
+            SearchDocument.objects.bulk_create(documents)
+            SearchPosting.objects.bulk_create(postings, batch_size=batch_size * 10)
+            postings, documents = [], []
+    SearchDocument.objects.bulk_create(documents)
+    SearchPosting.objects.bulk_create(postings, batch_size=batch_size * 10)
+    cache.delete(STATS_CACHE_KEY)
+    listing_cache.bump_catalog_version()
+    return indexed
+
+
+def index_stats():
+    """Return (document count, average document length), cached for a few minutes."""
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        agg = SearchDocument.objects.aggregate(n=Count('id'), avg_length=Avg('length'))
+        stats = (agg['n'] or 0, agg['avg_length'] or 0.0)
+        cache.set(STATS_CACHE_KEY, stats, STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def _term_filter(term, prefix):
+    if prefix:
+        # A range on the indexed term column, usable by any backend's index
+        return {'term__gte': term, 'term__lt': term + '\uffff'}
+    return {'term': term}
+
+
+def _filters(category, min_rating):
+    """Lookups on the business of a posting for the category and rating filters."""
+    filters = {}
+    if category:
+        filters['business__category'] = category
+    threshold = _rating_threshold(min_rating)
+    if threshold is not None:
+        filters['business__avg_rating__gte'] = threshold
+    return filters
+
+
+def _postings(term, prefix, filters, limit):
+    # The best weights first, read off the (term, -weight) index; the
+    # filters join the business so filtered searches still fill their page
+    postings = SearchPosting.objects.filter(**_term_filter(term, prefix), **filters).order_by('-weight')
+    return list(postings.values_list('business_id', 'weight', 'doc_length')[:limit])
+
+
+def _doc_freq(term, prefix):
+    """Number of postings of a term (or prefix), cached until the catalog changes."""
+    key = f"search:df:{listing_cache.catalog_version()}:{'prefix' if prefix else 'term'}:{term}"
+    doc_freq = cache.get(key)
+    if doc_freq is None:
+        doc_freq = SearchPosting.objects.filter(**_term_filter(term, prefix)).count()
+        cache.set(key, doc_freq, STATS_CACHE_TIMEOUT)
+    return doc_freq
+
+
+def _resolve_terms(query, filters, limit):
+    """
+    [(term, prefix, document frequency, postings)] of the query terms found
+    in the index, reading at most ``limit`` postings of each.
+
+    When the last query term has no exact match it is matched as a prefix
+    (from three characters on), so partially typed words still find results.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    resolved = []
+    for position, term in enumerate(terms):
+        prefix = False
+        # Decided on the whole index, a filter leaving no exact match must not switch to the prefix
+        if position == len(terms) - 1 and len(term) >= MIN_PREFIX_LENGTH and not _doc_freq(term, False):
+            prefix = True
+        rows = _postings(term, prefix, filters, limit)
+        doc_freq = max(_doc_freq(term, prefix), len({business_id for business_id, _, _ in rows}))
+        if doc_freq:
+            resolved.append((term, prefix, doc_freq, rows))
+    return resolved
+
+
+def _score(resolved):
+    total_docs, avg_length = index_stats()
+    avg_length = avg_length or 1.0
+    scores = defaultdict(float)
+    for _, _, doc_freq, rows in resolved:
+        # A prefix can match several terms of the same business, keep the best one
+        best = {}
+        for business_id, weight, doc_length in rows:
+            if business_id not in best or weight > best[business_id][0]:
+                best[business_id] = (weight, doc_length)
+        idf = math.log(1 + (max(total_docs, doc_freq) - doc_freq + 0.5) / (doc_freq + 0.5))
+        for business_id, (weight, doc_length) in best.items():
+            norm = K1 * (1 - B + B * doc_length / avg_length)
+            scores[business_id] += idf * weight * (K1 + 1) / (weight + norm)
+    return scores
+
+
+def score(query, limit=CANDIDATES_PER_TERM):
+    """
+    Return {business_id: BM25 score} for the best matches of a query: those
+    among the ``limit`` highest weighted postings of each query term.
+    """
+    return _score(_resolve_terms(query, {}, limit))
+
+
+def _matching(resolved):
+    """Subquery of the ids of every business matching one of the resolved terms."""
+    q = Q()
+    for term, prefix, _, _ in resolved:
+        q |= Q(**_term_filter(term, prefix))
+    return SearchPosting.objects.filter(q).values('business_id')
+
+
+def _rating_threshold(min_rating):
+    # Invalid values are ignored, as by BusinessQuerySet.min_rating()
+    try:
+        return float(min_rating)
+    except (TypeError, ValueError):
+        return None
+
+
+def count_facets(rows, category='', min_rating=''):
+    """
+    Category and rating-bucket counts from (category, avg_rating, count) rows.
+
+    Each facet applies the other one's filter but not its own, so a count
+    says how many results choosing that option would give. Returns
+    ``{'categories': [(category, count)], 'ratings': [(bucket, count)]}``.
+    """
+    threshold = _rating_threshold(min_rating)
+    categories = defaultdict(int)
+    ratings = dict.fromkeys(RATING_BUCKETS, 0)
+    for row_category, avg_rating, count in rows:
+        avg_rating = avg_rating or 0
+        if threshold is None or avg_rating >= threshold:
+            categories[row_category] += count
+        if not category or row_category == category:
+            for bucket in RATING_BUCKETS:
+                if avg_rating >= bucket:
+                    ratings[bucket] += count
+    if category:
+        # Keep the selected option even when nothing matches it
+        categories.setdefault(category, 0)
+    return {'categories': sorted(categories.items()), 'ratings': list(ratings.items())}
+
+
+def _in_batches(ids, size=500):
+    # Keeps every IN list under the bound-variable limits of SQL backends
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _rank(query, category, min_rating, limit):
+    resolved = _resolve_terms(query, _filters(category, min_rating), max(limit, CANDIDATES_PER_TERM))
+    scores = _score(resolved)
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    threshold = _rating_threshold(min_rating)
+    ranked, start = [], 0
+    # Only the best scored are looked up, for the rating that breaks ties
+    # and to drop postings of businesses unapproved since
+    while len(ranked) < limit and start < len(ordered):
+        end = start + limit - len(ranked)
+        # A run of equal scores stays in one slice, so all of it is ordered by rating
+        while end < len(ordered) and scores[ordered[end]] == scores[ordered[end - 1]]:
+            end += 1
+        ratings = {}
+        for batch in _in_batches(ordered[start:end]):
+            # Looked up by primary key alone: with the approval filter in the
+            # query SQLite scans every approved business on its index instead
+            rows = Business.objects.filter(pk__in=batch).values_list('pk', 'is_approved', 'category', 'avg_rating')
+            ratings.update(
+                (pk, avg_rating or 0) for pk, is_approved, row_category, avg_rating in rows
+                if is_approved and (not category or row_category == category)
+                and (threshold is None or (avg_rating or 0) >= threshold)
+            )
+        ranked.extend(sorted(ratings, key=lambda pk: (scores[pk], ratings[pk]), reverse=True))
+        start = end
+    return ranked[:limit], resolved
+
+
+def _match_rows(resolved):
+    """
+    (category, avg_rating, count) of every approved business matching the
+    resolved terms. Grouped in the database, and cached for the catalog
+    version, so a repeated query doesn't count its matches again.
+    """
+    if not resolved:
+        return []
+    terms = ' '.join(sorted(f"{term}{'*' if prefix else ''}" for term, prefix, _, _ in resolved))
+    key = f"search:facets:{listing_cache.catalog_version()}:{hashlib.md5(terms.encode()).hexdigest()}"
+    rows = cache.get(key)
+    if rows is None:
+        rows = list(
+            Business.objects.approved().filter(pk__in=_matching(resolved))
+            .values_list('category', 'avg_rating').annotate(n=Count('id')).order_by()
+        )
+        cache.set(key, rows, STATS_CACHE_TIMEOUT)
+    return rows
+
+
+def search(query, category='', min_rating='', limit=RESULTS_LIMIT):
+    """
+    Rank approved businesses matching ``query``, narrowed by category and rating.
+
+    Returns the ids of the best ``limit`` matches ordered by relevance, ties
+    broken by the stored average rating. The filters are applied while the
+    postings are read, so a narrow filter still fills the results. The work
+    done grows with ``limit``, not with the number of matches; pass a larger
+    one for later pages.
+    """
+    return _rank(query, category, min_rating, limit)[0]
+
+
+def faceted_search(query, category='', min_rating='', limit=RESULTS_LIMIT):
+    """
+    search() plus the facet counts of every approved match (see
+    count_facets), which are grouped in the database rather than read, so
+    each count is the number of results choosing that option gives.
+    """
+    ranked, resolved = _rank(query, category, min_rating, limit)
+    return ranked, count_facets(_match_rows(resolved), category, min_rating)
+
+
+def result_count(facets, category=''):
+    """Number of results of the search the facets were counted for."""
+    return sum(count for name, count in facets['categories'] if not category or name == category)
+
+
+def nearby_search(query, latitude, longitude, radius_km, category='', min_rating=''):
+    """
+    Approved businesses within ``radius_km`` of the point, nearest first,
+    optionally only those matching ``query``. Returns the ids, the facet
+    counts (see count_facets) and {id: distance in km}.
+    """
+    places = geo.within(Business.objects.approved(), latitude, longitude, radius_km)
+    if query:
+        # Only the places in range are matched against the query terms
+        resolved = _resolve_terms(query, {}, CANDIDATES_PER_TERM)
+        matching = set()
+        if resolved:
+            for batch in _in_batches(place.pk for place in places):
+                matching.update(_matching(resolved).filter(business_id__in=batch).values_list('business_id', flat=True))
+        places = [place for place in places if place.pk in matching]
+    facets = count_facets(((place.category, place.avg_rating, 1) for place in places), category, min_rating)
+    threshold = _rating_threshold(min_rating)
+    places = [
+        place for place in places
+        if (not category or place.category == category) and (threshold is None or place.avg_rating >= threshold)
+    ]
+    return [place.pk for place in places], facets, {place.pk: place.distance for place in places}
@@ -0,0 +1,162 @@
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Business, Review, UserProfile
+from . import autocomplete
+from .auth import invalidate_user
+from . import cache as listing_cache
+from . import profiles
+from .profiles import adjust_counters, rebuild_profile_counters, record_business_change
+from .ratings import rebuild_rating_aggregates, record_review_change
+from .jobs import queue_listing_refresh, queue_reindex
+
+
+def _is_business_cascade(origin):
+    if isinstance(origin, Business):
+        return True
+    return isinstance(origin, QuerySet) and origin.model is Business
+
+
+def _is_review_delete(origin):
+    # Reviews deleted themselves rather than along with their business or user
+    if isinstance(origin, Review):
+        return True
+    return isinstance(origin, QuerySet) and origin.model is Review
+
+
+def _deleting_user(origin, user_id):
+    # Other users' rows in the cascade (reviews of the user's businesses) still count
+    return isinstance(origin, User) and origin.pk == user_id
+
+
+@receiver(post_save, sender=Review)
+def update_rating_aggregates_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        record_review_change(instance.business_id, new_rating=instance.rating)
+    elif hasattr(instance, '_loaded_rating'):
+        record_review_change(instance.business_id, instance._loaded_rating, instance.rating)
+    else:
+        # Saved through an instance that was never loaded from the database,
+        # so the previous rating is unknown: recount this business instead.
+        rebuild_rating_aggregates([instance.business_id])
+    instance._loaded_rating = int(instance.rating)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_aggregates_on_delete(sender, instance, origin=None, **kwargs):
+    # The business itself is going away, no point in updating it
+    if _is_business_cascade(origin):
+        return
+    if hasattr(instance, '_loaded_rating'):
+        record_review_change(instance.business_id, old_rating=instance._loaded_rating)
+    else:
+        # The rating was deferred (or never loaded), and the row is gone
+        rebuild_rating_aggregates([instance.business_id])
+
+
+@receiver(post_save, sender=Review)
+def count_review(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_counters(instance.user_id, review_count=1)
+
+
+@receiver(post_delete, sender=Review)
+def uncount_review(sender, instance, origin=None, **kwargs):
+    # The reviewer's profile is being deleted along with them
+    if not _deleting_user(origin, instance.user_id):
+        profiles.record_review_removal(instance.user_id, cascade=not _is_review_delete(origin))
+
+
+@receiver(post_save, sender=Business)
+def update_owner_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    state = (instance.owner_id, not instance.is_approved)
+    if created:
+        record_business_change(new_state=state)
+    elif hasattr(instance, '_loaded_owner_state'):
+        record_business_change(instance._loaded_owner_state, state)
+    else:
+        # Previous owner and status unknown, recount the owner instead
+        rebuild_profile_counters([instance.owner_id])
+    instance._loaded_owner_state = state
+
+
+@receiver(pre_delete, sender=Business)
+def begin_business_delete(sender, instance, origin=None, **kwargs):
+    # The instance may predate an approval made elsewhere, so the owner is
+    # recounted afterwards rather than trusting its status
+    owner_id = None if _deleting_user(origin, instance.owner_id) else instance.owner_id
+    profiles.begin_delete(owner_id)
+
+
+@receiver(pre_delete, sender=User)
+def begin_user_delete(sender, instance, **kwargs):
+    profiles.begin_delete()
+
+
+@receiver(post_delete, sender=Business)
+@receiver(post_delete, sender=User)
+def finish_counter_updates_on_delete(sender, **kwargs):
+    # Every review of the cascade is deleted (and collected) by now
+    profiles.finish_delete()
+
+
+@receiver(pre_save, sender=Business)
+def locate_business(sender, instance, raw=False, **kwargs):
+    # Fixtures carry their own coordinates and geohash
+    if not raw:
+        instance.locate()
+
+
+@receiver(post_save, sender=Business)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    # Postings and the search document are removed by cascade on delete
+    if not raw:
+        queue_reindex(instance.pk)
+
+
+@receiver(post_save, sender=Business)
+@receiver(post_delete, sender=Business)
+def refresh_autocomplete(sender, raw=False, **kwargs):
+    if not raw:
+        autocomplete.invalidate()
+
+
+@receiver(post_save, sender=Business)
+@receiver(post_delete, sender=Business)
+def invalidate_listing_cache(sender, raw=False, **kwargs):
+    if not raw:
+        queue_listing_refresh()
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_featured_cache(sender, raw=False, **kwargs):
+    # Reviews only move ratings, which decide the featured list but not the categories
+    if not raw:
+        listing_cache.invalidate_featured()
+
+
+@receiver(post_save, sender=User)
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    # Every user has a profile from the start, so reading one never writes
+    if created and not raw:
+        UserProfile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Staff toggles, password changes and logins all save the user
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_cached_profile_user(sender, instance, **kwargs):
+    invalidate_user(instance.user_id)
@@ -0,0 +1,106 @@
+"""
+Static files build: hashed names, minified CSS/JS and precompressed copies.
+
+``collectstatic`` with CompressedManifestStaticFilesStorage writes every
+file under a content-hashed name (style.3f2a9c1b.css) listed in the
+manifest, so a changed file gets a new URL and old ones can be cached
+forever. The hashed CSS and JS files are then minified, and every text
+file gets ``.gz`` and, when the brotli package is installed, ``.br``
+siblings. PrecompressedStaticMiddleware (core.middleware) serves them.
+
+The minifiers only drop what is safe to drop without a parser: comments
+and indentation; JS keeps its line breaks, so semicolon insertion is
+unaffected.
+"""
+import gzip
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # only gzip variants are built then
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.xml', '.map', '.html')
+# Smaller files don't gain enough to pay for the Content-Encoding
+MIN_COMPRESS_SIZE = 256
+
+_CSS_TOKENS = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/|\s+''', re.S)
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+# Only after a colon: "a :hover" and "a:hover" are different selectors
+_CSS_COLON = re.compile(r':\s+')
+
+
+def minify_css(text):
+    """Drop comments and collapse whitespace, leaving strings alone."""
+    def replace(match):
+        if match.group(1):
+            return match.group(1)
+        return '' if match.group(0).startswith('/*') else ' '
+    parts = []
+    # Only text outside strings is tightened around punctuation
+    for index, part in enumerate(re.split(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''', _CSS_TOKENS.sub(replace, text))):
+        parts.append(part if index % 2 else _CSS_COLON.sub(':', _CSS_PUNCTUATION.sub(r'\1', part)))
+    return ''.join(parts).replace(';}', '}').strip()
+
+
+def minify_js(text):
+    """
+    Drop indentation, blank lines and whole-line comments. Lines inside
+    template literals are kept as they are.
+    """
+    lines = []
+    in_template = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if in_template:
+            lines.append(line)
+        elif stripped and not stripped.startswith('//'):
+            lines.append(stripped)
+        # An odd number of backticks opens or closes a template literal
+        if len(re.findall(r'(?<!\\)`', line)) % 2:
+            in_template = not in_template
+    return '\n'.join(lines) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def compressed_variants(content):
+    """{suffix: compressed bytes} for the encodings that make ``content`` smaller."""
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content, quality=11)
+    return {suffix: data for suffix, data in variants.items() if len(data) < len(content) * 0.95}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage that also minifies the hashed CSS/JS files
+    and writes precompressed copies of them. The hash is that of the source
+    file, so it still changes whenever the source does.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for hashed_name in set(self.hashed_files.values()):
+            extension = '.' + hashed_name.rsplit('.', 1)[-1].lower() if '.' in hashed_name else ''
+            if extension not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            with self.open(hashed_name) as fh:
+                content = fh.read()
+            # Already minified vendor files are left as they are
+            if extension in MINIFIERS and '.min.' not in hashed_name:
+                content = MINIFIERS[extension](content.decode('utf-8')).encode('utf-8')
+                self.delete(hashed_name)
+                self._save(hashed_name, ContentFile(content))
+            if len(content) < MIN_COMPRESS_SIZE:
+                continue
+            for suffix, data in compressed_variants(content).items():
+                if self.exists(hashed_name + suffix):
+                    self.delete(hashed_name + suffix)
+                self._save(hashed_name + suffix, ContentFile(data))
@@ -0,0 +1,148 @@
+"""
+A small database-backed task queue, so no broker is needed.
+
+Functions decorated with ``@task`` can be queued with ``enqueue(name, *args)``;
+the arguments must be JSON serializable. ``manage.py run_tasks`` polls the
+core_task collection, claims due tasks with a conditional update (so several
+workers can run side by side) and retries failures with exponential backoff
+up to ``max_attempts``. A task whose worker died is picked up again once its
+lock expires.
+
+A ``key`` makes enqueueing idempotent: while a task with the same key is
+still pending, enqueueing it again returns the queued one instead of adding
+a duplicate. Ten edits of a listing before the worker gets to it therefore
+reindex it once. The pending task holds the key in a unique column, so two
+processes enqueueing at the same moment still add only one; claiming the
+task frees the key, as edits made after that need another run.
+
+Finished tasks are deleted once they are settings.TASKS_KEEP_DAYS old
+(purge_finished(), run by the worker every PURGE_INTERVAL); failed ones
+are kept for inspection.
+
+With settings.TASKS_EAGER (the default under DEBUG and in tests) tasks run
+inline instead, so a development server works without a worker.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task, free_pending_key
+
+logger = logging.getLogger(__name__)
+
+# How long a claimed task may run before another worker may take it over
+LOCK_TIMEOUT = timedelta(minutes=5)
+RETRY_DELAY = 10
+CLAIM_BATCH = 20
+# Seconds between two purges of finished tasks by a running worker
+PURGE_INTERVAL = 3600
+
+registry = {}
+
+
+def task(func=None, *, max_attempts=3):
+    """Register ``func`` as a task, by its function name."""
+    def register(func):
+        func.max_attempts = max_attempts
+        registry[func.__name__] = func
+        return func
+    return register(func) if func is not None else register
+
+
+def enqueue(name, *args, key='', delay=0):
+    """
+    Queue the task ``name`` with ``args`` and return its Task, or None when
+    it ran eagerly. ``delay`` postpones it by that many seconds.
+    """
+    func = registry[name]
+    if getattr(settings, 'TASKS_EAGER', False):
+        func(*args)
+        return None
+    fields = {
+        'name': name, 'args': json.dumps(args), 'key': key, 'max_attempts': func.max_attempts,
+        'run_at': timezone.now() + timedelta(seconds=delay),
+    }
+    if key:
+        # The insert of a concurrent caller fails on the unique pending_key,
+        # get_or_create() then returns the task it added
+        queued, _ = Task.objects.get_or_create(pending_key=key, defaults=fields)
+        return queued
+    return Task.objects.create(**fields)
+
+
+def release_stale():
+    """Hand tasks whose worker stopped responding back to the queue."""
+    return Task.objects.filter(status=Task.RUNNING, locked_until__lt=timezone.now()).update(
+        status=Task.PENDING, locked_until=None,
+    )
+
+
+def claim():
+    """Lock the next due task for this worker and return it, or None."""
+    now = timezone.now()
+    due = Task.objects.filter(status=Task.PENDING, run_at__lte=now).order_by('run_at', 'pk')
+    for pk in due.values_list('pk', flat=True)[:CLAIM_BATCH]:
+        # Only one worker's update matches while the task is still pending;
+        # it also frees the key for the next enqueue
+        claimed = Task.objects.filter(pk=pk, status=Task.PENDING).update(
+            status=Task.RUNNING, attempts=F('attempts') + 1, locked_until=now + LOCK_TIMEOUT, updated_at=now,
+            pending_key=free_pending_key(),
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def run(task):
+    """Run a claimed task and record the outcome. Returns True on success."""
+    func = registry.get(task.name)
+    try:
+        if func is None:
+            raise LookupError(f'Unknown task {task.name!r}')
+        func(*json.loads(task.args))
+    except Exception:
+        error = traceback.format_exc()
+        if func is not None and task.attempts < task.max_attempts:
+            status = Task.PENDING
+            run_at = timezone.now() + timedelta(seconds=RETRY_DELAY * 2 ** (task.attempts - 1))
+            logger.warning('Task %s (%s) failed, attempt %s of %s', task.pk, task.name, task.attempts,
+                           task.max_attempts)
+        else:
+            status = Task.FAILED
+            run_at = task.run_at
+            logger.error('Task %s (%s) failed for good:\n%s', task.pk, task.name, error)
+        Task.objects.filter(pk=task.pk).update(
+            status=status, run_at=run_at, locked_until=None, last_error=error, updated_at=timezone.now(),
+        )
+        return False
+    Task.objects.filter(pk=task.pk).update(status=Task.DONE, locked_until=None, updated_at=timezone.now())
+    return True
+
+
+def purge_finished(keep_days=None):
+    """Delete the tasks that finished more than ``keep_days`` days ago. Returns how many."""
+    if keep_days is None:
+        keep_days = getattr(settings, 'TASKS_KEEP_DAYS', 7)
+    cutoff = timezone.now() - timedelta(days=keep_days)
+    deleted, _ = Task.objects.filter(status=Task.DONE, updated_at__lt=cutoff).delete()
+    return deleted
+
+
+def run_pending(limit=None):
+    """Run due tasks until none are left (or ``limit`` ran). Returns (succeeded, failed)."""
+    release_stale()
+    succeeded = failed = 0
+    while limit is None or succeeded + failed < limit:
+        claimed = claim()
+        if claimed is None:
+            break
+        if run(claimed):
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
@@ -0,0 +1,15 @@
+"""Model factories shared by the test modules."""
+from core.models import Business, Review
+
+
+def make_business(owner, name, category='Restaurants', avg_rating=0, approved=True, **fields):
+    defaults = {
+        'address': '1 Main St', 'phone': '555-0100', 'description': 'A friendly place', 'services': 'service',
+    }
+    defaults.update(fields)
+    return Business.objects.create(
+        name=name, category=category, owner=owner, is_approved=approved, avg_rating=avg_rating, **defaults)
+
+
+def make_review(business, user, rating=4, comment='Good'):
+    return Review.objects.create(business=business, user=user, rating=rating, comment=comment)
@@ -0,0 +1,52 @@
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase
+
+from core.admin import DjongoBooleanFieldListFilter
+from core.models import Business, Review
+
+from .factories import make_business, make_review
+
+
+class AdminBooleanFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin')
+        for i in range(3):
+            User.objects.create_user(f'staff{i}', is_staff=True)
+        cls.users = [User.objects.create_user(f'user{i}') for i in range(4)]
+        approved = make_business(cls.admin, 'Corner Cafe')
+        pending = make_business(cls.admin, 'Night Cafe', approved=False)
+        for user in cls.users:
+            make_review(approved, user)
+        make_review(pending, cls.users[0])
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def changelist(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.context['cl']
+
+    def test_filters_are_swapped_for_database_ones(self):
+        request = RequestFactory().get('/')
+        request.user = self.admin
+        for model, path in ((User, 'is_staff'), (Business, 'is_approved'), (Review, 'business__is_approved')):
+            list_filter = admin.site._registry[model].get_list_filter(request)
+            self.assertIn((path, DjongoBooleanFieldListFilter), list_filter)
+
+    def test_staff_filter_stays_a_paginated_queryset(self):
+        cl = self.changelist('/admin/auth/user/', is_staff__exact='1')
+        # The admin and the three staff users
+        self.assertEqual(cl.result_count, 4)
+        self.assertTrue(hasattr(cl.queryset, 'query'))
+        self.assertIn('is_staff', str(cl.queryset.query))
+        self.assertEqual(self.changelist('/admin/auth/user/', is_staff__exact='0').result_count, 4)
+
+    def test_business_and_review_filters(self):
+        self.assertEqual(
+            [b.name for b in self.changelist('/admin/core/business/', is_approved__exact='0').result_list],
+            ['Night Cafe'])
+        self.assertEqual(self.changelist('/admin/core/review/', business__is_approved__exact='1').result_count, 4)
+        self.assertEqual(self.changelist('/admin/core/review/', business__is_approved__exact='0').result_count, 1)
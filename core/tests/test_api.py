@@ -0,0 +1,67 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from core.models import Business
+
+from .factories import make_business, make_review
+
+
+class BusinessApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        # Many ties on the rating, so pages must break them by primary key
+        for i in range(23):
+            make_business(cls.owner, f'Shop {i}', avg_rating=(5, 4, 4, 3)[i % 4])
+        cls.pending = make_business(cls.owner, 'Hidden Shop', approved=False)
+        cls.reviewed = Business.objects.approved().order_by('pk').first()
+        for i in range(7):
+            make_review(cls.reviewed, User.objects.create_user(f'reviewer{i}'), rating=i % 5 + 1)
+
+    def pages(self, url):
+        seen = []
+        while url:
+            data = self.client.get(url).json()
+            seen.extend(data['results'])
+            url = data['next_cursor'] and f"{url.split('&cursor=')[0]}&cursor={data['next_cursor']}"
+        return seen
+
+    def test_list_pages_by_rating(self):
+        ids = [row['id'] for row in self.pages('/api/v1/businesses/?limit=10&fields=id')]
+        self.assertEqual(
+            ids, list(Business.objects.approved().order_by('-avg_rating', '-pk').values_list('pk', flat=True)))
+
+    def test_list_filters_and_fields(self):
+        rows = self.pages('/api/v1/businesses/?min_rating=4.5&fields=name,avg_rating')
+        self.assertEqual({row['avg_rating'] for row in rows}, {5})
+        self.assertEqual(set(rows[0]), {'name', 'avg_rating'})
+        response = self.client.get('/api/v1/businesses/?fields=name,password')
+        self.assertEqual((response.status_code, response.json()), (400, {'error': 'Unknown fields: password'}))
+
+    def test_bad_cursors_and_limits(self):
+        response = self.client.get('/api/v1/businesses/?cursor=bogus')
+        self.assertEqual((response.status_code, response.json()), (400, {'error': 'Invalid cursor'}))
+        self.assertEqual(self.client.get('/api/v1/businesses/search/?q=shop&cursor=bogus').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/businesses/?limit=ten').status_code, 400)
+
+    def test_detail_hides_pending_businesses(self):
+        data = self.client.get(f'/api/v1/businesses/{self.reviewed.pk}/?fields=name,rating_counts').json()
+        self.assertEqual(data, {'name': self.reviewed.name, 'rating_counts': {'1': 2, '2': 2, '3': 1, '4': 1, '5': 1}})
+        self.assertEqual(self.client.get(f'/api/v1/businesses/{self.pending.pk}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/v1/businesses/{self.pending.pk}/reviews/').status_code, 404)
+
+    def test_reviews_page_newest_first(self):
+        rows = self.pages(f'/api/v1/businesses/{self.reviewed.pk}/reviews/?limit=3&fields=user,rating')
+        self.assertEqual([row['user'] for row in rows], [f'reviewer{i}' for i in reversed(range(7))])
+
+    def test_etag_revalidation(self):
+        response = self.client.get('/api/v1/businesses/')
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/api/v1/businesses/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Another query string is another resource
+        self.assertEqual(self.client.get('/api/v1/businesses/?limit=5', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        make_business(self.owner, 'New Shop')
+        self.assertEqual(self.client.get('/api/v1/businesses/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_read_only(self):
+        self.assertEqual(self.client.post('/api/v1/businesses/').status_code, 405)
@@ -0,0 +1,54 @@
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.http import Http404
+from django.test import RequestFactory, TransactionTestCase
+
+from core import async_views, views
+
+from .factories import make_business, make_review
+
+
+class AsyncViewTests(TransactionTestCase):
+    # The async views query from pool threads, which only see committed rows
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner')
+        self.businesses = [make_business(self.owner, f'Shop {i}', avg_rating=i % 5) for i in range(12)]
+        for i in range(views.REVIEWS_PER_PAGE + 2):
+            make_review(self.businesses[0], User.objects.create_user(f'reviewer{i}'), rating=i % 5 + 1)
+
+    def request(self, path, **params):
+        request = RequestFactory().get(path, params)
+        request.user = AnonymousUser()
+        return request
+
+    def sync(self, view, path, *args, **params):
+        cache.clear()
+        return view(self.request(path, **params), *args)
+
+    async def test_pages_match_the_sync_views(self):
+        detail = f'/business/{self.businesses[0].pk}/'
+        for name, path, args, params in [
+            ('home', '/', (), {}),
+            ('category', '/category/Restaurants/', ('Restaurants',), {'page': '2'}),
+            ('category', '/category/Restaurants/', ('Restaurants',), {'page': '99'}),
+            ('search', '/search/', (), {'q': 'shop', 'rating': '2'}),
+            ('business_detail', detail, (self.businesses[0].pk,), {'reviews_page': '2'}),
+        ]:
+            with self.subTest(name=name, params=params):
+                expected = await async_views.query(self.sync, getattr(views, name), path, *args, **params)
+                cache.clear()
+                response = await getattr(async_views, name)(self.request(path, **params), *args)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, expected.content)
+
+    async def test_missing_business(self):
+        with self.assertRaises(Http404):
+            await async_views.business_detail(self.request('/business/0/'), 0)
+
+    async def test_conditional_get(self):
+        response = await async_views.home(self.request('/'))
+        request = self.request('/')
+        request.META['HTTP_IF_NONE_MATCH'] = response['ETag']
+        self.assertEqual((await async_views.home(request)).status_code, 304)
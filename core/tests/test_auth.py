@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.auth import CACHED_BACKEND, CachedModelBackend
+from core.models import UserProfile
+
+
+class CachedBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='secret')
+
+    def setUp(self):
+        cache.clear()
+        self.backend = CachedModelBackend()
+
+    def test_only_backend(self):
+        # A second backend would check the password again on every failed login
+        self.assertEqual(settings.AUTHENTICATION_BACKENDS, [CACHED_BACKEND])
+
+    def test_user_is_cached(self):
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+
+    def test_saves_drop_the_cached_user(self):
+        self.backend.get_user(self.user.pk)
+        self.user.is_staff = True
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.assertTrue(self.backend.get_user(self.user.pk).is_staff)
+        UserProfile.objects.get(user=self.user).save()
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.user.pk)
+
+    def test_sessions_of_the_replaced_backend_stay_signed_in(self):
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.client.get('/profile/').status_code, 200)
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], CACHED_BACKEND)
+
+    def test_failed_login(self):
+        response = self.client.post('/accounts/login/', {'username': 'owner', 'password': 'wrong'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
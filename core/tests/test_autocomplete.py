@@ -0,0 +1,48 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from core import autocomplete
+from core.models import Business
+
+from .factories import make_business
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.pizzeria = make_business(cls.owner, 'Golden Pizzeria', avg_rating=4.5, review_count=20)
+        make_business(cls.owner, 'Pizza Corner', avg_rating=3, review_count=2)
+        make_business(cls.owner, 'Pizza Pending', approved=False)
+        make_business(cls.owner, 'Pilates Studio', category='Pilates')
+
+    def setUp(self):
+        cache.clear()
+        autocomplete.invalidate()
+
+    def suggest(self, q, **params):
+        response = self.client.get('/search/autocomplete/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(row['type'], row['label']) for row in response.json()['results']]
+
+    def test_matches_every_word_best_rated_first(self):
+        self.assertEqual(self.suggest('pizz'), [('business', 'Golden Pizzeria'), ('business', 'Pizza Corner')])
+        self.assertEqual(self.suggest('  GOLDEN   pi'), [('business', 'Golden Pizzeria')])
+        self.assertEqual(self.suggest(''), [])
+
+    def test_categories_come_first(self):
+        results = self.client.get('/search/autocomplete/', {'q': 'pi'}).json()['results']
+        self.assertEqual(results[0], {'type': 'category', 'label': 'Pilates', 'url': '/category/Pilates/'})
+        self.assertEqual(len(self.suggest('pi', limit='1')), 1)
+        # An invalid limit falls back to the default
+        self.assertEqual(len(self.suggest('pi', limit='ten')), 4)
+
+    def test_writes_refresh_the_index(self):
+        self.assertEqual(self.suggest('pizza p'), [])
+        pending = Business.objects.get(name='Pizza Pending')
+        pending.is_approved = True
+        pending.save()
+        self.assertEqual(self.suggest('pizza p'), [('business', 'Pizza Pending')])
+        self.pizzeria.delete()
+        self.assertEqual(self.suggest('golden'), [])
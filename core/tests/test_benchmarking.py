@@ -0,0 +1,67 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TestCase
+
+from core.benchmarking import review_counts, summarize
+from core.management.commands.benchmark_views import compare, heaviest_user, measure, scenarios
+from core.models import Business, Review, SearchDocument, UserProfile
+from core.profiles import rebuild_profile_counters
+from core.ratings import rebuild_rating_aggregates
+
+
+class BenchmarkHelperTests(SimpleTestCase):
+    def test_review_counts_are_skewed_and_reproducible(self):
+        counts = review_counts(1000, 8, skew=1.2, seed=3)
+        self.assertEqual(counts, review_counts(1000, 8, skew=1.2, seed=3))
+        self.assertAlmostEqual(sum(counts) / len(counts), 8, delta=1)
+        # A few businesses get most of the reviews
+        top = sorted(counts, reverse=True)[:100]
+        self.assertGreater(sum(top), sum(counts) / 2)
+
+    def test_summarize(self):
+        stats = summarize([0.001 * i for i in range(1, 101)])
+        self.assertEqual((stats['count'], stats['mean_ms']), (100, 50.5))
+        self.assertAlmostEqual(stats['p50_ms'], 50.5, delta=0.5)
+        self.assertAlmostEqual(stats['p95_ms'], 95, delta=1)
+
+    def test_compare_reports_regressions(self):
+        def row(p95, queries):
+            return {'businesses': 100, 'scenario': 'home', 'latency': {'p95_ms': p95}, 'queries': queries}
+        baseline = {'results': [row(10, 3)]}
+        self.assertEqual(compare([row(12, 3)], baseline, 1.25), [])
+        self.assertEqual(compare([row(13, 4)], baseline, 1.25),
+                         ['home @ 100: p95 13 ms vs 10 ms', 'home @ 100: 4 queries vs 3'])
+
+
+class SeedDataTests(TestCase):
+    def seed(self, businesses):
+        out = StringIO()
+        call_command('seed_data', users=8, businesses=businesses, reviews_per_business=4, seed=1, stdout=out)
+        return out.getvalue()
+
+    def test_seeded_data_is_consistent(self):
+        self.assertIn('Created 30 businesses', self.seed(30))
+        self.assertEqual(Business.objects.count(), 30)
+        self.assertTrue(Review.objects.exists())
+        # Bulk inserts send no signals, the derived data is rebuilt afterwards
+        stored = list(Business.objects.order_by('pk').values_list('review_count', 'avg_rating'))
+        rebuild_rating_aggregates()
+        self.assertEqual(stored, list(Business.objects.order_by('pk').values_list('review_count', 'avg_rating')))
+        counters = list(UserProfile.objects.order_by('pk').values_list('business_count', 'review_count'))
+        rebuild_profile_counters()
+        self.assertEqual(counters, list(UserProfile.objects.order_by('pk').values_list('business_count', 'review_count')))
+        self.assertEqual(SearchDocument.objects.count(), Business.objects.approved().count())
+        # Seeding again grows the same dataset
+        self.seed(10)
+        self.assertEqual(Business.objects.count(), 40)
+
+    def test_every_scenario_is_measured(self):
+        self.seed(30)
+        anonymous, staff = Client(), Client()
+        staff.force_login(heaviest_user())
+        for name, as_staff, url in scenarios():
+            with self.subTest(name):
+                result = measure(staff if as_staff else anonymous, url, 2)
+                self.assertEqual(result['latency']['count'], 2)
+                self.assertEqual(set(result), {'latency', 'queries', 'peak_memory_kb'})
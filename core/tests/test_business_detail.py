@@ -0,0 +1,56 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.views import REVIEWS_PER_PAGE
+
+from .factories import make_business, make_review
+
+
+class BusinessDetailTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.business = make_business(cls.owner, 'Corner Cafe')
+        cls.reviewers = [User.objects.create_user(f'reviewer{i:02}') for i in range(REVIEWS_PER_PAGE + 3)]
+        for i, reviewer in enumerate(cls.reviewers):
+            make_review(cls.business, reviewer, rating=(5, 5, 4, 1)[i % 4])
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, **params):
+        response = self.client.get(reverse('business_detail', args=[self.business.pk]), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_histogram_comes_from_the_stored_counters(self):
+        context = self.get().context
+        self.assertEqual(context['total_reviews'], 13)
+        histogram = {row['rating']: (row['count'], round(row['percentage'])) for row in context['rating_data_list']}
+        self.assertEqual(histogram, {5: (7, 54), 4: (3, 23), 3: (0, 0), 2: (0, 0), 1: (3, 23)})
+        self.assertEqual(context['business'].avg_rating, 50 / 13)
+        self.assertEqual(len(context['star_range']), 4)
+
+    def test_reviews_are_paged_newest_first_with_their_authors(self):
+        newest_first = [reviewer.username for reviewer in reversed(self.reviewers)]
+        with CaptureQueriesContext(connection) as queries:
+            first = self.get().context['reviews']
+        self.assertEqual([review.user.username for review in first], newest_first[:REVIEWS_PER_PAGE])
+        # Authors come with the reviews, and nothing counts or groups the reviews
+        review_queries = [q['sql'] for q in queries.captured_queries if 'FROM "core_review"' in q['sql']]
+        self.assertEqual(len(review_queries), 1)
+        self.assertIn('INNER JOIN "auth_user"', review_queries[0])
+        last = self.get(reviews_page=2).context['reviews']
+        self.assertEqual([review.user.username for review in last], newest_first[REVIEWS_PER_PAGE:])
+        self.assertEqual(last.paginator.num_pages, 2)
+
+    def test_empty_business(self):
+        empty = make_business(self.owner, 'Night Cafe')
+        context = self.client.get(reverse('business_detail', args=[empty.pk])).context
+        self.assertEqual(context['total_reviews'], 0)
+        self.assertEqual({row['percentage'] for row in context['rating_data_list']}, {0})
+        self.assertEqual(list(context['reviews']), [])
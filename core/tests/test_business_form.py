@@ -0,0 +1,58 @@
+from django.contrib.auth.models import User
+from django.forms.models import model_to_dict
+from django.test import TestCase
+from django.urls import reverse
+
+from core.forms import BusinessForm
+from core.models import Business
+
+from .factories import make_business
+
+SPRINGFIELD_IL = (39.7817, -89.6501)
+RIVERSIDE_CA = (33.9533, -117.3962)
+
+
+class BusinessLocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.business = make_business(cls.owner, 'Corner Cafe', address='1 Main St, Springfield, IL')
+
+    def setUp(self):
+        self.client.force_login(self.owner)
+
+    def edit(self, **changes):
+        # What the edit form posts: every field as shown, plus the changes
+        data = {
+            field: '' if value is None else value
+            for field, value in model_to_dict(Business.objects.get(pk=self.business.pk), BusinessForm.Meta.fields).items()
+        }
+        data.update(changes)
+        return self.client.post(reverse('edit_business', args=[self.business.pk]), data)
+
+    def location(self):
+        business = Business.objects.get(pk=self.business.pk)
+        return business.latitude, business.longitude
+
+    def test_edit_page_shows_the_stored_coordinates(self):
+        response = self.client.get(reverse('edit_business', args=[self.business.pk]))
+        self.assertContains(response, 'value="39.7817"')
+
+    def test_new_address_is_geocoded_again(self):
+        self.assertEqual(self.location(), SPRINGFIELD_IL)
+        response = self.edit(address='5 Market St, Riverside, CA')
+        self.assertRedirects(response, reverse('business_detail', args=[self.business.pk]), fetch_redirect_response=False)
+        self.assertEqual(self.location(), RIVERSIDE_CA)
+
+    def test_edited_coordinates_are_kept(self):
+        self.edit(address='5 Market St, Riverside, CA', latitude='40.5', longitude='-90.5')
+        self.assertEqual(self.location(), (40.5, -90.5))
+        self.edit(name='Corner Coffee')
+        self.assertEqual(self.location(), (40.5, -90.5))
+
+    def test_one_coordinate_is_a_field_error(self):
+        response = self.edit(latitude='40.5', longitude='')
+        form = response.context['form']
+        self.assertEqual(form.errors['longitude'], ['Enter both latitude and longitude, or neither.'])
+        self.assertContains(response, 'Enter both latitude and longitude, or neither.')
+        self.assertEqual(self.location(), SPRINGFIELD_IL)
@@ -0,0 +1,52 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TransactionTestCase
+from django.urls import reverse
+
+from core import cache as listing_cache
+from core.models import Business
+
+from .factories import make_business
+
+
+class CatalogVersionTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def later(self, seconds):
+        # Move the local memory cache's clock forward
+        return mock.patch('django.core.cache.backends.locmem.time.time', return_value=time.time() + seconds)
+
+    def test_bumps_change_the_version(self):
+        version = listing_cache.catalog_version()
+        self.assertEqual(listing_cache.catalog_version(), version)
+        listing_cache.invalidate_listings()
+        self.assertNotEqual(listing_cache.catalog_version(), version)
+
+    def test_version_expires_with_the_listings(self):
+        # Another process's copy is never bumped by this one's writes, but
+        # stops being served once the listing data it stands for expires
+        version = listing_cache.catalog_version()
+        listing_cache.bump_catalog_version()
+        bumped = listing_cache.catalog_version()
+        with self.later(listing_cache.LISTING_TIMEOUT - 1):
+            self.assertEqual(listing_cache.catalog_version(), bumped)
+        with self.later(listing_cache.LISTING_TIMEOUT + 1):
+            self.assertNotIn(listing_cache.catalog_version(), (version, bumped))
+
+
+class ListingRefreshTests(TransactionTestCase):
+    # Real commits, the refresh is queued when the delete's transaction commits
+
+    def test_bulk_delete_warms_the_listings_once(self):
+        owner = User.objects.create_user('owner')
+        staff = User.objects.create_user('staff', is_staff=True)
+        ids = [make_business(owner, f'Shop {i}').pk for i in range(5)]
+        self.client.force_login(staff)
+        with mock.patch('core.cache.featured_businesses') as warm:
+            self.client.post(reverse('admin_bulk_action'), {'action': 'delete_businesses', 'ids': ids})
+        self.assertFalse(Business.objects.exists())
+        self.assertEqual(warm.call_count, 1)
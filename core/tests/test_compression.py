@@ -0,0 +1,59 @@
+import gzip
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from core.compression import accepted_encodings, minify_html
+
+from .factories import make_business
+
+
+class MinifyTests(SimpleTestCase):
+    def test_whitespace_runs_with_line_breaks_collapse(self):
+        html = '<div>\n    <p>Hello   world</p>\n\n    <span title="a\n    b">x</span>\n</div>\n'
+        self.assertEqual(minify_html(html), '<div>\n<p>Hello   world</p>\n<span title="a\n    b">x</span>\n</div>\n')
+
+    def test_raw_elements_are_untouched(self):
+        html = '<pre>\n  code\n    indented\n</pre>\n  <textarea>\n  text\n</textarea>\n  <script>\n  if (a < b) {}\n</script>'
+        self.assertEqual(minify_html(html), html.replace('</pre>\n  <textarea>', '</pre>\n<textarea>')
+                         .replace('</textarea>\n  <script>', '</textarea>\n<script>'))
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings('gzip, deflate;q=0.5, br;q=0'), {'gzip', 'deflate'})
+        self.assertEqual(accepted_encodings(''), set())
+
+
+class CompressionMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', is_staff=True)
+        for i in range(30):
+            make_business(cls.staff, f'Shop {i}')
+
+    def test_pages_are_gzipped_with_a_weak_etag(self):
+        plain = self.client.get('/about/')
+        response = self.client.get('/about/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        # The gzipped body is only equivalent to the plain one
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+        revalidated = self.client.get('/about/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_small_and_refused_responses_are_sent_as_is(self):
+        response = self.client.get('/search/autocomplete/', {'q': 'zzz'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = self.client.get('/about/', HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        # Still minified
+        self.assertNotIn(b'\n    <', response.content)
+
+    def test_streamed_exports_are_compressed_chunk_by_chunk(self):
+        self.client.force_login(self.staff)
+        plain = b''.join(self.client.get('/dashboard/export/businesses/').streaming_content)
+        response = self.client.get('/dashboard/export/businesses/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), plain)
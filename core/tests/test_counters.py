@@ -0,0 +1,72 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Review, UserProfile
+from core.profiles import rebuild_profile_counters
+
+from .factories import make_business
+
+
+def counters(user):
+    profile = UserProfile.objects.get(user=user)
+    return profile.business_count, profile.review_count, profile.pending_count
+
+
+class ProfileCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.reviewers = [User.objects.create_user(f'reviewer{i}') for i in range(5)]
+        cls.business = make_business(cls.owner, 'Corner Cafe')
+        cls.other = make_business(cls.owner, 'Night Cafe', approved=False)
+        for reviewer in cls.reviewers:
+            Review.objects.create(business=cls.business, user=reviewer, rating=4, comment='Good')
+            Review.objects.create(business=cls.other, user=reviewer, rating=2, comment='Meh')
+
+    def assertCountersRebuilt(self, *users):
+        # What the signals maintained matches a recount from the source rows
+        before = {user.pk: counters(user) for user in users}
+        rebuild_profile_counters([user.pk for user in users])
+        self.assertEqual(before, {user.pk: counters(user) for user in users})
+
+    def test_writes_keep_the_counters(self):
+        self.assertEqual(counters(self.owner), (2, 0, 1))
+        self.assertEqual(counters(self.reviewers[0]), (0, 2, 0))
+        self.other.is_approved = True
+        self.other.save()
+        self.assertEqual(counters(self.owner), (2, 0, 0))
+        Review.objects.filter(user=self.reviewers[0], business=self.business).get().delete()
+        self.assertEqual(counters(self.reviewers[0]), (0, 1, 0))
+        self.assertCountersRebuilt(self.owner, *self.reviewers)
+
+    def test_business_delete_updates_reviewers_at_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.business.delete()
+        updates = [q for q in queries.captured_queries if 'UPDATE "core_userprofile"' in q['sql']]
+        # One UPDATE for all the reviewers, the owner is recounted with a bulk update
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(counters(self.owner), (1, 0, 1))
+        self.assertEqual([counters(reviewer) for reviewer in self.reviewers], [(0, 1, 0)] * 5)
+        self.assertCountersRebuilt(self.owner, *self.reviewers)
+
+    def test_user_delete_updates_the_other_reviewers(self):
+        self.owner.delete()
+        self.assertEqual([counters(reviewer) for reviewer in self.reviewers], [(0, 0, 0)] * 5)
+
+    def test_bulk_review_delete_is_grouped(self):
+        staff = User.objects.create_user('staff', is_staff=True)
+        self.client.force_login(staff)
+        # Two reviews of the first reviewer, one of every other
+        ids = list(Review.objects.filter(user=self.reviewers[0]).values_list('pk', flat=True))
+        ids += list(Review.objects.filter(user__in=self.reviewers[1:], business=self.business).values_list('pk', flat=True))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('admin_bulk_action'), {'action': 'delete_reviews', 'ids': ids})
+        updates = [q for q in queries.captured_queries if 'UPDATE "core_userprofile"' in q['sql']]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(counters(self.reviewers[0]), (0, 0, 0))
+        self.assertEqual([counters(reviewer) for reviewer in self.reviewers[1:]], [(0, 1, 0)] * 4)
+        self.assertCountersRebuilt(*self.reviewers)
+
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+from unittest import skipIf
+
+from django.test import SimpleTestCase
+
+from core import db_pool
+
+
+@skipIf(db_pool.monitoring is None, 'pymongo is not installed')
+class PoolListenerTests(SimpleTestCase):
+    def setUp(self):
+        db_pool.stats.reset()
+        self.addCleanup(db_pool.stats.reset)
+        self.listener = db_pool.PoolListener()
+        self.listener.pool_created(SimpleNamespace(options={'maxPoolSize': 2}))
+
+    def check_out(self):
+        self.listener.connection_check_out_started(SimpleNamespace())
+        self.listener.connection_checked_out(SimpleNamespace())
+
+    def test_checkouts_and_checkins_are_counted(self):
+        self.check_out()
+        self.check_out()
+        self.listener.connection_checked_in(SimpleNamespace())
+        snapshot = db_pool.stats.snapshot()
+        self.assertEqual(snapshot['checkouts'], 2)
+        self.assertEqual(snapshot['checked_out'], 1)
+        self.assertEqual(snapshot['max_checked_out'], 2)
+        self.assertEqual(snapshot['waits'], 0)
+        self.assertGreaterEqual(snapshot['checkout_ms']['max'], 0)
+
+    def test_checkout_with_every_connection_in_use_is_a_wait(self):
+        self.check_out()
+        self.check_out()
+        self.check_out()
+        self.assertEqual(db_pool.stats.snapshot()['waits'], 1)
+
+    def test_connections_and_failures(self):
+        self.listener.connection_created(SimpleNamespace())
+        self.listener.connection_created(SimpleNamespace())
+        self.listener.connection_closed(SimpleNamespace())
+        self.listener.connection_check_out_started(SimpleNamespace())
+        self.listener.connection_check_out_failed(SimpleNamespace())
+        snapshot = db_pool.stats.snapshot()
+        self.assertEqual(snapshot['connections_open'], 1)
+        self.assertEqual(snapshot['connections_created'], 2)
+        self.assertEqual(snapshot['checkout_failures'], 1)
+        self.assertEqual(snapshot['max_pool_size'], 2)
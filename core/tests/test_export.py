@@ -0,0 +1,48 @@
+import csv
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from .factories import make_business, make_review
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', is_staff=True)
+        cls.owner = User.objects.create_user('owner')
+        cls.business = make_business(cls.owner, '=HYPERLINK("http://evil.example")', latitude=39.78, longitude=-89.65)
+        make_business(cls.owner, 'Corner Cafe', category='Retail', approved=False)
+        make_review(cls.business, cls.staff, comment='@SUM(1+1)')
+
+    def export(self, url):
+        self.client.force_login(self.staff)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_is_streamed_with_formulas_quoted(self):
+        rows = list(csv.DictReader(io.StringIO(self.export('/dashboard/export/businesses/'))))
+        self.assertEqual([row['name'] for row in rows], ['\'=HYPERLINK("http://evil.example")', 'Corner Cafe'])
+        # Numbers are not text, a negative one stays a number
+        self.assertEqual(rows[0]['longitude'], '-89.65')
+        reviews = list(csv.DictReader(io.StringIO(self.export('/dashboard/export/reviews/'))))
+        self.assertEqual(reviews[0]['comment'], "'@SUM(1+1)")
+
+    def test_filters_and_jsonl(self):
+        body = self.export('/dashboard/export/businesses/?format=jsonl&status=pending')
+        self.assertEqual([json.loads(line)['name'] for line in body.splitlines()], ['Corner Cafe'])
+        self.assertEqual(self.export('/dashboard/export/businesses/?category=Fitness'), ','.join(
+            ['id', 'name', 'category', 'address', 'phone', 'website', 'description', 'services', 'owner',
+             'is_approved', 'avg_rating', 'review_count', 'latitude', 'longitude', 'created_at', 'updated_at']) + '\r\n')
+        self.assertEqual(self.client.get('/dashboard/export/users/?status=pending').status_code, 400)
+        self.assertEqual(self.client.get('/dashboard/export/businesses/?since=yesterday').status_code, 400)
+
+    def test_staff_only(self):
+        self.assertEqual(self.client.get('/dashboard/export/users/').status_code, 302)
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get('/dashboard/export/users/').status_code, 403)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get('/dashboard/export/secrets/').status_code, 404)
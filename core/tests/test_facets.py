@@ -0,0 +1,43 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from core import search
+from core.models import Business
+from .factories import make_business
+
+
+class FacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner')
+        ratings = [4.5, 3.2, 2.0, 0]
+        for i in range(30):
+            make_business(owner, f'Friendly Spot {i}', category=['Restaurants', 'Fitness', 'Retail'][i % 3],
+                          avg_rating=ratings[i % 4], description='friendly ' * (i % 7 + 1))
+        make_business(owner, 'Unrelated', category='Retail', avg_rating=5, description='Plain shop')
+
+    def assert_counts_match_results(self, query, category='', rating=''):
+        ranked, facets = search.faceted_search(query, category, rating)
+        self.assertEqual(ranked, search.search(query, category, rating))
+        for option, count in facets['categories']:
+            self.assertEqual(count, len(search.search(query, option, rating)), option)
+        for bucket, count in facets['ratings']:
+            self.assertEqual(count, len(search.search(query, category, bucket)), bucket)
+
+    def test_counts_are_the_results_of_each_option(self):
+        self.assert_counts_match_results('friendly')
+        self.assert_counts_match_results('friendly', 'Fitness')
+        self.assert_counts_match_results('friendly', '', '3')
+        self.assert_counts_match_results('friendly', 'Retail', '4')
+
+    def test_counts_cover_every_match(self):
+        ranked, facets = search.faceted_search('friendly')
+        self.assertEqual(len(ranked), 30)
+        self.assertEqual(sum(count for _, count in facets['categories']), 30)
+
+    def test_browse_counts_match_the_search_page(self):
+        response = self.client.get('/search/', {'category': 'Retail', 'rating': '4'})
+        facets = dict(response.context['facets']['categories'])
+        expected = Business.objects.approved().in_category('Retail').min_rating('4').count()
+        self.assertEqual(response.context['businesses'].paginator.count, expected)
+        self.assertEqual(facets['Retail'], expected)
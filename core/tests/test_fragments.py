@@ -0,0 +1,64 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core import fragments
+from core.models import Business, Review
+
+from .factories import make_business, make_review
+
+CARD = 'includes/business_card.html'
+REVIEW = 'includes/review.html'
+
+
+def counts(template_name):
+    counters = fragments.stats.snapshot()[template_name]
+    return counters['hits'], counters['misses']
+
+
+class FragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.businesses = [make_business(cls.owner, f'Shop {i}') for i in range(3)]
+        cls.review = make_review(cls.businesses[0], User.objects.create_user('reviewer'), comment='Lovely')
+
+    def setUp(self):
+        cache.clear()
+        fragments.stats.reset()
+
+    def render(self, objects, **kwargs):
+        fragments.render_fragments(CARD, objects, 'business', variant='category', **kwargs)
+        return [obj.fragment for obj in objects]
+
+    def test_second_render_comes_from_the_cache_without_queries(self):
+        first = self.render(list(Business.objects.order_by('pk')))
+        businesses = list(Business.objects.order_by('pk'))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.render(businesses), first)
+        self.assertEqual(counts(CARD), (3, 3))
+
+    def test_updates_render_again(self):
+        self.render(list(Business.objects.order_by('pk')))
+        business = Business.objects.get(pk=self.businesses[0].pk)
+        business.name = 'Renamed Shop'
+        business.save()
+        html = self.render(list(Business.objects.order_by('pk')))
+        self.assertIn('Renamed Shop', html[0])
+        self.assertEqual(counts(CARD), (2, 4))
+
+    def test_review_blocks_follow_the_business_name(self):
+        url = reverse('business_detail', args=[self.businesses[0].pk])
+        Review.objects.filter(pk=self.review.pk).update(reply='Thanks!')
+        self.assertContains(self.client.get(url), 'Response from Shop 0')
+        business = Business.objects.get(pk=self.businesses[0].pk)
+        business.name = 'Corner Shop'
+        business.save()
+        self.assertContains(self.client.get(url), 'Response from Corner Shop')
+        self.assertEqual(counts(REVIEW), (0, 2))
+
+    def test_pages_reuse_the_cards(self):
+        self.client.get(reverse('category', args=['Restaurants']))
+        self.client.get(reverse('category', args=['Restaurants']))
+        self.assertEqual(counts(CARD), (3, 3))
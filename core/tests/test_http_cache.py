@@ -0,0 +1,44 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from .factories import make_business
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='secret')
+        cls.business = make_business(cls.owner, 'Corner Cafe')
+
+    def test_anonymous_pages_revalidate(self):
+        url = reverse('business_detail', args=[self.business.pk])
+        response = self.client.get(url)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+        self.business.name = 'Corner Coffee'
+        self.business.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_signed_in_pages_are_private_to_the_session(self):
+        url = reverse('business_detail', args=[self.business.pk])
+        anonymous = self.client.get(url)['ETag']
+        self.client.post(reverse('login'), {'username': 'owner', 'password': 'secret'})
+        response = self.client.get(url)
+        self.assertNotEqual(response['ETag'], anonymous)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        # Signing in again rotates the CSRF secret, the forms need the new token
+        self.client.post(reverse('logout'))
+        self.client.post(reverse('login'), {'username': 'owner', 'password': 'secret'})
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_pages_with_messages_are_not_revalidated(self):
+        self.client.force_login(self.owner)
+        # Deleting redirects home with a message to show once
+        response = self.client.post(reverse('delete_business', args=[self.business.pk]), follow=True)
+        self.assertContains(response, 'deleted successfully')
+        self.assertNotIn('ETag', response)
+        self.assertIn('no-store', response['Cache-Control'])
@@ -0,0 +1,91 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import search
+from core.models import Business, UserProfile
+
+from .factories import make_business
+
+BUSINESS_CSV = '''name,category,address,phone,description,services,owner
+Harbor Bakery,Restaurants,1 Harbor Rd,555-0101,Fresh bread daily,bread,owner
+,Retail,2 Harbor Rd,555-0102,No name,things,owner
+Harbor Books,Retail,3 Harbor Rd,555-0103,Used books,books,stranger
+Harbor Gym,Fitness,4 Harbor Rd,555-0104,Open late,classes,
+'''
+
+
+class ImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.reviewers = [User.objects.create_user(f'reviewer{i}') for i in range(3)]
+        cls.business = make_business(cls.owner, 'Corner Cafe')
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def run_import(self, kind, name, content, *args):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as fh:
+            fh.write(content)
+        out = StringIO()
+        call_command('import_data', kind, path, *args, stdout=out)
+        rejects_path = os.path.splitext(path)[0] + '.rejects.jsonl'
+        rejects = []
+        if os.path.exists(rejects_path):
+            with open(rejects_path) as fh:
+                rejects = [json.loads(line) for line in fh]
+        return out.getvalue(), rejects
+
+    def test_businesses_are_imported_and_indexed(self):
+        output, rejects = self.run_import('businesses', 'cities.csv', BUSINESS_CSV, '--approve', '--owner', 'owner')
+        self.assertIn('Imported 2 of 4 businesses', output)
+        self.assertEqual([(row['line'], list(row['errors'])) for row in rejects], [(3, ['name']), (4, ['owner'])])
+        self.assertEqual(rejects[1]['errors']['owner'], ['Unknown user "stranger".'])
+        self.assertEqual(rejects[1]['row']['name'], 'Harbor Books')
+        # Bulk inserts send no signals: the counters, search index and location are updated afterwards
+        gym = Business.objects.get(name='Harbor Gym')
+        self.assertEqual(gym.owner, self.owner)
+        self.assertTrue(gym.is_approved)
+        self.assertEqual(UserProfile.objects.get(user=self.owner).business_count, 3)
+        self.assertEqual(set(search.search('harbor')), set(Business.objects.filter(name__startswith='Harbor').values_list('pk', flat=True)))
+
+    def test_reviews_update_the_aggregates(self):
+        rows = [
+            {'business': self.business.pk, 'user': 'reviewer0', 'rating': 5, 'comment': 'Great'},
+            {'business': self.business.pk, 'user': 'reviewer1', 'rating': 2, 'comment': 'Slow'},
+            {'business': self.business.pk, 'user': 'reviewer0', 'rating': 1, 'comment': 'Again'},
+            {'business': self.business.pk, 'user': 'reviewer2', 'rating': 9, 'comment': 'Too good'},
+            {'business': 0, 'user': 'nobody', 'rating': 3, 'comment': 'Lost'},
+        ]
+        content = '\n'.join(json.dumps(row) for row in rows[:2]) + '\nnot json\n' + \
+            '\n'.join(json.dumps(row) for row in rows[2:]) + '\n'
+        output, rejects = self.run_import('reviews', 'reviews.jsonl', content, '--batch-size', '2')
+        self.assertIn('Imported 2 of 6 reviews', output)
+        self.assertEqual([row['line'] for row in rejects], [3, 4, 5, 6])
+        self.assertIn('Invalid JSON', rejects[0]['errors']['__all__'][0])
+        self.assertEqual(rejects[1]['errors'], {'__all__': ['This user has already reviewed this business.']})
+        self.assertEqual(list(rejects[2]['errors']), ['rating'])
+        self.assertEqual(set(rejects[3]['errors']), {'business', 'user'})
+        business = Business.objects.get(pk=self.business.pk)
+        self.assertEqual((business.review_count, business.avg_rating, business.rating_5_count), (2, 3.5, 1))
+        self.assertEqual(UserProfile.objects.get(user=self.reviewers[0]).review_count, 1)
+
+    def test_dry_run_saves_nothing(self):
+        output, rejects = self.run_import('businesses', 'cities.csv', BUSINESS_CSV, '--dry-run', '--owner', 'owner')
+        self.assertIn('Validated 2 of 4 businesses', output)
+        self.assertEqual(len(rejects), 2)
+        self.assertEqual(Business.objects.count(), 1)
+
+    def test_no_rejects_file_without_rejects(self):
+        self.run_import('businesses', 'one.csv', BUSINESS_CSV.splitlines()[0] + '\n' + BUSINESS_CSV.splitlines()[1] + '\n')
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'one.rejects.jsonl')))
+        self.assertFalse(Business.objects.get(name='Harbor Bakery').is_approved)
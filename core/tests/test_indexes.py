@@ -0,0 +1,23 @@
+import json
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from .factories import make_business
+
+
+class IndexAuditTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        make_business(cls.owner, 'Corner Cafe')
+
+    def test_every_access_pattern_is_indexed(self):
+        out = StringIO()
+        call_command('audit_indexes', json=True, stdout=out)
+        report = {row['query']: row['problems'] for row in json.loads(out.getvalue())}
+        self.assertIn('dashboard all', report)
+        self.assertIn('dashboard users', report)
+        self.assertEqual({query: problems for query, problems in report.items() if problems}, {})
@@ -0,0 +1,61 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Business
+from core.views import LISTING_PAGE_SIZE
+
+from .factories import make_business
+
+
+class ListingQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner')
+        for i in range(20):
+            make_business(owner, f'Diner {i}', avg_rating=(4.5, 3, 3, 1)[i % 4])
+        for i in range(5):
+            make_business(owner, f'Gym {i}', category='Fitness', avg_rating=5)
+        make_business(owner, 'Pending Diner', avg_rating=5, approved=False)
+
+    def names(self, businesses):
+        return [business.name for business in businesses]
+
+    def test_queryset_filters(self):
+        self.assertEqual(Business.objects.approved().count(), 25)
+        self.assertEqual(self.names(Business.objects.pending()), ['Pending Diner'])
+        self.assertEqual(Business.objects.with_status('all').count(), 26)
+        self.assertEqual(Business.objects.approved().in_category('Fitness').count(), 5)
+        self.assertEqual(Business.objects.approved().in_category('').count(), 25)
+        self.assertEqual(Business.objects.approved().min_rating('4').count(), 10)
+        # Invalid ratings are ignored rather than failing the page
+        self.assertEqual(Business.objects.approved().min_rating('high').count(), 25)
+        self.assertEqual(sorted(Business.objects.categories()), ['Fitness', 'Restaurants'])
+
+    def test_rating_order_breaks_ties(self):
+        diners = Business.objects.approved().in_category('Restaurants')
+        expected = sorted(diners, key=lambda business: (business.avg_rating, business.review_count, business.pk),
+                          reverse=True)
+        self.assertEqual(list(diners.by_rating()), expected)
+
+    def test_category_pages_read_one_page(self):
+        ordered = self.names(Business.objects.approved().in_category('Restaurants').by_rating())
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/category/Restaurants/', {'page': 2})
+        page = response.context['businesses']
+        self.assertEqual(self.names(page), ordered[LISTING_PAGE_SIZE:2 * LISTING_PAGE_SIZE])
+        self.assertEqual(page.paginator.count, 20)
+        listing = [q['sql'] for q in queries.captured_queries if 'FROM "core_business"' in q['sql']]
+        self.assertTrue(all('LIMIT' in sql or 'COUNT(' in sql for sql in listing), listing)
+        # Out of range pages show the last one
+        self.assertEqual(self.client.get('/category/Restaurants/', {'page': 99}).context['businesses'].number, 3)
+
+    def test_search_browse_filters_in_the_database(self):
+        response = self.client.get('/search/', {'category': 'Restaurants', 'rating': '3'})
+        page = response.context['businesses']
+        self.assertEqual(page.paginator.count, 15)
+        self.assertEqual(
+            self.names(page),
+            self.names(Business.objects.approved().in_category('Restaurants').min_rating(3).by_rating()[:LISTING_PAGE_SIZE]))
+        self.assertNotIn('Pending Diner', self.names(page))
@@ -0,0 +1,94 @@
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core.models import Business
+from core.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page
+from core.views import DASHBOARD_PAGE_SIZE
+
+from .factories import make_business
+
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor([4.5, 12])), [4.5, 12])
+
+    def test_garbage_is_invalid(self):
+        for cursor in ('not a cursor', encode_cursor({'a': 1})[:-2], encode_cursor('text')):
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                decode_cursor(cursor)
+
+
+class KeysetPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner')
+        # Many ties on the rating, so pages must break them by primary key
+        for i in range(23):
+            make_business(owner, f'Shop {i}', avg_rating=(5, 4, 4, 3)[i % 4])
+
+    def walk(self, queryset, per_page):
+        items, cursor, pages = [], None, 0
+        while True:
+            page, cursor = keyset_page(queryset, 'avg_rating', cursor, per_page)
+            items.extend(page)
+            pages += 1
+            if cursor is None:
+                return items, pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        expected = list(Business.objects.order_by('-avg_rating', '-pk'))
+        items, pages = self.walk(Business.objects.all(), per_page=5)
+        self.assertEqual(items, expected)
+        self.assertEqual(pages, 5)
+
+    def test_values_querysets(self):
+        expected = list(Business.objects.order_by('-avg_rating', '-pk').values_list('pk', flat=True))
+        items, _ = self.walk(Business.objects.values('id', 'avg_rating'), per_page=10)
+        self.assertEqual([row['id'] for row in items], expected)
+
+    def test_last_page_has_no_cursor(self):
+        items, cursor = keyset_page(Business.objects.all(), 'avg_rating', per_page=23)
+        self.assertEqual((len(items), cursor), (23, None))
+
+    def test_cursor_of_another_field_is_invalid(self):
+        _, cursor = keyset_page(Business.objects.all(), 'avg_rating', per_page=5)
+        with self.assertRaises(InvalidCursor):
+            keyset_page(Business.objects.all(), 'created_at', cursor)
+        with self.assertRaises(InvalidCursor):
+            keyset_page(Business.objects.all(), 'avg_rating', encode_cursor(['high', 1]))
+
+
+class DashboardPagingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', is_staff=True)
+        for i in range(DASHBOARD_PAGE_SIZE + 5):
+            make_business(cls.staff, f'Shop {i}', approved=i % 2 == 0)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def test_tabs_page_by_cursor(self):
+        url = reverse('admin_dashboard')
+        first = self.client.get(url)
+        self.assertEqual(len(first.context['businesses']), DASHBOARD_PAGE_SIZE)
+        second = self.client.get(url, {'tab': 'businesses', 'after': first.context['next_cursor']})
+        self.assertEqual(len(second.context['businesses']), 5)
+        self.assertIsNone(second.context['next_cursor'])
+        names = [business.name for business in list(first.context['businesses']) + list(second.context['businesses'])]
+        self.assertEqual(names, [f'Shop {i}' for i in reversed(range(DASHBOARD_PAGE_SIZE + 5))])
+
+    def test_status_filter(self):
+        response = self.client.get(reverse('admin_dashboard'), {'status': 'pending'})
+        self.assertEqual(len(response.context['businesses']), (DASHBOARD_PAGE_SIZE + 5) // 2)
+        self.assertTrue(all(not business.is_approved for business in response.context['businesses']))
+        self.assertEqual(response.context['pending_count'], (DASHBOARD_PAGE_SIZE + 5) // 2)
+
+    def test_bad_cursor_goes_back_to_the_first_page(self):
+        response = self.client.get(reverse('admin_dashboard'), {'tab': 'reviews', 'after': 'bogus'})
+        self.assertRedirects(response, f"{reverse('admin_dashboard')}?tab=reviews", fetch_redirect_response=False)
+
+    def test_staff_only(self):
+        self.client.force_login(User.objects.create_user('visitor'))
+        self.assertRedirects(self.client.get(reverse('admin_dashboard')), reverse('home'), fetch_redirect_response=False)
@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import resolve
+
+from core.models import Review
+from core.profiling import QueryBudgetExceeded
+
+from .factories import make_business
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.staff = User.objects.create_user('staff', is_staff=True)
+        reviewers = [User.objects.create_user(f'reviewer{i}') for i in range(3)]
+        cls.businesses = [
+            make_business(cls.owner, f'Friendly Place {i}', category=('Restaurants', 'Retail', 'Fitness')[i % 3],
+                          address='1 Main St, Springfield, IL')
+            for i in range(30)
+        ]
+        make_business(cls.owner, 'Pending Place', approved=False)
+        for business in cls.businesses[:10]:
+            for rating, reviewer in enumerate(reviewers, start=3):
+                Review.objects.create(business=business, user=reviewer, rating=rating, comment='Fine')
+
+    def setUp(self):
+        # Cold caches, so every page runs its full set of queries
+        cache.clear()
+
+    def get(self, url, user=None):
+        if user is not None:
+            self.client.force_login(user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return resolve(url.split('?')[0]).url_name
+
+    def test_budgets_are_strict_under_test(self):
+        self.assertTrue(settings.QUERY_BUDGETS_STRICT)
+
+    def test_pages_stay_within_their_budgets(self):
+        # Any page over its budget raises QueryBudgetExceeded here
+        business = self.businesses[0]
+        checked = {
+            self.get('/'),
+            self.get('/search/?q=friendly'),
+            self.get('/search/autocomplete/?q=fri'),
+            self.get('/category/Restaurants/'),
+            self.get(f'/business/{business.pk}/'),
+            self.get('/api/v1/businesses/?limit=20'),
+            self.get('/api/v1/businesses/search/?q=friendly'),
+            self.get('/api/v1/businesses/nearby/?lat=39.78&lng=-89.65&radius=10'),
+            self.get(f'/api/v1/businesses/{business.pk}/'),
+            self.get(f'/api/v1/businesses/{business.pk}/reviews/'),
+            self.get('/profile/', self.owner),
+            self.get('/dashboard/', self.staff),
+            self.get('/dashboard/?tab=reviews', self.staff),
+        }
+        self.assertEqual(checked, set(settings.QUERY_BUDGETS))
+
+    @override_settings(QUERY_BUDGETS={'category': 0})
+    def test_overrun_raises(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'category ran'):
+            self.client.get('/category/Restaurants/')
+
+    @override_settings(QUERY_BUDGETS={'category': 0}, QUERY_BUDGETS_STRICT=False)
+    def test_overrun_is_logged_otherwise(self):
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            response = self.client.get('/category/Restaurants/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('over its budget of 0', logs.output[0])
@@ -0,0 +1,102 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.forms.models import model_to_dict
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.forms import BusinessForm
+from core.models import Business, Review
+from core.ratings import deferred_rating_updates, rebuild_rating_aggregates
+
+from .factories import make_business
+
+AGGREGATE_FIELDS = ['review_count', 'rating_sum', 'avg_rating'] + [f'rating_{i}_count' for i in range(1, 6)]
+
+
+def aggregates(business):
+    return Business.objects.filter(pk=business.pk).values(*AGGREGATE_FIELDS).get()
+
+
+class RatingAggregateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.reviewers = [User.objects.create_user(f'reviewer{i}') for i in range(4)]
+        cls.business = make_business(cls.owner, 'Corner Cafe')
+
+    def review(self, reviewer, rating):
+        return Review.objects.create(business=self.business, user=reviewer, rating=rating, comment='Good')
+
+    def assertAggregatesRebuilt(self):
+        # What the signals maintained matches a recount from the reviews
+        before = aggregates(self.business)
+        rebuild_rating_aggregates([self.business.pk])
+        self.assertEqual(before, aggregates(self.business))
+
+    def test_review_writes_keep_the_aggregates(self):
+        first = self.review(self.reviewers[0], 5)
+        self.review(self.reviewers[1], 2)
+        stored = aggregates(self.business)
+        self.assertEqual((stored['review_count'], stored['rating_sum'], stored['avg_rating']), (2, 7, 3.5))
+        self.assertEqual((stored['rating_5_count'], stored['rating_2_count']), (1, 1))
+
+        first = Review.objects.get(pk=first.pk)
+        first.rating = 4
+        first.save()
+        stored = aggregates(self.business)
+        self.assertEqual((stored['rating_sum'], stored['avg_rating'], stored['rating_5_count']), (6, 3.0, 0))
+        self.assertAggregatesRebuilt()
+
+        Review.objects.filter(business=self.business).get(rating=2).delete()
+        self.assertEqual(aggregates(self.business)['avg_rating'], 4.0)
+        first.delete()
+        stored = aggregates(self.business)
+        self.assertEqual((stored['review_count'], stored['rating_sum'], stored['avg_rating']), (0, 0, 0))
+        self.assertAggregatesRebuilt()
+
+    def test_deferred_updates_recount_once(self):
+        for rating, reviewer in enumerate(self.reviewers, start=1):
+            self.review(reviewer, rating)
+        with CaptureQueriesContext(connection) as queries:
+            with deferred_rating_updates():
+                Review.objects.filter(business=self.business, rating__lte=2).delete()
+        updates = [q for q in queries.captured_queries if 'UPDATE "core_business"' in q['sql']]
+        self.assertEqual(len(updates), 1)
+        stored = aggregates(self.business)
+        self.assertEqual((stored['review_count'], stored['avg_rating'], stored['rating_1_count']), (2, 3.5, 0))
+        self.assertAggregatesRebuilt()
+
+    def test_deferred_rating_is_recounted(self):
+        self.review(self.reviewers[0], 5)
+        self.review(self.reviewers[1], 3)
+        review = Review.objects.defer('rating').get(user=self.reviewers[0])
+        self.assertFalse(hasattr(review, '_loaded_rating'))
+        review.comment = 'Better'
+        review.save()
+        self.assertEqual(aggregates(self.business)['review_count'], 2)
+        self.assertAggregatesRebuilt()
+        Review.objects.only('id', 'business_id', 'user_id').get(user=self.reviewers[1]).delete()
+        stored = aggregates(self.business)
+        self.assertEqual((stored['review_count'], stored['avg_rating'], stored['rating_3_count']), (1, 5.0, 0))
+
+    def business_updates(self, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(url, data or {})
+        return [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "core_business"')]
+
+    def test_business_edits_leave_the_aggregates(self):
+        # A review saved while the page was open must not be overwritten
+        self.review(self.reviewers[0], 5)
+        self.client.force_login(self.owner)
+        data = {field: value or '' for field, value in model_to_dict(self.business, BusinessForm.Meta.fields).items()}
+        updates = self.business_updates(reverse('edit_business', args=[self.business.pk]), {**data, 'name': 'Corner Coffee'})
+        staff = User.objects.create_user('staff', is_staff=True)
+        self.client.force_login(staff)
+        updates += self.business_updates(reverse('approve_business', args=[self.business.pk]))
+        self.assertEqual(len(updates), 2)
+        for sql in updates:
+            self.assertNotIn('"review_count"', sql)
+            self.assertNotIn('"avg_rating"', sql)
+        self.assertEqual(Business.objects.get(pk=self.business.pk).name, 'Corner Coffee')
+        self.assertEqual(aggregates(self.business)['avg_rating'], 5.0)
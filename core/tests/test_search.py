@@ -0,0 +1,71 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from core import search
+
+from .factories import make_business
+
+
+class SearchIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.bakery = make_business(cls.owner, 'Sunrise Bakery', description='Fresh bread and pastries')
+        cls.gym = make_business(cls.owner, 'Iron Gym', category='Fitness', description='Weights and classes')
+        cls.pending = make_business(cls.owner, 'Hidden Bakery', approved=False)
+
+    def test_ranks_name_matches_and_skips_unapproved(self):
+        self.assertEqual(search.search('bakery'), [self.bakery.pk])
+
+    def test_plurals_and_prefixes_match(self):
+        self.assertEqual(search.search('bakeries'), [self.bakery.pk])
+        self.assertEqual(search.search('past'), [self.bakery.pk])
+
+    def test_edits_and_deletes_update_the_index(self):
+        self.gym.name = 'Iron Bakery'
+        self.gym.save()
+        self.assertCountEqual(search.search('bakery'), [self.bakery.pk, self.gym.pk])
+        self.bakery.delete()
+        self.assertEqual(search.search('bakery'), [self.gym.pk])
+
+    def test_approval_adds_to_the_index(self):
+        self.pending.is_approved = True
+        self.pending.save()
+        self.assertCountEqual(search.search('bakery'), [self.bakery.pk, self.pending.pk])
+
+
+class FilteredSearchTests(TestCase):
+    """Filters apply to every match, not only the best scored ones."""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner')
+        cls.matches = [
+            make_business(owner, f'Friendly Cafe {i}', description='friendly ' * (i % 5 + 1))
+            for i in range(40)
+        ]
+        # The weakest matches are the ones the filters ask for
+        cls.fitness = [
+            make_business(owner, f'Gym {i}', category='Fitness', avg_rating=4.5, description='friendly staff ' + 'x ' * 50)
+            for i in range(6)
+        ]
+
+    def test_filters_keep_low_scored_matches(self):
+        self.assertEqual(len(search.search('friendly')), 46)
+        self.assertCountEqual(search.search('friendly', 'Fitness', '4'), [b.pk for b in self.fitness])
+
+    def test_limit_applies_after_the_filters(self):
+        ranked = search.search('friendly', 'Fitness', limit=3)
+        self.assertEqual(len(ranked), 3)
+        self.assertTrue(set(ranked) <= {b.pk for b in self.fitness})
+
+    def test_api_pages_through_every_match(self):
+        seen, cursor = [], ''
+        while True:
+            page = self.client.get('/api/v1/businesses/search/', {'q': 'friendly', 'limit': 10, 'cursor': cursor}).json()
+            seen += [row['id'] for row in page['results']]
+            if not page['next_cursor']:
+                break
+            cursor = page['next_cursor']
+        self.assertEqual(len(seen), 46)
+        self.assertEqual(len(set(seen)), 46)
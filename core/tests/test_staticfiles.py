@@ -0,0 +1,88 @@
+import gzip
+import re
+import shutil
+import tempfile
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.middleware import PrecompressedStaticMiddleware
+from core.models import Business
+from core.staticfiles import minify_css, minify_js
+
+MANIFEST_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'core.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+
+
+class MinifierTests(TestCase):
+    def test_css_keeps_strings_and_descendant_selectors(self):
+        css = '/* note */\na :hover ,\nb {\n  content: "a ; b";\n  color: red;\n}\n'
+        self.assertEqual(minify_css(css), 'a :hover,b{content:"a ; b";color:red}')
+
+    def test_js_keeps_template_literals(self):
+        js = 'function f() {\n    // comment\n    return `\n    <p>\n    `;\n}\n'
+        self.assertEqual(minify_js(js), 'function f() {\nreturn `\n    <p>\n    `;\n}\n')
+
+
+class ManifestRenderingTests(TestCase):
+    """Every page must render with hashed names, where a missing file is an error."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(
+            DEBUG=False, STATIC_ROOT=cls.static_root, STORAGES=MANIFEST_STORAGES)
+        cls.settings_override.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.static_root)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner')
+        cls.business = Business.objects.create(
+            name='Corner Cafe', category='Restaurants', address='1 Main St', phone='555-0100',
+            description='Friendly cafe', services='coffee', owner=owner, is_approved=True,
+        )
+
+    def test_pages_render(self):
+        for url in ['/', '/category/Restaurants/', '/search/?q=cafe', f'/business/{self.business.pk}/',
+                    '/about/', '/faq/', '/contact/', '/accounts/login/', '/register/']:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_hashed_assets_are_served_precompressed(self):
+        body = self.client.get('/').content.decode()
+        url = re.search(r'/static/css/style\.[0-9a-f]{12}\.css', body).group(0)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertIn(b':root{', gzip.decompress(b''.join(response.streaming_content)))
+
+    async def test_async_chain_streams_from_a_thread(self):
+        async def get_response(request):
+            return HttpResponse('page')
+
+        middleware = PrecompressedStaticMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        url = next(url for url, (variants, _, _) in middleware.files.items() if url.endswith('.css') and 'gzip' in variants)
+        response = await middleware(RequestFactory().get(url, HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertTrue(response.is_async)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        response.close()
+        self.assertEqual(len(body), int(response['Content-Length']))
+        revalidated = await middleware(RequestFactory().get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']))
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual((await middleware(RequestFactory().get('/about/'))).content, b'page')
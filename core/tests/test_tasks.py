@@ -0,0 +1,66 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import tasks
+from core.models import Task
+
+calls = []
+
+
+@tasks.task
+def record_call(value):
+    calls.append(value)
+
+
+@override_settings(TASKS_EAGER=False)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_a_pending_key_is_queued_once(self):
+        first = tasks.enqueue('record_call', 1, key='record:1')
+        self.assertEqual(tasks.enqueue('record_call', 1, key='record:1'), first)
+        self.assertEqual(Task.objects.filter(key='record:1').count(), 1)
+        # The database refuses a second pending task, whoever inserts it
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Task.objects.create(name='record_call', args='[1]', key='record:1', pending_key='record:1')
+
+    def test_claiming_frees_the_key(self):
+        first = tasks.enqueue('record_call', 1, key='record:1')
+        self.assertEqual(tasks.claim(), first)
+        second = tasks.enqueue('record_call', 1, key='record:1')
+        self.assertNotEqual(second, first)
+        tasks.run(first)
+        self.assertEqual(tasks.run_pending(), (1, 0))
+        self.assertEqual(calls, [1, 1])
+
+    def test_tasks_without_a_key_are_all_queued(self):
+        tasks.enqueue('record_call', 1)
+        tasks.enqueue('record_call', 1)
+        self.assertEqual(tasks.run_pending(), (2, 0))
+
+    def test_old_finished_tasks_are_purged(self):
+        for value in range(3):
+            tasks.enqueue('record_call', value)
+        tasks.run_pending()
+        failed = Task.objects.create(name='missing_task', status=Task.FAILED)
+        Task.objects.filter(args='[0]').update(updated_at=timezone.now() - timedelta(days=2))
+        Task.objects.exclude(args='[0]').update(updated_at=timezone.now() - timedelta(days=10))
+        self.assertEqual(tasks.purge_finished(keep_days=7), 2)
+        self.assertQuerySetEqual(Task.objects.order_by('pk'), [Task.objects.get(args='[0]'), failed])
+
+    @override_settings(TASKS_KEEP_DAYS=1)
+    def test_worker_purges_and_runs(self):
+        done = Task.objects.create(name='record_call', args='[0]', status=Task.DONE)
+        Task.objects.filter(pk=done.pk).update(updated_at=timezone.now() - timedelta(days=2))
+        tasks.enqueue('record_call', 1)
+        out = StringIO()
+        call_command('run_tasks', once=True, stdout=out)
+        self.assertIn('Deleted 1 finished tasks.', out.getvalue())
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.filter(pk=done.pk).exists())
@@ -1,13 +1,22 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, async_views, export, views
 
-urlpatterns = [
-    path('', views.home, name='home'),
-    path('search/', views.search, name='search'),
-    path('category/<str:category>/', views.category, name='category'),
+
+def page_patterns(pages):
+    """Routes of the read-heavy pages, served by ``views`` or ``async_views``."""
+    return [
+        path('', pages.home, name='home'),
+        path('search/', pages.search, name='search'),
+        path('category/<str:category>/', pages.category, name='category'),
+        path('business/<int:pk>/', pages.business_detail, name='business_detail'),
+    ]
+
+
+urlpatterns = page_patterns(async_views if settings.ASYNC_VIEWS else views) + [
+    path('search/autocomplete/', views.autocomplete, name='autocomplete'),
     path('register/', views.register, name='register'),
     path('business/create/', views.create_business, name='create_business'),
-    path('business/<int:pk>/', views.business_detail, name='business_detail'),
     path('business/<int:pk>/edit/', views.edit_business, name='edit_business'),
     path('business/<int:pk>/delete/', views.delete_business, name='delete_business'),
     path('review/<int:review_id>/reply/', views.add_review_reply, name='add_review_reply'),
@@ -16,7 +25,15 @@ urlpatterns = [
     path('contact/', views.contact, name='contact'),
     path('faq/', views.faq, name='faq'),
     path('dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('dashboard/stats/', views.profiling_stats, name='profiling_stats'),
+    path('dashboard/export/<str:dataset>/', export.export, name='export'),
+    path('dashboard/bulk/', views.admin_bulk_action, name='admin_bulk_action'),
     path('dashboard/business/<int:pk>/approve/', views.approve_business, name='approve_business'),
     path('dashboard/user/<int:user_id>/toggle-staff/', views.toggle_staff, name='toggle_staff'),
     path('dashboard/review/<int:review_id>/delete/', views.delete_review, name='delete_review'),
-] 
\ No newline at end of file
+    path('api/v1/businesses/', api.business_list, name='api_business_list'),
+    path('api/v1/businesses/search/', api.business_search, name='api_business_search'),
+    path('api/v1/businesses/nearby/', api.business_nearby, name='api_business_nearby'),
+    path('api/v1/businesses/<int:pk>/', api.business_detail, name='api_business_detail'),
+    path('api/v1/businesses/<int:pk>/reviews/', api.business_reviews, name='api_business_reviews'),
+]
@@ -1,130 +1,184 @@
+import hashlib
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q, Avg
+from django.db.models import Count
+from django.urls import reverse
+from django.utils import timezone
 from .models import Business, Review, UserProfile, User
+from . import autocomplete as autocomplete_index
+from . import cache as listing_cache
+from . import compression
+from . import db_pool
+from . import fragments
+from . import geo
+from .http_cache import business_validator, cached_page, catalog_validator, template_validator
+from . import profiling
+from . import search as search_index
+from .pagination import InvalidCursor, keyset_page
+from .profiles import deferred_counter_updates, rebuild_profile_counters
+from .jobs import queue_listing_refresh
+from .ratings import deferred_rating_updates
+from .tasks import enqueue
 from .forms import (
     UserRegistrationForm, BusinessForm, ReviewForm,
     ReviewReplyForm, UserProfileForm, ContactForm
 )
-from django.http import HttpResponseForbidden
+from django.http import HttpResponseForbidden, JsonResponse
+
+LISTING_PAGE_SIZE = 9
+# "Near" search radius options, in km
+SEARCH_RADII = (1, 5, 10, 25, 50)
+DEFAULT_SEARCH_RADIUS = 10
+MAX_SEARCH_RADIUS = 200
+REVIEWS_PER_PAGE = 10
+DASHBOARD_PAGE_SIZE = 25
+PROFILE_PAGE_SIZE = 10
+DASHBOARD_TABS = ('businesses', 'users', 'reviews')
 
+@cached_page(catalog_validator)
 def home(request):
-    # Fetch all businesses and perform filtering/annotation/sorting in Python
-    all_businesses = Business.objects.all()
-    
-    # Filter approved businesses in Python
-    approved_businesses = [b for b in all_businesses if getattr(b, 'is_approved', False)]
-    
-    # Annotate with average rating in Python
-    for business in approved_businesses:
-        reviews = Review.objects.filter(business=business)
-        business.avg_rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0
-        
-    # Sort by average rating (descending) and take the top 4 in Python
-    featured_businesses = sorted(approved_businesses, key=lambda x: x.avg_rating, reverse=True)[:4]
+    # Top 4 approved businesses by stored average rating, cached until a business or review changes
+    featured_businesses = listing_cache.featured_businesses()
     
     # Get all unique categories
-    categories = Business.objects.values_list('category', flat=True).distinct()
+    categories = listing_cache.categories()
+    
+    # Card markup comes from the fragment cache, one multi-get for all cards
+    fragments.render_fragments('includes/featured_card.html', featured_businesses, 'business')
     
     return render(request, 'home.html', {
         'featured_businesses': featured_businesses,
         'categories': categories,
     })
 
+def search_location(params):
+    """
+    (latitude, longitude, radius in km) of a "near" search: a place looked
+    up in the gazetteer, or the browser's position from the Near me button.
+    None when there is no location or the place is unknown.
+    """
+    try:
+        radius = float(params.get('radius') or DEFAULT_SEARCH_RADIUS)
+    except ValueError:
+        radius = DEFAULT_SEARCH_RADIUS
+    radius = min(max(radius, 0.1), MAX_SEARCH_RADIUS)
+    if params.get('near'):
+        point = geo.geocode(params['near'])
+        if point is None:
+            return None
+        latitude, longitude = point
+    else:
+        try:
+            latitude, longitude = float(params['lat']), float(params['lng'])
+        except (KeyError, ValueError):
+            return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude, radius
+
+def search_page(query, category, rating_filter, page, location=None):
+    """The requested page of results and the facet counts of all of them."""
+    if location:
+        # Nearest first; only the businesses in the cells around the point are read
+        ranked, facets, distances = search_index.nearby_search(query, *location, category, rating_filter)
+        businesses_page = Paginator(ranked, LISTING_PAGE_SIZE).get_page(page)
+        found = Business.objects.in_bulk(businesses_page.object_list)
+        businesses_page.object_list = [found[pk] for pk in businesses_page.object_list if pk in found]
+        for business in businesses_page.object_list:
+            business.distance = distances[business.pk]
+        return businesses_page, facets
+    if query:
+        # Rank matches from the inverted index, as deep as the requested page;
+        # only that page is loaded
+        try:
+            depth = max(int(page), 1) * LISTING_PAGE_SIZE
+        except (TypeError, ValueError):
+            depth = LISTING_PAGE_SIZE
+        ranked, facets = search_index.faceted_search(query, category, rating_filter, limit=depth)
+        paginator = Paginator(ranked, LISTING_PAGE_SIZE)
+        paginator.count = search_index.result_count(facets, category)
+        businesses_page = paginator.get_page(page)
+        found = Business.objects.in_bulk(businesses_page.object_list)
+        businesses_page.object_list = [found[pk] for pk in businesses_page.object_list if pk in found]
+        return businesses_page, facets
+    # Without a query the facets cover the whole catalog and are cached
+    facets = search_index.count_facets(listing_cache.facet_rows(), category, rating_filter)
+    # Approval, category and rating filters all run in the database
+    businesses = Business.objects.approved().in_category(category).min_rating(rating_filter).by_rating()
+    # Paginate with LIMIT/OFFSET on the queryset; the facets already hold the
+    # number of matches, which saves the COUNT query
+    paginator = Paginator(businesses, LISTING_PAGE_SIZE)
+    paginator.count = search_index.result_count(facets, category)
+    return paginator.get_page(page), facets
+
 def search(request):
     query = request.GET.get('q', '')
     category = request.GET.get('category', '')
     rating_filter = request.GET.get('rating', '')
     
-    # Fetch all approved businesses and perform filtering/annotation in Python due to Djongo compatibility issues
-    all_businesses = Business.objects.all()
+    location = search_location(request.GET)
     
-    # Filter approved businesses first in Python
-    businesses = [b for b in all_businesses if getattr(b, 'is_approved', False)]
-    
-    # Apply text query filter in Python
-    if query:
-        businesses = [b for b in businesses if 
-                      query.lower() in getattr(b, 'name', '').lower() or 
-                      query.lower() in getattr(b, 'category', '').lower() or 
-                      query.lower() in getattr(b, 'description', '').lower() or 
-                      query.lower() in getattr(b, 'address', '').lower()]
-                      
-    # Apply category filter in Python
-    if category:
-        businesses = [b for b in businesses if getattr(b, 'category', '') == category]
-        
-    # Calculate average rating and apply rating filter in Python
-    businesses_with_ratings = []
-    for business in businesses:
-        reviews = Review.objects.filter(business=business)
-        # Calculate average rating, default to 0 if no reviews
-        avg_rating_agg = reviews.aggregate(Avg('rating'))['rating__avg']
-        business.avg_rating = avg_rating_agg if avg_rating_agg is not None else 0
-        businesses_with_ratings.append(business)
-        
-    # Apply rating filter
-    if rating_filter:
-        try:
-            min_rating = float(rating_filter)
-            businesses_with_ratings = [b for b in businesses_with_ratings if b.avg_rating >= min_rating]
-        except ValueError:
-            pass # Ignore invalid rating filter
-            
-    # Sort by average rating (descending) as a default order, can be adjusted
-    businesses_with_ratings.sort(key=lambda x: x.avg_rating, reverse=True)
-
-    # Get all categories for the filter dropdown (this query might work with Djongo)
-    categories = Business.objects.values_list('category', flat=True).distinct()
+    # Category and rating options come with the counts of the current results
+    businesses_page, facets = search_page(query, category, rating_filter, request.GET.get('page'), location)
     
-    # Paginate the results in Python
-    paginator = Paginator(businesses_with_ratings, 9)
-    page = request.GET.get('page')
-    businesses_page = paginator.get_page(page)
+    fragments.render_fragments(
+        'includes/business_card.html', businesses_page.object_list, 'business',
+        {'show_category': True}, variant='search',
+    )
     
     return render(request, 'search_results.html', {
         'businesses': businesses_page,
         'query': query,
-        'categories': categories,
+        'facets': facets,
         'selected_category': category,
-        'selected_rating': rating_filter
+        'selected_rating': rating_filter,
+        **search_location_context(request.GET, location),
     })
 
-def category(request, category):
-    # Fetch all businesses and perform filtering/annotation/sorting in Python due to Djongo compatibility issues
-    all_businesses = Business.objects.all()
-
-    # Filter by category and approved status in Python
-    businesses = [b for b in all_businesses if getattr(b, 'category', '') == category and getattr(b, 'is_approved', False)]
-
-    # Annotate with average rating in Python
-    businesses_with_ratings = []
-    for business in businesses:
-        reviews = Review.objects.filter(business=business)
-        # Calculate average rating, default to 0 if no reviews
-        avg_rating_agg = reviews.aggregate(Avg('rating'))['rating__avg']
-        business.avg_rating = avg_rating_agg if avg_rating_agg is not None else 0
-        businesses_with_ratings.append(business)
+def search_location_context(params, location):
+    """Template context of the location filters, shared with the async view."""
+    filters = params.copy()
+    filters.pop('page', None)
+    return {
+        'location': location,
+        'near': params.get('near', ''),
+        'unknown_place': bool(params.get('near')) and location is None,
+        'radius_options': SEARCH_RADII,
+        'selected_radius': location[2] if location else DEFAULT_SEARCH_RADIUS,
+        'filter_query': filters.urlencode(),
+    }
 
-    # Sort by average rating (descending) in Python
-    businesses_with_ratings.sort(key=lambda x: x.avg_rating, reverse=True)
+def autocomplete(request):
+    query = request.GET.get('q', '')
+    try:
+        limit = min(max(int(request.GET.get('limit', 8)), 1), 20)
+    except ValueError:
+        limit = 8
+    return JsonResponse({
+        'query': query,
+        'results': autocomplete_index.suggest(query, limit),
+    })
 
-    # Create a list for star rating display for each business
-    for business in businesses_with_ratings:
-        business.star_range = range(int(round(business.avg_rating)))
+@cached_page(catalog_validator)
+def category(request, category):
+    # Filter by category and approved status and sort by rating in the database
+    businesses = Business.objects.approved().in_category(category).by_rating()
 
-    # Paginate the results in Python
-    paginator = Paginator(businesses_with_ratings, 9)
+    # Paginate with LIMIT/OFFSET on the queryset
+    paginator = Paginator(businesses, LISTING_PAGE_SIZE)
     page = request.GET.get('page')
     businesses_page = paginator.get_page(page)
 
+    # Cards are rendered once per business version and reused from the cache
+    fragments.render_fragments('includes/business_card.html', businesses_page, 'business', variant='category')
+
     return render(request, 'category.html', {
         'businesses': businesses_page,
         'category': category,
-        'total_reviews': sum(b.reviews.count() for b in businesses) # Pass total reviews for percentage calculation in template
     })
 
 def register(request):
@@ -132,7 +186,6 @@ def register(request):
         form = UserRegistrationForm(request.POST)
         if form.is_valid():
             user = form.save()
-            UserProfile.objects.create(user=user)
             login(request, user)
             messages.success(request, 'Registration successful!')
             return redirect('home')
@@ -160,7 +213,9 @@ def edit_business(request, pk):
     if request.method == 'POST':
         form = BusinessForm(request.POST, instance=business)
         if form.is_valid():
-            form.save()
+            # Only the edited fields (and the geohash derived from them), the
+            # rating aggregates may have moved since they were read
+            form.save(commit=False).save(update_fields=[*BusinessForm.Meta.fields, 'geohash', 'updated_at'])
             messages.success(request, 'Business listing updated successfully!')
             return redirect('business_detail', pk=business.pk)
     else:
@@ -176,44 +231,51 @@ def delete_business(request, pk):
         return redirect('home')
     return render(request, 'delete_business.html', {'business': business})
 
+@cached_page(business_validator)
 def business_detail(request, pk):
     business = get_object_or_404(Business, pk=pk)
-    reviews = business.reviews.all().order_by('-created_at')
-    
-    # Calculate average rating for the business
-    avg_rating_agg = reviews.aggregate(Avg('rating'))['rating__avg']
-    business.avg_rating = avg_rating_agg if avg_rating_agg is not None else 0
-    
-    # Create a list for star rating display
-    # Round the average rating and create a list of that many items
-    star_range = range(int(round(business.avg_rating)))
     
     if request.method == 'POST':
         if not request.user.is_authenticated:
             return redirect('login')
             
-        rating = request.POST.get('rating')
-        comment = request.POST.get('comment')
+        # Validate through ReviewForm so only 1-5 ratings reach the stored aggregates
+        form = ReviewForm(request.POST)
         
-        if rating and comment:
+        if form.is_valid():
             # Check if user has already reviewed this business
             if Review.objects.filter(business=business, user=request.user).exists():
                 messages.warning(request, 'You have already reviewed this business.')
             else:
-                Review.objects.create(
-                    business=business,
-                    user=request.user,
-                    rating=rating,
-                    comment=comment
-                )
+                review = form.save(commit=False)
+                review.business = business
+                review.user = request.user
+                review.save()
                 messages.success(request, 'Review added successfully!')
             return redirect('business_detail', pk=pk)
     
-    # Calculate review counts for each rating level
+    # Paginate reviews, fetching each page together with its authors in one query
+    paginator = Paginator(business_reviews(business.pk), REVIEWS_PER_PAGE)
+    # The stored counter already holds the total, skip the COUNT query
+    paginator.count = business.review_count or 0
+    reviews_page = paginator.get_page(request.GET.get('reviews_page'))
+    return render(request, 'business_detail.html', business_detail_context(business, reviews_page))
+
+def business_reviews(business_id):
+    return Review.objects.filter(business_id=business_id).select_related('user').order_by('-created_at', '-pk')
+
+def business_detail_context(business, reviews_page):
+    # Average rating is stored on the business and kept up to date on review writes
+    business.avg_rating = business.avg_rating or 0
+    
+    # Create a list for star rating display
+    # Round the average rating and create a list of that many items
+    star_range = range(int(round(business.avg_rating)))
+    
+    # Review counts for each rating level come from the counters stored on the business
+    total_reviews = business.review_count or 0
     rating_counts = {}
-    total_reviews = reviews.count()
-    for i in range(1, 6):
-        count = reviews.filter(rating=i).count()
+    for i, count in business.rating_counts().items():
         rating_counts[i] = {
             'count': count,
             'percentage': (count / total_reviews * 100) if total_reviews > 0 else 0
@@ -227,16 +289,21 @@ def business_detail(request, pk):
             'count': rating_counts.get(i, {}).get('count', 0),
             'percentage': rating_counts.get(i, {}).get('percentage', 0)
         })
+    
+    # Review blocks are cached without the owner's reply form, which holds a CSRF token
+    fragments.render_fragments(
+        'includes/review.html', reviews_page, 'review',
+        {'business_name': business.name}, variant=business.name,
+    )
         
-    context = {
+    return {
         'business': business,
-        'reviews': reviews,
+        'reviews': reviews_page,
         'rating_counts': rating_counts, # Keep original for reference if needed elsewhere
         'total_reviews': total_reviews, # Pass total reviews for percentage calculation in template
         'rating_data_list': rating_data_list, # New list for template iteration
         'star_range': star_range,
     }
-    return render(request, 'business_detail.html', context)
 
 def add_review_reply(request, review_id):
     if not request.user.is_authenticated:
@@ -257,25 +324,44 @@ def add_review_reply(request, review_id):
 
 @login_required
 def profile(request):
-    user_profile, created = UserProfile.objects.get_or_create(user=request.user)
-    user_businesses = Business.objects.filter(owner=request.user)
-    user_reviews = Review.objects.filter(user=request.user)
+    # Profiles are created along with their user (see core.signals)
+    user_profile = UserProfile.objects.filter(user=request.user).first()
+    if user_profile is None:
+        # Users bulk inserted without one, once per such user
+        rebuild_profile_counters([request.user.pk])
+        user_profile = UserProfile.objects.get(user=request.user)
     
     if request.method == 'POST':
         form = UserProfileForm(request.POST, instance=user_profile)
         if form.is_valid():
-            form.save()
+            # Only the edited fields, the counters may have moved since they were read
+            form.save(commit=False).save(update_fields=['phone', 'address', 'bio', 'updated_at'])
             messages.success(request, 'Profile updated successfully!')
             return redirect('profile')
     else:
         form = UserProfileForm(instance=user_profile)
     
+    # One page of each list, newest first; counts come from the profile's counters
+    try:
+        user_businesses, next_businesses = keyset_page(
+            Business.objects.filter(owner=request.user), 'created_at',
+            request.GET.get('businesses_after'), PROFILE_PAGE_SIZE)
+        user_reviews, next_reviews = keyset_page(
+            Review.objects.filter(user=request.user).select_related('business'), 'created_at',
+            request.GET.get('reviews_after'), PROFILE_PAGE_SIZE)
+    except InvalidCursor:
+        return redirect('profile')
+    
     return render(request, 'profile.html', {
         'form': form,
+        'user_profile': user_profile,
         'user_businesses': user_businesses,
-        'user_reviews': user_reviews
+        'next_businesses': next_businesses,
+        'user_reviews': user_reviews,
+        'next_reviews': next_reviews,
     })
 
+@cached_page(template_validator('about.html', 'base.html'), max_age=3600, s_maxage=86400)
 def about(request):
     return render(request, 'about.html')
 
@@ -283,13 +369,18 @@ def contact(request):
     if request.method == 'POST':
         form = ContactForm(request.POST)
         if form.is_valid():
-            # Here you would typically send an email
+            # Mailed by the task worker; the key drops double submissions still in the queue
+            data = form.cleaned_data
+            digest = hashlib.md5(f"{data['email']}:{data['message']}".encode()).hexdigest()
+            enqueue('send_contact_message', data['name'], data['email'], data['message'],
+                    key=f'contact:{digest}')
             messages.success(request, 'Message sent successfully!')
             return redirect('contact')
     else:
         form = ContactForm()
     return render(request, 'contact.html', {'form': form})
 
+@cached_page(template_validator('faq.html', 'base.html'), max_age=3600, s_maxage=86400)
 def faq(request):
     return render(request, 'faq.html')
 
@@ -299,33 +390,103 @@ def admin_dashboard(request):
         messages.error(request, 'Access denied.')
         return redirect('home')
     
+    # Each tab is its own page, only the active one is queried
+    tab = request.GET.get('tab', 'businesses')
+    if tab not in DASHBOARD_TABS:
+        tab = 'businesses'
+    cursor = request.GET.get('after')
+    
     # Get status filter
     status = request.GET.get('status', 'all')
+    context = {
+        'tab': tab,
+        'status': status,
+        'pending_count': Business.objects.pending().count(),
+    }
     
-    # Fetch all businesses and filter in Python due to Djongo compatibility issues
-    all_businesses = list(Business.objects.all())
+    try:
+        if tab == 'businesses':
+            # Status filtering (including documents missing is_approved) runs in the database,
+            # owners are fetched in the same query
+            businesses = Business.objects.with_status(status).select_related('owner')
+            context['businesses'], context['next_cursor'] = keyset_page(
+                businesses, 'created_at', cursor, DASHBOARD_PAGE_SIZE)
+        elif tab == 'users':
+            users, context['next_cursor'] = keyset_page(
+                User.objects.all(), 'date_joined', cursor, DASHBOARD_PAGE_SIZE)
+            # Count businesses and reviews for the whole page with one grouped query each
+            user_ids = [user.pk for user in users]
+            business_counts = dict(
+                Business.objects.filter(owner_id__in=user_ids)
+                .values_list('owner_id').annotate(n=Count('id')).order_by()
+            )
+            review_counts = dict(
+                Review.objects.filter(user_id__in=user_ids)
+                .values_list('user_id').annotate(n=Count('id')).order_by()
+            )
+            for user in users:
+                user.business_count = business_counts.get(user.pk, 0)
+                user.review_count = review_counts.get(user.pk, 0)
+            context['users'] = users
+        else:
+            reviews = Review.objects.select_related('business', 'user')
+            context['reviews'], context['next_cursor'] = keyset_page(
+                reviews, 'created_at', cursor, DASHBOARD_PAGE_SIZE)
+    except InvalidCursor:
+        return redirect(f"{reverse('admin_dashboard')}?tab={tab}")
     
-    if status == 'pending':
-        # A business is pending if is_approved is False or the field is missing
-        businesses = [b for b in all_businesses if not getattr(b, 'is_approved', False)]
-    elif status == 'approved':
-        # A business is approved if is_approved is True
-        businesses = [b for b in all_businesses if getattr(b, 'is_approved', False)]
-    else:
-        # 'all' status or any other status gets all businesses
-        businesses = all_businesses
+    return render(request, 'admin_dashboard.html', context)
+
+@login_required
+def admin_bulk_action(request):
+    if not request.user.is_staff:
+        messages.error(request, 'Access denied.')
+        return redirect('home')
     
-    # Order businesses by creation date in Python
-    businesses.sort(key=lambda x: x.created_at, reverse=True)
+    action = request.POST.get('action')
+    tab = 'reviews' if action == 'delete_reviews' else 'businesses'
+    redirect_url = f"{reverse('admin_dashboard')}?tab={tab}"
+    if request.method != 'POST':
+        return redirect(redirect_url)
     
-    # Get users and reviews (these queries seem to be working)
-    users = User.objects.all().order_by('-date_joined')
-    reviews = Review.objects.all().order_by('-created_at')
+    ids = [int(pk) for pk in request.POST.getlist('ids') if pk.isdigit()]
+    if not ids:
+        messages.warning(request, 'No items were selected.')
+        return redirect(redirect_url)
     
-    return render(request, 'admin_dashboard.html', {
-        'businesses': businesses,
-        'users': users,
-        'reviews': reviews
+    if action == 'approve':
+        # One UPDATE for all selected listings; update() sends no signals,
+        # so recount the owners, queue the reindex and refresh the listing caches explicitly
+        selected = Business.objects.filter(pk__in=ids).pending()
+        owner_ids = set(selected.values_list('owner_id', flat=True))
+        approved = selected.update(is_approved=True, updated_at=timezone.now())
+        rebuild_profile_counters(owner_ids)
+        enqueue('index_businesses', ids)
+        queue_listing_refresh()
+        autocomplete_index.invalidate()
+        messages.success(request, f'{approved} business(es) approved.')
+    elif action == 'delete_businesses':
+        Business.objects.filter(pk__in=ids).delete()
+        messages.success(request, 'Selected businesses have been deleted.')
+    elif action == 'delete_reviews':
+        # Recount the affected businesses and reviewers once rather than once per deleted review
+        with deferred_rating_updates(), deferred_counter_updates():
+            Review.objects.filter(pk__in=ids).delete()
+        messages.success(request, 'Selected reviews have been deleted.')
+    else:
+        messages.error(request, 'Unknown action.')
+    
+    return redirect(redirect_url)
+
+@login_required
+def profiling_stats(request):
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+    return JsonResponse({
+        'views': profiling.stats.snapshot(),
+        'fragments': fragments.stats.snapshot(),
+        'database_pool': db_pool.stats.snapshot(),
+        'compression': compression.stats.snapshot(),
     })
 
 @login_required
@@ -338,7 +499,7 @@ def approve_business(request, pk):
     
     if request.method == 'POST':
         business.is_approved = True
-        business.save()
+        business.save(update_fields=['is_approved', 'updated_at'])
         messages.success(request, f'Business "{business.name}" has been approved.')
     
     return redirect('admin_dashboard')
@@ -356,7 +517,7 @@ def toggle_staff(request, user_id):
         user.save()
         messages.success(request, f'User "{user.username}" staff status has been updated.')
     
-    return redirect('admin_dashboard')
+    return redirect(f"{reverse('admin_dashboard')}?tab=users")
 
 @login_required
 def delete_review(request, review_id):
@@ -370,4 +531,4 @@ def delete_review(request, review_id):
         review.delete()
         messages.success(request, 'Review has been deleted.')
     
-    return redirect('admin_dashboard')
+    return redirect(f"{reverse('admin_dashboard')}?tab=reviews")
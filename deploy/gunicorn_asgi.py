@@ -0,0 +1,27 @@
+"""
+Gunicorn configuration for serving LocalBiz over ASGI with uvicorn workers.
+
+    pip install gunicorn uvicorn
+    gunicorn localbiz.asgi:application -c deploy/gunicorn_asgi.py
+
+Every worker runs one event loop with the async page views enabled
+(ASYNC_VIEWS); their queries run in a pool of ASYNC_QUERY_THREADS threads
+per worker, see core.concurrency.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+worker_class = 'uvicorn.workers.UvicornWorker'
+# An event loop keeps a core busy on its own, one worker per core is enough
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+raw_env = [
+    f"ASYNC_VIEWS={os.environ.get('ASYNC_VIEWS', '1')}",
+    f"ASYNC_QUERY_THREADS={os.environ.get('ASYNC_QUERY_THREADS', '32')}",
+]
+
+accesslog = '-'
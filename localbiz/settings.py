@@ -11,11 +11,17 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 
+from dotenv import load_dotenv
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Values from a .env file next to manage.py; real environment variables win
+load_dotenv(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
@@ -43,10 +49,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Ahead of sessions and auth, asset requests need neither
+    'core.middleware.PrecompressedStaticMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.QueryProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -75,21 +85,116 @@ WSGI_APPLICATION = 'localbiz.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+def _env_int(name, default):
+    value = os.environ.get(name, '')
+    return int(value) if value else default
+
+
+# djongo shares one MongoClient, and so one connection pool, between all
+# threads of a process. Closing a Django connection closes that client, so
+# connections are kept open by default (DB_CONN_MAX_AGE empty or "none")
+# rather than torn down after every request.
+_conn_max_age = os.environ.get('DB_CONN_MAX_AGE', 'none')
+
 DATABASES = {
     'default': {
         'ENGINE': 'djongo',
-        'NAME': 'localbiz_db',
+        'NAME': os.environ.get('MONGO_DB_NAME', 'localbiz_db'),
         'ENFORCE_SCHEMA': False,
+        'CONN_MAX_AGE': None if _conn_max_age.lower() in ('', 'none') else int(_conn_max_age),
         'CLIENT': {
-            'host': '127.0.0.1',
-            'port': 27017,
-            'username': '',
-            'password': '',
+            'host': os.environ.get('MONGO_HOST', '127.0.0.1'),
+            'port': _env_int('MONGO_PORT', 27017),
+            'username': os.environ.get('MONGO_USERNAME', ''),
+            'password': os.environ.get('MONGO_PASSWORD', ''),
+            # Pool limits are per process; keep maxPoolSize at or above
+            # ASYNC_QUERY_THREADS (async) or the thread count (WSGI)
+            'maxPoolSize': _env_int('MONGO_MAX_POOL_SIZE', 50),
+            'minPoolSize': _env_int('MONGO_MIN_POOL_SIZE', 0),
+            'maxIdleTimeMS': _env_int('MONGO_MAX_IDLE_TIME_MS', 300000),
+            'waitQueueTimeoutMS': _env_int('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000),
+            'serverSelectionTimeoutMS': _env_int('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000),
+            'connectTimeoutMS': _env_int('MONGO_CONNECT_TIMEOUT_MS', 5000),
+            'socketTimeoutMS': _env_int('MONGO_SOCKET_TIMEOUT_MS', 30000),
         }
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Local memory needs no outside services; point CACHE_BACKEND/CACHE_LOCATION at
+# e.g. django.core.cache.backends.redis.RedisCache in production so all
+# workers share cached listings and invalidations.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'localbiz'),
+        'TIMEOUT': _env_int('CACHE_TIMEOUT', 300),
+    }
+}
+
+# Sessions and the signed-in user are read from the cache (see core.auth);
+# session writes still go through to the database.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# The only backend, so a failed login hashes the password once; sessions
+# naming the plain ModelBackend are carried over by core.middleware
+AUTHENTICATION_BACKENDS = [
+    'core.auth.CachedModelBackend',
+]
+# Seconds other processes may see a stale user when the cache isn't shared
+USER_CACHE_TIMEOUT = _env_int('USER_CACHE_TIMEOUT', 60)
+
+
+# Query budgets
+# Maximum number of database queries per URL name, checked by
+# core.middleware.QueryProfilingMiddleware. Overruns are logged, and fail the
+# request under `manage.py test` so N+1 regressions break the test suite.
+
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
+QUERY_BUDGETS = {
+    'home': 4,
+    'search': 10,
+    'autocomplete': 3,
+    'category': 6,
+    'business_detail': 6,
+    'profile': 10,
+    'admin_dashboard': 8,
+    'api_business_list': 2,
+    'api_business_search': 8,
+    'api_business_nearby': 10,
+    'api_business_detail': 2,
+    'api_business_reviews': 3,
+}
+
+QUERY_BUDGETS_STRICT = TESTING
+
+# Serve the read-heavy pages (home, search, category, business detail) from
+# the async views in core.async_views. Only worth it when running under ASGI,
+# see deploy/gunicorn_asgi.py.
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', '').lower() in ('1', 'true', 'yes')
+
+# Threads per process running the blocking queries of async views
+ASYNC_QUERY_THREADS = _env_int('ASYNC_QUERY_THREADS', 32)
+
+# Places addresses and "near" searches are geocoded against (core.geo)
+GAZETTEER_PATH = os.environ.get('GAZETTEER_PATH', BASE_DIR / 'data' / 'gazetteer.csv')
+
+# Run background tasks (core.tasks) inline instead of queueing them for
+# `manage.py run_tasks`; on by default in development and tests
+TASKS_EAGER = os.environ.get('TASKS_EAGER', str(DEBUG or TESTING)).lower() in ('1', 'true', 'yes')
+# Finished tasks are deleted by the worker once they are this many days old
+TASKS_KEEP_DAYS = _env_int('TASKS_KEEP_DAYS', 7)
+
+# Contact form messages are mailed here by the task worker
+CONTACT_EMAIL = os.environ.get('CONTACT_EMAIL', 'info@localbiz.com')
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@localbiz.com')
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -126,6 +231,21 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+# collectstatic writes hashed, minified and precompressed copies here,
+# served by core.middleware.PrecompressedStaticMiddleware when DEBUG is off
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'core.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+if TESTING:
+    # Tests render pages without a collectstatic run (and with DEBUG off),
+    # the manifest storage is tested on its own in core.tests.test_staticfiles
+    STORAGES['staticfiles'] = {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}
+
+# Smaller response bodies are sent uncompressed by core.middleware.CompressionMiddleware
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 512))
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -36,6 +36,51 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
+// Search suggestions from the autocomplete endpoint
+document.addEventListener('DOMContentLoaded', function() {
+    const suggestInputs = document.querySelectorAll('input[data-autocomplete-url]');
+    
+    suggestInputs.forEach((input, index) => {
+        const suggestionList = document.createElement('datalist');
+        suggestionList.id = `search-suggestions-${index}`;
+        input.setAttribute('list', suggestionList.id);
+        input.after(suggestionList);
+        
+        let timeout;
+        let controller;
+        
+        input.addEventListener('input', () => {
+            clearTimeout(timeout);
+            const query = input.value.trim();
+            if (query.length < 2) {
+                suggestionList.innerHTML = '';
+                return;
+            }
+            
+            // Suggestions are cheap to serve, so a short debounce is enough
+            timeout = setTimeout(() => {
+                if (controller) {
+                    controller.abort();
+                }
+                controller = new AbortController();
+                
+                fetch(`${input.dataset.autocompleteUrl}?q=${encodeURIComponent(query)}`, { signal: controller.signal })
+                    .then(response => response.json())
+                    .then(data => {
+                        suggestionList.innerHTML = '';
+                        data.results.forEach(suggestion => {
+                            const option = document.createElement('option');
+                            option.value = suggestion.label;
+                            option.label = suggestion.type === 'category' ? 'Category' : 'Business';
+                            suggestionList.appendChild(option);
+                        });
+                    })
+                    .catch(() => {});
+            }, 150);
+        });
+    });
+});
+
 // Modal functionality
 function showModal(message, callback) {
     const modal = document.createElement('div');